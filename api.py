@@ -0,0 +1,167 @@
+"""合約生成 HTTP API（不經 Streamlit，供 CRM 等系統串接）
+
+    python api.py [--host 127.0.0.1] [--port 8502]
+
+- POST /render/docx、POST /render/pdf：JSON 輸入（欄位同 batch：party_a, payment_opt, start_dt,
+  pay_day, pay_dt, provider），回傳檔案；同樣輸入走 render_cache / registry，不重複生成
+  provider 為乙方代號（providers/<代號>.toml，省略＝預設乙方），設定檔更新後不必重啟
+- POST /messages：回傳 {"client_message", "payment_message"}
+- GET /healthz：存活檢查；CONTRACT_METRICS=1 時另提供 GET /metrics
+
+HTTP/1.1 keep-alive，每個連線一個執行緒（ThreadingHTTPServer）。
+輸入錯誤（含無法放進合約的文字，例如控制字元）回 400 {"error": ...}，生成失敗回 500。埠號：CONTRACT_API_PORT（預設 8502）
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+import metrics
+from contract import build_client_message, build_payment_message, parse_contract_row
+from render_cache import cached_docx_bytes, cached_pdf_bytes
+
+PORT = int(os.environ.get("CONTRACT_API_PORT", 8502))
+MAX_BODY_BYTES = 64 * 1024
+
+_FORMATS = {
+    "docx": (cached_docx_bytes, "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "pdf": (cached_pdf_bytes, "application/pdf"),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ContractAPI/1.0"
+    # 標頭與內容分兩次寫出；不關 Nagle 的話，keep-alive 連線每個回應都會卡在 delayed ACK（約 40 ms）
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def _read_json(self):
+        try:
+            length = int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            raise ApiError(411, "需要 Content-Length") from None
+        if length > MAX_BODY_BYTES:
+            raise ApiError(413, f"內容超過 {MAX_BODY_BYTES} bytes")
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            raise ApiError(400, f"JSON 格式錯誤：{e}") from None
+        if not isinstance(data, dict):
+            raise ApiError(400, "JSON 需為物件")
+        try:
+            return parse_contract_row(data)
+        except ValueError as e:
+            raise ApiError(400, str(e)) from None
+
+    def _discard_body(self):
+        """丟掉不處理的請求內容；長度不明或過大時不讀，改為回應後關閉連線"""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if 0 <= length <= MAX_BODY_BYTES:
+            self.rfile.read(length)
+        else:
+            self.close_connection = True
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/healthz":
+            self._send_json(200, {"status": "ok"})
+        elif path == "/metrics" and metrics.ENABLED:
+            self._send(200, metrics.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        path = self.path.split("?")[0]
+        try:
+            if path == "/messages":
+                kwargs = self._read_json()
+                self._send_json(200, {
+                    "client_message": build_client_message(**kwargs),
+                    "payment_message": build_payment_message(kwargs["provider"]),
+                })
+            elif path.startswith("/render/") and path[len("/render/"):] in _FORMATS:
+                fmt = path[len("/render/"):]
+                kwargs = self._read_json()
+                render, content_type = _FORMATS[fmt]
+                try:
+                    body = render(**kwargs)
+                except ValueError as e:
+                    # 例如甲方名稱含 XML 不允許的控制字元
+                    raise ApiError(400, str(e)) from None
+                filename = f"廣告投放合約_{kwargs['party_a']}_{kwargs['start_dt'].strftime('%Y%m%d')}.{fmt}"
+                self._send(200, body, content_type, [
+                    ("Content-Disposition", f"attachment; filename*=UTF-8''{quote(filename)}"),
+                ])
+            else:
+                # 沒讀完的內容會被當成下一個請求，回應前先丟掉
+                self._discard_body()
+                self._send_json(404, {"error": "not found"})
+                return
+        except ApiError as e:
+            # 411 / 413 時請求內容沒有讀取，這條連線不能再用
+            self.close_connection = e.status in (411, 413)
+            self._send_json(e.status, {"error": str(e)})
+            return
+        except ConnectionError:
+            # 連線中斷，無從回應
+            raise
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            metrics.inc("api_errors_total")
+            self._send_json(500, {"error": f"生成失敗：{type(e).__name__}"})
+            return
+        metrics.observe(f"api_{path.strip('/').replace('/', '_')}", time.perf_counter() - started)
+
+    def log_message(self, *args):
+        pass
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="合約生成 HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args(argv)
+
+    server = ApiServer((args.host, args.port), Handler)
+    print(f"合約 API：http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
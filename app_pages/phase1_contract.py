@@ -0,0 +1,306 @@
+"""第一階段｜合約（由 app.py 的 st.navigation 載入，只有進到這一頁才執行）
+
+行程池（render_pool）與批次生成（batch）只在按下對應按鈕時才匯入；
+python-docx / reportlab 只在背景行程真正生成檔案時才載入。
+"""
+import io
+import os
+import time
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+import metrics
+from contract import PAYMENT_OPTIONS, PLAN_CODES, build_client_message, build_payment_message
+from contract_html import render_preview_html
+from providers import get_provider
+from registry import get_registry
+from render_cache import contract_cache_key, render_cache
+from spool import get_spool, spool_reader
+
+# ====== 服務內容說明 UI（保留你原本）======
+st.header("服務內容說明")
+
+st.subheader("✅ 固定工作")
+st.markdown("""
+- **廣告上架**
+- **廣告監控 / 維護 / 優化**
+- **簡易週報**（成果摘要、下週優化方向）
+""")
+
+st.subheader("📌 非固定工作（視狀況提供）")
+st.markdown("""
+- **廣告素材建議**
+  - 依投放成效、競品、市場狀況提出方向
+- **到達頁面優化建議**
+  - 監控轉換成效
+""")
+
+# 前台白話提醒（你要求：一開始提醒帳號停用＋遠端控制客戶電腦）
+st.info("""
+現況提醒：目前我的 FB 個人帳號仍然被停用，但我仍需要每天監控你的廣告成果。
+因此我會先教你怎麼每天匯出我需要的數據（我會幫你設定好，你每天按一次匯出就可以）。
+若需要調整後台，我會先和你約時間，透過遠端連線由我直接操作你的電腦來調整廣告後台設定；
+遠端前我會先準備好完整調整規劃，實際連線操作會非常快。
+""")
+
+st.warning("📌 稅務提醒：乙方為自然人，無須開立發票。甲方自行處理勞報或相關稅務。")
+st.markdown("---")
+
+# ====== 合約表單 ======
+# 乙方由網址的 ?provider= 決定（見 app.py）；本次重跑內都用同一個版本的設定
+provider = get_provider(st.session_state.provider)
+
+st.header("💰 付款方案")
+payment_option = st.radio(
+    "方案選擇：",
+    options=PAYMENT_OPTIONS,
+    index=0,
+    format_func=provider.plan_label,
+)
+
+st.header("📅 時間設定")
+default_start = datetime.now().date() + timedelta(days=7)
+start_date = st.date_input("合作啟動日", value=default_start, min_value=datetime.now().date())
+
+payment_day = None
+payment_date = None
+
+if PLAN_CODES[payment_option] == "monthly":
+    payment_day = st.slider("每月付款日", 1, 28, 5)
+else:
+    default_pay = start_date - timedelta(days=3)
+    if default_pay < datetime.now().date():
+        default_pay = datetime.now().date()
+    payment_date = st.date_input("付款日期", value=default_pay, min_value=datetime.now().date(), max_value=start_date)
+
+st.markdown("---")
+
+st.header("🧾 甲方資訊")
+party_a_name = st.text_input("甲方名稱（公司或個人）", placeholder="公司或個人名稱")
+
+st.header("👤 乙方資訊（固定）")
+st.text_input("乙方", value=provider.name, disabled=True)
+c1, c2 = st.columns(2)
+with c1:
+    st.text_input("銀行", value=f"{provider.bank_name} ({provider.bank_code})", disabled=True)
+with c2:
+    st.text_input("帳號", value=provider.account_number, disabled=True)
+
+# ====== 合約預覽（條文已預先轉好 HTML，這裡只填入變動欄位，不生成 Word）======
+with st.expander("👀 合約預覽（隨上方設定即時更新）", expanded=False):
+    st.html(render_preview_html(
+        party_a=party_a_name if party_a_name.strip() else "（甲方名稱）",
+        payment_opt=payment_option,
+        start_dt=start_date,
+        pay_day=payment_day,
+        pay_dt=payment_date,
+        provider=provider,
+    ))
+
+st.markdown("---")
+st.header("✅ 生成合約")
+
+if st.button("📝 生成合約（Word / PDF）", type="primary", use_container_width=True):
+    if not party_a_name.strip():
+        st.error("請輸入甲方名稱")
+    else:
+        # 給甲方訊息（你要：複製後從 LINE 傳給你）
+        client_msg = build_client_message(
+            party_a=party_a_name,
+            payment_opt=payment_option,
+            start_dt=start_date,
+            pay_day=payment_day,
+            pay_dt=payment_date,
+            provider=provider,
+        )
+        payment_msg = build_payment_message(provider)
+
+        contract_kwargs = dict(
+            party_a=party_a_name,
+            payment_opt=payment_option,
+            start_dt=start_date,
+            pay_day=payment_day,
+            pay_dt=payment_date,
+            provider=provider.id,
+        )
+        cache_keys = (
+            contract_cache_key("docx", **contract_kwargs),
+            contract_cache_key("pdf", **contract_kwargs),
+        )
+
+        st.session_state.client_message = client_msg
+        st.session_state.payment_message = payment_msg
+        st.session_state.last_party_a_name = party_a_name
+
+        # 相同輸入共用行程內快取（見 render_cache.py）；沒命中才交給背景行程池
+        docx_bytes, pdf_bytes = (render_cache.get(k) for k in cache_keys)
+        if docx_bytes is not None and pdf_bytes is not None:
+            st.session_state.docx_file = get_spool().put(docx_bytes, "docx")
+            st.session_state.pdf_file = get_spool().put(pdf_bytes, "pdf")
+            st.session_state.generated = True
+            st.success("✅ Word / PDF 合約已生成！")
+        else:
+            from render_pool import BrokenProcessPool, PoolBusy, get_render_pool, render_contract_files
+
+            try:
+                st.session_state.render_job = {
+                    "future": get_render_pool().submit(render_contract_files, contract_kwargs),
+                    "keys": cache_keys,
+                    "submitted_at": time.time(),
+                }
+                st.session_state.generated = False
+            except PoolBusy:
+                st.warning("⏳ 目前同時生成的人較多，請幾秒後再按一次。")
+            except BrokenProcessPool:
+                st.error("背景生成服務暫時無法使用，請稍後再按一次「生成合約」。")
+
+# ====== 背景生成中（每 0.5 秒檢查一次，只重跑這一小段）======
+@st.fragment(run_every=0.5)
+def render_job_status():
+    job = st.session_state.get("render_job")
+    if job is None:
+        return
+    from render_pool import JOB_TIMEOUT_SECONDS, get_render_pool
+
+    future = job["future"]
+    if not future.done():
+        if time.time() - job["submitted_at"] > JOB_TIMEOUT_SECONDS:
+            get_render_pool().abandon(future)
+            st.session_state.render_job = None
+            st.error("生成逾時，請再按一次「生成合約」。")
+        else:
+            st.info("⏳ 合約生成中…")
+        return
+
+    st.session_state.render_job = None
+    try:
+        _, (docx_bytes, pdf_bytes), _ = future.result()
+    except Exception as e:
+        st.error(f"生成失敗：{e}")
+        return
+    docx_key, pdf_key = job["keys"]
+    st.session_state.docx_file = get_spool().put(render_cache.put(docx_key, docx_bytes), "docx")
+    st.session_state.pdf_file = get_spool().put(render_cache.put(pdf_key, pdf_bytes), "pdf")
+    st.session_state.generated = True
+    st.rerun()
+
+if st.session_state.get("render_job") is not None:
+    render_job_status()
+
+# ====== 輸出（下載不會讓文字消失：用 session_state 撐住）======
+if st.session_state.generated:
+    st.markdown("---")
+    st.subheader("📤 給甲方看的訊息（請複製後用 LINE 傳給我）")
+    st.code(st.session_state.client_message, language=None)
+
+    st.subheader("💳 收款資訊（可直接複製）")
+    st.code(st.session_state.payment_message, language=None)
+
+    filename = f"廣告投放合約_{st.session_state.last_party_a_name}_{datetime.now().strftime('%Y%m%d')}"
+    d1, d2 = st.columns(2)
+    with d1:
+        st.download_button(
+            label="⬇️ 下載 Word 合約 (.docx)",
+            data=spool_reader(st.session_state.docx_file),
+            **metrics.download_kwargs(st.session_state.docx_file["size"]),
+            file_name=f"{filename}.docx",
+            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            use_container_width=True
+        )
+    with d2:
+        st.download_button(
+            label="⬇️ 下載 PDF 合約 (.pdf)",
+            data=spool_reader(st.session_state.pdf_file),
+            **metrics.download_kwargs(st.session_state.pdf_file["size"]),
+            file_name=f"{filename}.pdf",
+            mime="application/pdf",
+            use_container_width=True
+        )
+
+    st.info("💡 PDF 可直接傳給甲方簽署；Word 版方便修改條文。")
+
+    if st.button("重置（清除合約資料）", use_container_width=True):
+        st.session_state.generated = False
+        st.session_state.client_message = ""
+        st.session_state.payment_message = ""
+        st.session_state.docx_file = None
+        st.session_state.pdf_file = None
+        st.rerun()
+
+# ====== 合約紀錄（已生成過的直接下載，不重新生成）======
+st.markdown("---")
+with st.expander("🗄️ 合約紀錄查詢", expanded=False):
+    q1, q2 = st.columns(2)
+    with q1:
+        search_party = st.text_input("甲方名稱（部分即可）", key="registry_party")
+    with q2:
+        search_plan = st.selectbox("方案", ["全部", "monthly", "quarterly"], key="registry_plan")
+    search_range = st.date_input("啟動日區間（可選）", value=(), key="registry_range")
+
+    found = get_registry().search(
+        party=search_party.strip() or None,
+        start_from=search_range[0] if len(search_range) > 0 else None,
+        start_to=search_range[1] if len(search_range) > 1 else None,
+        plan=None if search_plan == "全部" else search_plan,
+        provider=provider.id,
+    )
+    if not found:
+        st.caption("沒有符合的合約。")
+    else:
+        labels = {
+            f"{r['party_a']}｜{r['plan']}｜{r['start_dt']} 起｜{r['format']}": r
+            for r in found
+        }
+        picked = labels[st.selectbox(f"共 {len(found)} 筆", list(labels), key="registry_pick")]
+        st.download_button(
+            label=f"⬇️ 下載 (.{picked['format']})",
+            data=lambda sha=picked["sha256"]: get_registry().fetch(sha),
+            file_name=f"廣告投放合約_{picked['party_a']}_{picked['start_dt'].replace('-', '')}.{picked['format']}",
+            mime="application/pdf" if picked["format"] == "pdf"
+            else "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            use_container_width=True,
+            **metrics.download_kwargs(picked["size"]),
+        )
+
+# ====== 批次產生（續約期一次大量開約）======
+st.markdown("---")
+with st.expander("📦 批次產生合約（CSV / JSON）", expanded=False):
+    st.caption("欄位：party_a, payment_opt（monthly / quarterly）, start_dt（YYYY-MM-DD）, pay_day（月付）, pay_dt（季付）")
+    batch_file = st.file_uploader("上傳名單", type=["csv", "json", "jsonl"])
+
+    if batch_file is not None and st.button("📦 批次生成", use_container_width=True):
+        from batch import detect_format, iter_rows, render_batch
+
+        rows = iter_rows(
+            io.TextIOWrapper(batch_file, encoding="utf-8-sig", newline=""),
+            detect_format(batch_file.name),
+        )
+        # 直接寫在暫存區內，完成後移入（與單份合約一樣由暫存區依閒置時間／總大小清除）
+        zip_path = get_spool().part_path()
+        try:
+            with st.spinner("批次生成中…"):
+                report = render_batch(rows, zip_path, provider=provider.id)
+            st.session_state.batch_zip_file = get_spool().put_file(zip_path, "zip")
+        except BaseException:
+            if os.path.exists(zip_path):
+                os.remove(zip_path)
+            raise
+        st.session_state.batch_report = report
+
+    report = st.session_state.get("batch_report")
+    if report:
+        st.success(
+            f"✅ 完成 {report['ok']} 份，耗時 {report['elapsed']:.2f} 秒（{report['docs_per_sec']:.1f} 份/秒）"
+        )
+        for row_no, err in report["failed"]:
+            st.error(f"第 {row_no} 筆：{err}")
+        if report["ok"]:
+            st.download_button(
+                label="⬇️ 下載批次合約 (.zip)",
+                data=spool_reader(st.session_state.batch_zip_file),
+                **metrics.download_kwargs(st.session_state.batch_zip_file["size"]),
+                file_name=f"廣告投放合約_批次_{datetime.now().strftime('%Y%m%d')}.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
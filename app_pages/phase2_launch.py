@@ -0,0 +1,73 @@
+"""第二階段｜啟動前確認（即時輸出 × 可備份還原）
+
+由 app.py 的 st.navigation 載入；不匯入任何合約生成相關模組。
+"""
+import streamlit as st
+
+import metrics
+from contract import parse_backup_text
+from phase2_ui import phase2_form, restore_draft
+
+# 第二階段教學影片（沒有就先放空字串）
+PHASE2_TUTORIAL_URL = ""
+
+st.header("🚀 第二階段｜啟動前確認 & 資料蒐集")
+st.caption("📌 可分次填寫；下方回傳內容會即時更新")
+
+# ✅ 你要加回來的「服務內容講清楚」：只增補在第二階段最前面
+st.markdown("---")
+st.subheader("📌 服務方式說明（請先閱讀）")
+st.info("""
+現況提醒：目前我的 FB 個人帳號仍然被停用，但我仍需要每天監控你的廣告成果，因此會採用以下合作方式：
+
+1) **每日監控方式**
+- 我會先幫你設定好固定的廣告數據匯出流程
+- 你每天只需要照我設定的方式按一次匯出即可（不需要你分析）
+
+2) **調整與優化方式（遠端控制你的電腦）**
+- 當我判斷需要調整廣告後台時，會先和你約時間
+- 透過遠端連線，由我直接操作你電腦上的廣告後台畫面進行設定與調整
+
+3) **為了不浪費你的時間**
+- 遠端前我都會先準備好完整調整規劃
+- 實際連線操作只做必要動作，速度會非常快
+""")
+
+# ---------- Sidebar：備份 / 還原（不覆蓋導覽，用 expander 包起來） ----------
+with st.sidebar:
+    with st.expander("🗒️ 暫存 / 還原（續填代碼或備份碼）", expanded=False):
+        draft_token_input = st.text_input("續填代碼", placeholder="填寫時頁面上顯示的代碼")
+        if st.button("🔑 用代碼還原", use_container_width=True):
+            with metrics.stage("draft_restore"):
+                restored = restore_draft(draft_token_input)
+            if restored:
+                st.rerun()
+            st.error("找不到這個續填代碼（可能已過期）")
+
+        backup_input = st.text_area(
+            "貼上你之前備份的內容（可選）",
+            height=220,
+            placeholder="把你存在筆記本的內容貼回來"
+        )
+
+        def restore_from_backup(text: str):
+            # 新版備份碼（P2B1:…）或你原本的 key=value 格式（忽略 [CHECK]/[DATA] 這類標頭）
+            for k, v in parse_backup_text(text).items():
+                st.session_state[k] = v
+
+        if st.button("🔄 執行還原", use_container_width=True):
+            try:
+                with metrics.stage("backup_restore"):
+                    restore_from_backup(backup_input)
+            except ValueError as e:
+                st.error(f"無法還原：{e}")
+            else:
+                st.success("✅ 已嘗試還原內容（欄位存在即已帶入）")
+                st.rerun()
+
+# ---------- 教學影片 ----------
+if PHASE2_TUTORIAL_URL.strip():
+    st.video(PHASE2_TUTORIAL_URL)
+
+# ---------- 表單＋即時輸出（fragment：打字只重跑這一段） ----------
+phase2_form()
@@ -0,0 +1,402 @@
+"""月結封存：把一段期間的合約、給甲方的訊息與第二階段回覆串流寫成單一 ZIP（記帳、稅務用，見第六條）
+
+CLI：
+    python archive.py --from 2026-03-01 --to 2026-03-31 -o 2026-03.zip [-j 4]
+
+ZIP 內容：
+    contracts/<啟動日>_<甲方>_<方案>_<編號>.docx / .pdf   registry 已有的直接取出，缺的才平行生成（並登錄）
+    messages/<同上>.txt                                  給甲方的確認訊息＋收款資訊
+    phase2_replies.csv                                   回覆索引（replies.py）中收到日期在期間內的回覆
+    manifest.csv                                         每份合約一列：乙方與設定版本、參數、檔名、SHA-256、
+                                                         錯誤訊息、來源（registry / rendered / partial / failed）
+
+無法補生成或無法產生訊息的合約（例如乙方設定已刪除）仍會寫進 manifest（來源 failed，已登錄的格式照樣封存），
+續傳後也不會漏列；有任何一份失敗時 CLI 以 exit 1 結束。
+
+- 記憶體固定：合約以 registry 的 key 分頁逐批讀取，同時在途的合約數有上限，寫進 ZIP 就釋放；
+  central directory 需要的資料記在 journal 檔，最後再從檔案串流寫出
+- 可續傳：寫入中為 <output>.part ＋ <output>.journal，每份合約寫完才在 journal 記一行。
+  中斷後以相同期間重跑，.part 會截到最後一筆完整紀錄，從下一份合約接著寫；完成後才改名為 <output>
+- 檔案數超過 65,535 或位移超過 4 GB 時自動使用 ZIP64
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import metrics
+from contract import build_client_message, build_payment_message, parse_contract_row, safe_filename
+from providers import get_provider
+from registry import get_registry
+from render_pool import pool_context, render_contract_files, run_job, warm_worker
+
+JOURNAL_VERSION = 1
+MANIFEST_COLUMNS = (
+    "key", "provider", "revision", "party_a", "plan", "start_dt", "end_dt", "pay_day", "pay_dt",
+    "docx", "docx_sha256", "pdf", "pdf_sha256", "message", "error", "source",
+)
+REPLY_COLUMNS = (
+    "received_at", "party_a", "sender", "ad_account", "pixel", "fanpage", "bm",
+    "fanpage_url", "landing_url", "comp1", "comp2", "comp3", "who_problem", "what_problem", "how_solve", "budget",
+)
+
+_STORED, _DEFLATED = 0, 8
+_FLAG_UTF8 = 0x800
+_MAX32 = 0xFFFFFFFF
+
+# =========================================================
+# 0) 可續傳的 ZIP 寫入
+# =========================================================
+def _dos_time(stamp):
+    t = time.localtime(stamp)
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class _ResumableZip:
+    """只往後寫的 ZIP；每個單位（一份合約、回覆 CSV）寫完呼叫 commit()，journal 記下其檔案與結束位置
+
+    輸出一定是可 seek 的檔案：串流寫入的檔案寫完後回頭補 local header 的 CRC 與大小，不用 data descriptor。
+    """
+
+    def __init__(self, path, params):
+        self.part_path = path + ".part"
+        self.journal_path = path + ".journal"
+        self.done_keys = 0
+        self.last_key = None
+        header = {"version": JOURNAL_VERSION, **params}
+        end = self._recover(header)
+        if end is None:
+            self._out = open(self.part_path, "wb")
+            self._journal = open(self.journal_path, "w", encoding="utf-8")
+            self._stamp = time.time()
+            self._journal.write(json.dumps({**header, "stamp": self._stamp}, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            end = 0
+        else:
+            self._out = open(self.part_path, "r+b")
+            self._out.truncate(end)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._out.seek(end)
+        self._offset = end
+        self._time, self._date = _dos_time(self._stamp)
+        self._pending = []
+
+    def _recover(self, header):
+        """沿用之前的 .part：回傳最後一筆完整紀錄的結束位置；不能續傳時回傳 None"""
+        if not (os.path.exists(self.part_path) and os.path.exists(self.journal_path)):
+            return None
+        end = keep = 0
+        with open(self.journal_path, "rb") as f:
+            first = f.readline()
+            try:
+                previous = json.loads(first)
+            except ValueError:
+                return None
+            if {k: v for k, v in previous.items() if k != "stamp"} != header:
+                return None
+            self._stamp = previous["stamp"]
+            keep = len(first)
+            for line in f:
+                try:
+                    unit = json.loads(line)
+                except ValueError:
+                    break  # 寫到一半中斷的最後一行
+                if not line.endswith(b"\n"):
+                    break
+                end = unit["end"]
+                keep += len(line)
+                self.last_key = unit["key"]
+                self.done_keys += "row" in unit
+        if os.path.getsize(self.part_path) < end:
+            return None
+        with open(self.journal_path, "r+b") as f:
+            f.truncate(keep)
+        return end
+
+    def _local_header(self, name, flags, method, crc, csize, size):
+        return struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, 20, flags, method, self._time, self._date,
+            crc, csize, size, len(name), 0,
+        ) + name
+
+    def _write(self, data):
+        self._out.write(data)
+        self._offset += len(data)
+
+    def add(self, name, data, compress=False):
+        """整份已在記憶體的檔案；docx / pdf 本身已壓縮，預設直接存放"""
+        method = _DEFLATED if compress else _STORED
+        payload = data
+        if compress:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            payload = compressor.compress(data) + compressor.flush()
+        entry = [name, method, zlib.crc32(data), len(payload), len(data), self._offset]
+        self._write(self._local_header(name.encode("utf-8"), _FLAG_UTF8, method, *entry[2:5]))
+        self._write(payload)
+        self._pending.append(entry)
+
+    def add_stream(self, name, chunks):
+        """逐段寫入並壓縮（bytes 片段）；寫完回頭補上 CRC 與大小"""
+        encoded = name.encode("utf-8")
+        offset = self._offset
+        self._write(self._local_header(encoded, _FLAG_UTF8, _DEFLATED, 0, 0, 0))
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        crc = size = csize = 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            data = compressor.compress(chunk)
+            csize += len(data)
+            self._write(data)
+        data = compressor.flush()
+        csize += len(data)
+        self._write(data)
+        if size > _MAX32 or csize > _MAX32:
+            raise ValueError(f"{name} 超過 4 GB")
+        self._out.seek(offset + 14)
+        self._out.write(struct.pack("<III", crc, csize, size))
+        self._out.seek(self._offset)
+        self._pending.append([name, _DEFLATED, crc, csize, size, offset])
+
+    def commit(self, key, row=None):
+        """這個單位的檔案都已寫出：先把資料交給作業系統，再記 journal"""
+        self._out.flush()
+        unit = {"key": key, "entries": self._pending, "end": self._offset}
+        if row is not None:
+            unit["row"] = row
+        self._journal.write(json.dumps(unit, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        self._pending = []
+
+    def iter_journal(self):
+        """已提交的單位（續傳前寫入的也包含在內），逐行讀取"""
+        self._journal.flush()
+        with open(self.journal_path, encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                yield json.loads(line)
+
+    def _central_entries(self):
+        for unit in self.iter_journal():
+            yield from unit["entries"]
+        yield from self._pending
+
+    def close(self, path):
+        """寫出 central directory（必要時 ZIP64），fsync 後改名為 path 並刪除 journal"""
+        start = self._offset
+        count = 0
+        for name, method, crc, csize, size, offset in self._central_entries():
+            encoded = name.encode("utf-8")
+            extra = b""
+            version = 20
+            if offset >= _MAX32:
+                extra = struct.pack("<HHQ", 0x0001, 8, offset)
+                offset, version = _MAX32, 45
+            self._write(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, version, version, _FLAG_UTF8, method, self._time, self._date,
+                crc, csize, size, len(encoded), len(extra), 0, 0, 0, 0, offset,
+            ) + encoded + extra)
+            count += 1
+        size = self._offset - start
+        if count >= 0xFFFF or start >= _MAX32 or size >= _MAX32:
+            zip64_end = self._offset
+            self._write(struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, size, start))
+            self._write(struct.pack("<IIQI", 0x07064B50, 0, zip64_end, 1))
+            self._write(struct.pack(
+                "<IHHHHIIH", 0x06054B50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+                min(size, _MAX32), min(start, _MAX32), 0,
+            ))
+        else:
+            self._write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, count, count, size, start, 0))
+        self._out.flush()
+        os.fsync(self._out.fileno())
+        self._out.close()
+        self._journal.close()
+        os.replace(self.part_path, path)
+        os.remove(self.journal_path)
+
+    def abort(self):
+        self._out.close()
+        self._journal.close()
+
+# =========================================================
+# 1) 匯出
+# =========================================================
+def _csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # 加 BOM：會計端多半直接用 Excel 開啟
+    yield "\ufeff".encode("utf-8")
+    writer.writerow(columns)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % 200 == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _reply_rows(start, end):
+    from replies import get_reply_index
+
+    marks = {True: "已完成", False: "未完成", None: ""}
+    for reply in get_reply_index().iter_received(start, end):
+        yield [marks[reply[k]] if isinstance(reply[k], bool) or reply[k] is None else reply[k] for k in REPLY_COLUMNS]
+
+
+def _contract_message(kwargs):
+    return f"{build_client_message(**kwargs)}\n{build_payment_message(kwargs['provider'])}".encode("utf-8")
+
+
+def export_archive(start, end, output, workers=None, window=None, progress=None):
+    """把 [start, end]（date，含頭尾）期間的資料寫成 output（ZIP）；回傳統計 dict
+
+    同一組參數中斷後再次呼叫會從中斷處接續。progress(已完成合約數) 於每份合約寫完後呼叫。
+    """
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 4
+    registry = get_registry()
+    zf = _ResumableZip(output, {"start": start.isoformat(), "end": end.isoformat()})
+    report = {"contracts": zf.done_keys, "resumed": zf.done_keys, "rendered": 0, "failed": [], "replies": False}
+    started = time.perf_counter()
+    pool = None
+    pending = deque()
+
+    def write_head():
+        row, kwargs, future, error = pending.popleft()
+        base = f"{row['start_dt']}_{safe_filename(row['party_a'])}_{row['plan']}_{row['key']}"
+        docs = {}
+        source = "registry"
+        if future is not None:
+            try:
+                _, (docs["docx"], docs["pdf"]), worker_metrics = future.result()
+                metrics.merge(worker_metrics)
+                source = "rendered"
+                report["rendered"] += 1
+            except Exception as e:
+                error = f"生成失敗：{e}"
+        if not docs:
+            for fmt in ("docx", "pdf"):
+                if row[f"{fmt}_sha256"] is not None:
+                    docs[fmt] = registry.fetch(row[f"{fmt}_sha256"])
+            if len(docs) < 2:
+                source = "partial"
+        if error:
+            source = "failed"
+
+        manifest = [row["key"], row["provider"], row["revision"], row["party_a"], row["plan"], row["start_dt"], row["end_dt"],
+                    row["pay_day"] or "", row["pay_dt"]]
+        for fmt in ("docx", "pdf"):
+            data = docs.get(fmt)
+            if data is None:
+                manifest += ["", ""]
+                continue
+            name = f"contracts/{base}.{fmt}"
+            zf.add(name, data)
+            manifest += [name, hashlib.sha256(data).hexdigest()]
+        message = ""
+        if kwargs is not None:
+            message = f"messages/{base}.txt"
+            zf.add(message, _contract_message(kwargs), compress=True)
+        zf.commit(row["key"], manifest + [message, error, source])
+        report["contracts"] += 1
+        if progress:
+            progress(report["contracts"])
+
+    try:
+        if zf.last_key != "replies":
+            after = zf.last_key or 0
+            for row in registry.iter_contracts(start, end, after=after):
+                future = None
+                try:
+                    kwargs = parse_contract_row({**row, "payment_opt": row["plan"]})
+                except ValueError as e:
+                    # 乙方設定已刪除等：無法產生訊息也無法補生成，只封存已登錄的格式並記為失敗
+                    pending.append((row, None, None, str(e)))
+                    if len(pending) >= window:
+                        write_head()
+                    continue
+                # 以登錄時的甲方名稱生成（parse_contract_row 會去掉頭尾空白）
+                kwargs["party_a"] = row["party_a"]
+                missing = row["docx_sha256"] is None or row["pdf_sha256"] is None
+                if missing and row["revision"] == get_provider(kwargs["provider"]).revision:
+                    # 只有缺檔的合約才送進子行程生成（生成後會登錄，下次不必再生成）；
+                    # 條文已更新的舊版合約無法補生成原版，只封存已登錄的格式（來源記為 partial）
+                    if pool is None:
+                        pool = ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(),
+                                                   initializer=warm_worker)
+                    future = pool.submit(run_job, render_contract_files, kwargs)
+                pending.append((row, kwargs, future, ""))
+                if len(pending) >= window:
+                    write_head()
+            while pending:
+                write_head()
+
+            with metrics.stage("archive_replies"):
+                zf.add_stream("phase2_replies.csv", _csv_chunks(REPLY_COLUMNS, _reply_rows(start, end)))
+            zf.commit("replies")
+        report["replies"] = True
+
+        def manifest_rows():
+            # 失敗清單也從 journal 取，續傳前寫入的失敗一樣會回報
+            for unit in zf.iter_journal():
+                if "row" in unit:
+                    row = dict(zip(MANIFEST_COLUMNS, unit["row"]))
+                    if row["source"] == "failed":
+                        report["failed"].append((row["key"], row["party_a"], row["error"]))
+                    yield unit["row"]
+
+        zf.add_stream("manifest.csv", _csv_chunks(MANIFEST_COLUMNS, manifest_rows()))
+        zf.close(output)
+    except BaseException:
+        zf.abort()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    report["elapsed"] = time.perf_counter() - started
+    return report
+
+# =========================================================
+# 2) CLI
+# =========================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="月結封存：合約、訊息與第二階段回覆匯出為單一 ZIP（可續傳）")
+    parser.add_argument("--from", dest="start_from", required=True, help="啟動日／收到日起 YYYY-MM-DD")
+    parser.add_argument("--to", dest="start_to", required=True, help="啟動日／收到日迄 YYYY-MM-DD")
+    parser.add_argument("-o", "--output", default=None, help="輸出路徑（預設：封存_<起>_<迄>.zip）")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="補生成缺檔的子行程數（預設為 CPU 核心數）")
+    args = parser.parse_args(argv)
+
+    try:
+        start, end = date.fromisoformat(args.start_from), date.fromisoformat(args.start_to)
+    except ValueError as e:
+        parser.error(str(e))
+    if start > end:
+        parser.error("--from 不可晚於 --to")
+    output = args.output or f"封存_{start:%Y%m%d}_{end:%Y%m%d}.zip"
+
+    report = export_archive(start, end, output, workers=args.workers)
+    for key, party, err in report["failed"]:
+        print(f"合約 {key}（{party}）失敗：{err}", file=sys.stderr)
+    resumed = f"（其中 {report['resumed']} 份為上次已寫入）" if report["resumed"] else ""
+    print(
+        f"{datetime.now():%H:%M:%S} 完成 {report['contracts']} 份合約{resumed}，補生成 {report['rendered']} 份，"
+        f"失敗 {len(report['failed'])} 份，耗時 {report['elapsed']:.2f} 秒 → {output}"
+    )
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
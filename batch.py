@@ -0,0 +1,178 @@
+"""批次產生合約：讀取 CSV / JSON，多行程平行生成，逐份寫入 ZIP
+
+CLI：
+    python batch.py rows.csv -o contracts.zip [-j 4]
+
+欄位：party_a, payment_opt, start_dt, pay_day（月付）, pay_dt（季付）, provider（選填，乙方代號）
+payment_opt 可填完整方案文字，或 monthly / quarterly / 月付 / 季付；沒有 provider 的列用 --provider 指定的乙方。
+每份合約都經 registry 登錄（已登錄過的相同合約直接取出、不重新生成），之後可查詢與月結封存。
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import metrics
+from contract import generate_docx_bytes, parse_contract_row, safe_filename
+from providers import get_provider
+from render_pool import pool_context, run_job, warm_worker
+
+# =========================================================
+# 0) 讀取名單
+# =========================================================
+def iter_rows(fp, fmt):
+    """逐筆讀取文字串流；fmt 為 csv / json / jsonl
+
+    JSONL 中無法解碼的一行以 ValueError 實例代替該列（不中斷整批），由 parse_row 回報為該列的錯誤。
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(fp)
+    elif fmt == "jsonl":
+        for line in fp:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield ValueError(f"JSON 格式錯誤：{e}")
+    elif fmt == "json":
+        data = json.load(fp)
+        if isinstance(data, dict):
+            if not isinstance(data.get("rows"), list):
+                raise ValueError("JSON 需為陣列，或含 rows 陣列的物件")
+            data = data["rows"]
+        yield from data
+    else:
+        raise ValueError(f"不支援的格式：{fmt}")
+
+
+def parse_row(row, provider=None):
+    """iter_rows 的一列 → generate_docx_bytes 的參數；無法解碼或格式錯誤時丟出 ValueError"""
+    if isinstance(row, ValueError):
+        raise row
+    return parse_contract_row(row, provider)
+
+
+def detect_format(filename):
+    ext = os.path.splitext(filename)[1].lower().lstrip(".")
+    return ext if ext in ("csv", "json", "jsonl") else "csv"
+
+# =========================================================
+# 1) 平行生成
+# =========================================================
+def _render_one(kwargs):
+    from registry import get_registry
+
+    return get_registry().get_or_render("docx", generate_docx_bytes, **kwargs)
+
+
+def _contract_filename(kwargs, used):
+    # 與 archive 相同的檔名規則（見 contract.safe_filename）
+    base = f"廣告投放合約_{safe_filename(kwargs['party_a'])}_{kwargs['start_dt'].strftime('%Y%m%d')}"
+    name = f"{base}.docx"
+    n = 1
+    while name in used:
+        n += 1
+        name = f"{base}_{n}.docx"
+    used.add(name)
+    return name
+
+
+def render_batch(rows, out, workers=None, provider=None):
+    """把 rows 平行生成合約並逐份寫入 out（路徑或可寫入的二進位串流）；沒有 provider 欄位的列用 provider
+
+    同時在途的工作數有上限，已完成的文件寫進 ZIP 後就釋放，不會整批留在記憶體。
+    回傳 {"ok", "failed", "elapsed", "docs_per_sec"}，failed 為 [(列號, 錯誤訊息)]。
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 4
+    failed = []
+    used_names = set()
+    ok = 0
+    started = time.perf_counter()
+
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as zf, ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=pool_context(),
+        initializer=warm_worker,
+    ) as pool:
+        pending = {}
+
+        def drain(return_when):
+            nonlocal ok
+            done, _ = wait(pending, return_when=return_when)
+            for fut in done:
+                row_no, kwargs = pending.pop(fut)
+                try:
+                    _, data, worker_metrics = fut.result()
+                except Exception as e:
+                    failed.append((row_no, f"生成失敗：{e}"))
+                    continue
+                metrics.merge(worker_metrics)
+                # docx 本身已壓縮，ZIP 內直接存放
+                zf.writestr(_contract_filename(kwargs, used_names), data)
+                ok += 1
+
+        for row_no, row in enumerate(rows, start=1):
+            try:
+                kwargs = parse_row(row, provider)
+            except ValueError as e:
+                failed.append((row_no, str(e)))
+                continue
+            pending[pool.submit(run_job, _render_one, kwargs)] = (row_no, kwargs)
+            if len(pending) >= max_pending:
+                drain(FIRST_COMPLETED)
+
+        while pending:
+            drain(FIRST_COMPLETED)
+
+    elapsed = time.perf_counter() - started
+    failed.sort()
+    return {
+        "ok": ok,
+        "failed": failed,
+        "elapsed": elapsed,
+        "docs_per_sec": ok / elapsed if elapsed > 0 else 0.0,
+    }
+
+# =========================================================
+# 2) CLI
+# =========================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批次產生廣告投放合約（輸出 ZIP）")
+    parser.add_argument("rows", help="CSV / JSON / JSONL 檔案（- 代表標準輸入，視為 CSV）")
+    parser.add_argument("-o", "--output", default="contracts.zip", help="輸出 ZIP 路徑")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="子行程數（預設為 CPU 核心數）")
+    parser.add_argument("--format", choices=["csv", "json", "jsonl"], default=None)
+    parser.add_argument("--provider", default=None, help="乙方代號（providers/<代號>.toml，預設為預設乙方）")
+    args = parser.parse_args(argv)
+    try:
+        get_provider(args.provider)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.rows == "-":
+        fp = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig")
+        fmt = args.format or "csv"
+    else:
+        fp = open(args.rows, encoding="utf-8-sig", newline="")
+        fmt = args.format or detect_format(args.rows)
+
+    with fp:
+        report = render_batch(iter_rows(fp, fmt), args.output, workers=args.workers, provider=args.provider)
+
+    for row_no, err in report["failed"]:
+        print(f"第 {row_no} 筆失敗：{err}", file=sys.stderr)
+    print(
+        f"完成 {report['ok']} 份，失敗 {len(report['failed'])} 筆，"
+        f"耗時 {report['elapsed']:.2f} 秒（{report['docs_per_sec']:.1f} 份/秒）→ {args.output}"
+    )
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""HTTP API 壓測：多個用戶端行程各開一條 keep-alive 連線連續送出請求
+
+    python -m benchmarks.api_load [-c 8] [-d 10] [--path /render/docx] [--unique]
+
+會自行以子行程啟動 api.py（port 由 --port 指定），結束後關閉。
+預設每次送同一份合約（命中 render_cache）；--unique 時每個請求甲方名稱都不同（每次都實際生成並寫入 registry）。
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _client(port, path, duration, unique, worker):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    latencies, errors, i = [], 0, 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        i += 1
+        body = json.dumps({
+            "party_a": f"壓測客戶{worker}-{i}" if unique else "壓測客戶有限公司",
+            "payment_opt": "monthly",
+            "start_dt": "2026-03-01",
+            "pay_day": 5,
+        }).encode("utf-8")
+        started = time.perf_counter()
+        conn.request("POST", path, body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        errors += response.status != 200
+    conn.close()
+    return latencies, errors
+
+
+def _wait_ready(port, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/healthz")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("api.py 沒有啟動")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API 壓測")
+    parser.add_argument("-c", "--clients", type=int, default=8, help="併發連線數")
+    parser.add_argument("-d", "--duration", type=float, default=10, help="秒數")
+    parser.add_argument("--path", default="/render/docx", help="/render/docx、/render/pdf 或 /messages")
+    parser.add_argument("--unique", action="store_true", help="每個請求都用不同甲方（不命中快取）")
+    parser.add_argument("--port", type=int, default=8599)
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env.setdefault("CONTRACT_REGISTRY_DB", os.path.join(tempfile.mkdtemp(prefix="api_load_"), "contracts.sqlite3"))
+    server = subprocess.Popen([sys.executable, "api.py", "--port", str(args.port)], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL)
+    try:
+        _wait_ready(args.port)
+        with ProcessPoolExecutor(max_workers=args.clients) as pool:
+            futures = [
+                pool.submit(_client, args.port, args.path, args.duration, args.unique, w)
+                for w in range(args.clients)
+            ]
+            results = [f.result() for f in futures]
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(x for lat, _ in results for x in lat)
+    errors = sum(e for _, e in results)
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{args.path}  連線 {args.clients}  {'不同甲方' if args.unique else '同一份合約'}")
+    print(f"請求 {len(latencies)}（錯誤 {errors}），{len(latencies) / args.duration:,.0f} req/s")
+    print(f"延遲 ms：p50 {q[49] * 1000:.2f}  p95 {q[94] * 1000:.2f}  p99 {q[98] * 1000:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Streamlit 併發壓測：以 websocket 模擬多個瀏覽器同時走完兩個階段
+
+    python -m benchmarks.app_load [--levels 1,2,4,8,16] [--slo-ms 1000]
+
+會以子行程啟動 `streamlit run app.py`（暫存的 registry / 草稿庫 / spool），每個併發等級開 N 個 session，
+每個 session 依序：填甲方名稱 → 生成合約（輪詢背景生成的 fragment）→ 下載 Word / PDF →
+切到第二階段 → 逐欄填寫（fragment 重跑）→ 貼上備份碼並還原。
+
+回報每個等級的重跑延遲 p50 / p95 / p99、每秒重跑數、伺服器（含生成子行程）每個 session 的 CPU 與 RSS 增量，
+以及飽和點：p95 超過 --slo-ms，或吞吐量比上一級增加不到 10% 的第一個等級。
+
+AppTest 每次 run() 都會建立／拆掉全域 Runtime，無法在同一行程內併發，因此直接走 Streamlit 前端用的 websocket 協定。
+需要 websockets 套件；CPU / RSS 讀取 /proc，僅限 Linux。
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackendOperationRequest, BackMsg, DeferredFileRequestPayload
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState, WidgetStates
+
+from contract import PHASE2_DATA_KEYS, PHASE2_DEFAULTS, build_backup_text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DONE = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+_TICKS = os.sysconf("SC_CLK_TCK")
+
+BACKUP_SAMPLE = build_backup_text({
+    **PHASE2_DEFAULTS,
+    "ad_account": True,
+    "fanpage_url": "https://www.facebook.com/example",
+    "who_problem": "想在家自學的上班族",
+    "budget": "30000",
+})
+
+
+class Session:
+    """一個瀏覽器分頁：保存目前畫面上的 widget 與其值，每次互動送出一次 rerun"""
+
+    def __init__(self, port):
+        self.port = port
+        self.widgets = {}  # key 或 label → (element 種類, widget id, fragment id)
+        self.values = {}  # widget id → WidgetState
+        self.downloads = []
+        self.auto_rerun = None  # (fragment id, 間隔秒數)
+        self.pages = {}  # st.navigation 頁面標題 → page_script_hash
+        self.page_script_hash = ""
+        self.latencies = []  # (動作, 秒)
+        self.ws = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(
+            f"ws://127.0.0.1:{self.port}/_stcore/stream", subprotocols=["streamlit"], max_size=None
+        )
+
+    async def close(self):
+        await self.ws.close()
+
+    def _index(self, delta):
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        proto = getattr(element, kind)
+        if kind == "download_button" and proto.deferred_file_id:
+            self.downloads.append(proto.deferred_file_id)
+        widget_id = getattr(proto, "id", "")
+        if widget_id.startswith("$$ID-"):
+            entry = (kind, widget_id, delta.fragment_id)
+            key = widget_id.rsplit("-", 1)[1]
+            self.widgets[key if key != "None" else proto.label] = entry
+
+    async def _receive(self, until):
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                self._index(msg.delta)
+            elif kind == "navigation":
+                self.pages = {page.page_name: page.page_script_hash for page in msg.navigation.app_pages}
+                self.page_script_hash = msg.navigation.page_script_hash
+            elif kind == "auto_rerun":
+                self.auto_rerun = (msg.auto_rerun.fragment_id, msg.auto_rerun.interval)
+            elif kind == "stop_auto_rerun":
+                self.auto_rerun = None
+            result = until(msg, kind)
+            if result is not None:
+                return result
+
+    async def rerun(self, action, trigger=None, fragment_id="", is_auto_rerun=False):
+        states = list(self.values.values())
+        if trigger is not None:
+            states.append(WidgetState(id=trigger, trigger_value=True))
+        if not fragment_id:
+            self.widgets.clear()
+            self.downloads.clear()
+        msg = BackMsg(rerun_script=ClientState(
+            widget_states=WidgetStates(widgets=states), page_script_hash=self.page_script_hash,
+            fragment_id=fragment_id, is_auto_rerun=is_auto_rerun,
+        ))
+        started = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await self._receive(lambda m, kind: True if kind == "script_finished" and m.script_finished in _DONE else None)
+        self.latencies.append((action, time.perf_counter() - started))
+
+    async def set_value(self, name, action, **value):
+        _, widget_id, fragment_id = self.widgets[name]
+        self.values[widget_id] = WidgetState(id=widget_id, **value)
+        await self.rerun(action, fragment_id=fragment_id)
+
+    async def click(self, name, action):
+        _, widget_id, fragment_id = self.widgets[name]
+        await self.rerun(action, trigger=widget_id, fragment_id=fragment_id)
+
+    async def switch_page(self, title, action):
+        self.page_script_hash = self.pages[title]
+        await self.rerun(action)
+
+    async def download_all(self):
+        for file_id in list(self.downloads):
+            request_id = uuid.uuid4().hex
+            started = time.perf_counter()
+            await self.ws.send(BackMsg(backend_operation_request=BackendOperationRequest(
+                request_id=request_id, deferred_file=DeferredFileRequestPayload(file_id=file_id),
+            )).SerializeToString())
+            url = await self._receive(
+                lambda m, kind: m.backend_operation_response.deferred_file.url
+                if kind == "backend_operation_response" and m.backend_operation_response.request_id == request_id
+                else None
+            )
+            await asyncio.to_thread(lambda: urllib.request.urlopen(f"http://127.0.0.1:{self.port}{url}").read())
+            self.latencies.append(("download", time.perf_counter() - started))
+
+
+async def scenario(session, n):
+    await session.connect()
+    await session.rerun("initial")
+
+    # 第一階段：填名稱 → 生成 → 等背景生成（run_every fragment）→ 下載
+    await session.set_value("甲方名稱（公司或個人）", "phase1_input", string_value=f"壓測客戶{n}-{uuid.uuid4().hex[:6]}")
+    await session.click("📝 生成合約（Word / PDF）", "generate")
+    deadline = time.time() + 60
+    while not session.downloads and session.auto_rerun and time.time() < deadline:
+        fragment_id, interval = session.auto_rerun
+        await asyncio.sleep(interval)
+        await session.rerun("generate_poll", fragment_id=fragment_id, is_auto_rerun=True)
+    await session.download_all()
+
+    # 第二階段：逐欄填寫（fragment）→ 貼備份碼 → 還原
+    await session.switch_page("第二階段｜啟動前確認", "navigate")
+    for key in PHASE2_DATA_KEYS:
+        await session.set_value(key, "phase2_input", string_value=f"{key} 測試內容 {n}")
+    await session.set_value("貼上你之前備份的內容（可選）", "backup_paste", string_value=BACKUP_SAMPLE)
+    await session.click("🔄 執行還原", "backup_restore")
+
+
+def _process_tree_usage(pid):
+    """(CPU 秒數, RSS bytes)：pid 與其所有子行程（生成用的行程池）合計"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            children.setdefault(int(fields[1]), []).append(int(entry))
+    cpu = rss = 0
+    stack = [pid]
+    while stack:
+        p = stack.pop()
+        stack.extend(children.get(p, ()))
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / _TICKS
+            rss += int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            continue
+    return cpu, rss
+
+
+async def run_level(port, server_pid, n):
+    sessions = [Session(port) for _ in range(n)]
+    cpu0, rss0 = _process_tree_usage(server_pid)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(scenario(s, i) for i, s in enumerate(sessions)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    cpu1, rss1 = _process_tree_usage(server_pid)
+    for s in sessions:
+        if s.ws is not None:
+            await s.close()
+
+    latencies = sorted(sec for s in sessions for action, sec in s.latencies if action != "download")
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else (latencies or [float("inf")]) * 99
+    by_action = {}
+    for s in sessions:
+        for action, sec in s.latencies:
+            by_action.setdefault(action, []).append(sec)
+    return {
+        "sessions": n,
+        "errors": [repr(r) for r in results if isinstance(r, Exception)],
+        "reruns": len(latencies),
+        "reruns_per_sec": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(q[49] * 1000, 1),
+        "p95_ms": round(q[94] * 1000, 1),
+        "p99_ms": round(q[98] * 1000, 1),
+        "server_cpu_ms_per_session": round((cpu1 - cpu0) / n * 1000, 1),
+        "server_rss_mb_per_session": round((rss1 - rss0) / n / 2**20, 2),
+        "server_rss_mb": round(rss1 / 2**20, 1),
+        "median_ms_by_action": {k: round(statistics.median(v) * 1000, 1) for k, v in sorted(by_action.items())},
+    }
+
+
+def _start_server(port):
+    tmp = tempfile.mkdtemp(prefix="app_load_")
+    env = dict(os.environ)
+    env.update({
+        "CONTRACT_REGISTRY_DB": os.path.join(tmp, "contracts.sqlite3"),
+        "CONTRACT_DRAFT_DB": os.path.join(tmp, "drafts.sqlite3"),
+        "CONTRACT_SPOOL_DIR": os.path.join(tmp, "spool"),
+    })
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py", "--server.headless", "true",
+         "--server.port", str(port), "--server.enableXsrfProtection", "false",
+         "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("streamlit 沒有啟動")
+
+
+def find_saturation(levels, slo_ms):
+    """第一個 p95 超過 SLO 或吞吐量增加不到 10% 的等級；都沒有時回傳 None"""
+    previous = None
+    for level in levels:
+        if level["p95_ms"] > slo_ms or level["errors"]:
+            return level["sessions"]
+        if previous and level["reruns_per_sec"] < previous["reruns_per_sec"] * 1.1:
+            return level["sessions"]
+        previous = level
+    return None
+
+
+async def _main(args):
+    server = _start_server(args.port)
+    try:
+        await run_level(args.port, server.pid, 1)  # 暖機：載入模組、建立行程池
+        levels = []
+        for n in args.levels:
+            level = await run_level(args.port, server.pid, n)
+            levels.append(level)
+            print(
+                f"{n:>4} sessions  {level['reruns_per_sec']:>7.1f} reruns/s  p50 {level['p50_ms']:>7.1f}  "
+                f"p95 {level['p95_ms']:>7.1f}  p99 {level['p99_ms']:>7.1f} ms  "
+                f"CPU {level['server_cpu_ms_per_session']:>6.0f} ms/session  "
+                f"RSS +{level['server_rss_mb_per_session']:.2f} MB/session"
+                + (f"  錯誤 {len(level['errors'])}" if level["errors"] else ""),
+                flush=True,
+            )
+        return levels
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streamlit 併發 session 壓測")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="併發 session 數，逗號分隔")
+    parser.add_argument("--slo-ms", type=float, default=1000, help="p95 重跑延遲上限（毫秒）")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("-o", "--output", default=None, help="結果 JSON 路徑")
+    args = parser.parse_args(argv)
+    args.levels = [int(x) for x in args.levels.split(",")]
+
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    levels = asyncio.run(_main(args))
+    saturation = find_saturation(levels, args.slo_ms)
+    print(f"壓測端 CPU 使用率：{(time.process_time() - cpu0) / (time.perf_counter() - wall0):.0%}（接近 100% 時結果受壓測端限制）")
+    print(f"飽和點：{saturation} sessions" if saturation else "測試範圍內未飽和")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"slo_ms": args.slo_ms, "saturation": saturation, "levels": levels}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
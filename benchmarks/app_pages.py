@@ -0,0 +1,76 @@
+"""各頁面的冷啟動與每次重跑成本
+
+    python -m benchmarks.app_pages [-n 30] [--cold 5]
+
+冷啟動：全新行程（已載入 streamlit，不計）直接開啟該頁面的第一次 run，
+並列出這次 run 額外載入的本專案模組數，以及 python-docx / lxml / reportlab / numpy 是否被載入。
+重跑：同一個 AppTest 改一個會重跑整頁的欄位（第一階段＝甲方名稱，第二階段＝側邊欄備份碼）後 run() 的中位數。
+皆以 AppTest 執行，不含瀏覽器與 websocket 的傳輸成本。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = {
+    "第一階段｜合約": "app_pages/phase1_contract.py",
+    "第二階段｜啟動前確認": "app_pages/phase2_launch.py",
+}
+HEAVY = ("docx", "lxml", "reportlab", "numpy")
+
+_CHILD = r"""
+import json, os, sys, time
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+page, n = sys.argv[1], int(sys.argv[2])
+before = set(sys.modules)
+at = AppTest.from_file("app.py", default_timeout=60).switch_page(page)
+started = time.perf_counter()
+at.run()
+cold = time.perf_counter() - started
+assert not at.exception, at.exception
+loaded = {m.split(".")[0] for m in set(sys.modules) - before}
+local = sorted(m for m in loaded if os.path.exists(m + ".py"))
+
+samples = []
+for i in range(n):
+    if page.endswith("phase1_contract.py"):
+        at.text_input[0].set_value(f"客戶{i}")
+    else:
+        at.sidebar.text_area[0].set_value(f"budget={i}")
+    started = time.perf_counter()
+    at.run()
+    samples.append(time.perf_counter() - started)
+print(json.dumps({"cold": cold, "local": local, "heavy": [m for m in %r if m in loaded], "samples": samples}))
+""" % (HEAVY,)
+
+
+def _run_child(page, n):
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, page, str(n)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="各頁面冷啟動與重跑成本")
+    parser.add_argument("-n", type=int, default=30, help="每頁重跑次數")
+    parser.add_argument("--cold", type=int, default=5, help="冷啟動取樣行程數")
+    args = parser.parse_args(argv)
+
+    print(f"{'頁面':<14}{'冷啟動 ms':>10}{'重跑 ms':>10}  載入的本專案模組")
+    for title, page in PAGES.items():
+        runs = [_run_child(page, args.n if i == 0 else 0) for i in range(args.cold)]
+        cold = statistics.median(r["cold"] for r in runs)
+        rerun = statistics.median(runs[0]["samples"])
+        heavy = f"（另載入 {', '.join(runs[0]['heavy'])}）" if runs[0]["heavy"] else ""
+        print(f"{title:<14}{cold * 1000:>10.0f}{rerun * 1000:>10.1f}  {' '.join(runs[0]['local'])}{heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""月結封存（archive.py）的完整性、續傳與記憶體
+
+    python -m benchmarks.archive [-n 5000] [--render 8]
+
+在暫存的 registry / 回覆索引中登錄 n 份合約（內容為隨機位元組，另有 --render 份只登錄了 Word 版、PDF 需現場生成）
+與一批第二階段回覆，然後：
+- 完整性：封存的 ZIP 通過 zipfile.testzip，每份合約的檔案與 registry 內容雜湊相同，
+  manifest.csv 與 phase2_replies.csv 的列數正確，期間外的合約與回覆不在其中
+- 續傳：寫到兩次中途丟出 KeyboardInterrupt，再以相同參數重跑，結果與一次寫完的 ZIP 內容相同
+  （manifest 的來源欄除外：第一次現場生成的合約已登錄，之後都取自 registry）
+- 記憶體：封存一週與整個月（份數約 4 倍）的峰值配置（應與份數無關）
+任何一項不符時 exit 1。
+"""
+import argparse
+import csv
+import hashlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from datetime import date, timedelta
+
+_TMP = tempfile.mkdtemp(prefix="archive_bench_")
+os.environ["CONTRACT_REGISTRY_DB"] = os.path.join(_TMP, "contracts.sqlite3")
+os.environ["CONTRACT_REPLY_DB"] = os.path.join(_TMP, "replies.sqlite3")
+
+from archive import export_archive  # noqa: E402
+from benchmarks.replies import write_export  # noqa: E402
+from contract import PAYMENT_OPTIONS, generate_docx_bytes  # noqa: E402
+from registry import get_registry  # noqa: E402
+from replies import get_reply_index, iter_replies  # noqa: E402
+
+START, END = date(2026, 3, 1), date(2026, 3, 31)
+
+
+def populate(n, render, seed=0):
+    """登錄 n + render 份合約（約 1/5 在期間外），回傳期間內的份數"""
+    rng = random.Random(seed)
+    registry = get_registry()
+    inside = 0
+    for i in range(n + render):
+        opt = PAYMENT_OPTIONS[i % 2]
+        start = START + timedelta(days=rng.randint(-10, 40))
+        kwargs = {
+            "party_a": f"客戶{i}" if i % 7 else f"客戶/{i}:測試",
+            "payment_opt": opt,
+            "start_dt": start,
+            "pay_day": rng.randint(1, 28) if opt == PAYMENT_OPTIONS[0] else None,
+            "pay_dt": None if opt == PAYMENT_OPTIONS[0] else start - timedelta(days=3),
+        }
+        inside += START <= start <= END
+        if i >= n:
+            # 只登錄 Word 版，PDF 需要現場生成
+            registry.record("docx", generate_docx_bytes(**kwargs), **kwargs)
+            continue
+        for fmt in ("docx", "pdf"):
+            registry.record(fmt, rng.randbytes(rng.randint(2_000, 6_000)), **kwargs)
+    return inside
+
+
+def _contents(path):
+    with zipfile.ZipFile(path) as zf:
+        contents = {info.filename: zf.read(info) for info in zf.infolist()}
+    manifest = csv.reader(io.StringIO(contents.pop("manifest.csv").decode("utf-8-sig")))
+    contents["manifest.csv"] = [row[:-1] for row in manifest]
+    return contents
+
+
+def verify(path, expected_contracts, expected_replies):
+    problems = []
+    with zipfile.ZipFile(path) as zf:
+        bad = zf.testzip()
+        if bad:
+            problems.append(f"CRC 錯誤：{bad}")
+        manifest = list(csv.DictReader(io.StringIO(zf.read("manifest.csv").decode("utf-8-sig"))))
+        replies = list(csv.reader(io.StringIO(zf.read("phase2_replies.csv").decode("utf-8-sig"))))[1:]
+        names = set(zf.namelist())
+        registry = get_registry()
+        for row in manifest:
+            if not START.isoformat() <= row["start_dt"] <= END.isoformat():
+                problems.append(f"期間外的合約：{row['key']} {row['start_dt']}")
+            for fmt in ("docx", "pdf"):
+                data = zf.read(row[fmt])
+                if hashlib.sha256(data).hexdigest() != row[f"{fmt}_sha256"] or registry.fetch(row[f"{fmt}_sha256"]) != data:
+                    problems.append(f"內容不符：{row[fmt]}")
+            if row["message"] not in names:
+                problems.append(f"缺少訊息：{row['message']}")
+    if len(manifest) != expected_contracts:
+        problems.append(f"合約數 {len(manifest)}，應為 {expected_contracts}")
+    if len(replies) != expected_replies:
+        problems.append(f"回覆數 {len(replies)}，應為 {expected_replies}")
+    if len(names) != 2 + 3 * expected_contracts:
+        problems.append(f"檔案數 {len(names)}，應為 {2 + 3 * expected_contracts}")
+    return problems
+
+
+class _Interrupt(KeyboardInterrupt):
+    pass
+
+
+def _interrupt_after(count):
+    def progress(done):
+        if done == count:
+            raise _Interrupt
+    return progress
+
+
+def _peak(end, output):
+    tracemalloc.start()
+    export_archive(START, end, output)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="月結封存")
+    parser.add_argument("-n", type=int, default=5000, help="已登錄的合約份數")
+    parser.add_argument("--render", type=int, default=8, help="未登錄、需現場生成的合約份數")
+    args = parser.parse_args(argv)
+
+    expected = populate(args.n, args.render)
+    export = os.path.join(_TMP, "line.txt")
+    write_export(export, 3000)
+    with open(export, encoding="utf-8") as f:
+        get_reply_index().ingest(iter_replies(f))
+    # write_export 的回覆分布在 3/1～3/28，全部在期間內
+    expected_replies = get_reply_index().stats()["replies"]
+
+    full = os.path.join(_TMP, "full.zip")
+    started = time.perf_counter()
+    report = export_archive(START, END, full)
+    elapsed = time.perf_counter() - started
+    problems = verify(full, expected, expected_replies)
+    size = os.path.getsize(full)
+    print(f"{report['contracts']} 份合約（現場生成 {report['rendered']}），{expected_replies} 則回覆；"
+          f"{size / 1e6:.1f} MB，{elapsed:.2f} 秒")
+
+    resumed = os.path.join(_TMP, "resumed.zip")
+    for stop in (expected // 3, expected * 2 // 3):
+        try:
+            export_archive(START, END, resumed, progress=_interrupt_after(stop))
+            problems.append("未中斷")
+        except _Interrupt:
+            pass
+    report = export_archive(START, END, resumed)
+    if os.path.exists(resumed + ".part") or os.path.exists(resumed + ".journal"):
+        problems.append("續傳完成後仍留有 .part / .journal")
+    if _contents(resumed) != _contents(full):
+        problems.append("續傳的 ZIP 與一次寫完的內容不同")
+    print(f"續傳：中斷兩次後接續 {report['contracts'] - report['resumed']} 份（先前已寫入 {report['resumed']} 份）")
+
+    week_peak = _peak(START + timedelta(days=6), os.path.join(_TMP, "week.zip"))
+    month_peak = _peak(END, os.path.join(_TMP, "month.zip"))
+    print(f"峰值配置：一週 {week_peak / 1024:,.0f} KB，整個月 {month_peak / 1024:,.0f} KB")
+
+    for p in problems[:10]:
+        print(p)
+    print(f"不符 {len(problems)}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
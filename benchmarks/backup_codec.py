@@ -0,0 +1,126 @@
+"""第二階段備份碼（contract.encode_backup / parse_backup_text）的正確性與速度
+
+    python -m benchmarks.backup_codec [-n 5000] [--seed 0]
+
+- 往返：隨機內容（多行、空行、=、[DATA]、"0"/"1"、emoji、頭尾空白）編碼後再解析，必須完全相同（含型別）
+- 換行切斷：備份碼中間插入換行與空白後仍可還原
+- 損毀：隨機改掉一個字元，必須丟出 ValueError，或（只改到 base64 的填充位元時）解出完全相同的內容
+- 舊格式：[CHECK]/[DATA] key=value 仍可還原（單行內容完全相同；"1" 不再被當成 True）
+任何一項不符時 exit 1；最後比較大段回答時的編碼／解析時間與長度。
+"""
+import argparse
+import random
+import string
+import sys
+import time
+
+from contract import (
+    PHASE2_CHECK_KEYS,
+    PHASE2_DATA_KEYS,
+    PHASE2_DEFAULTS,
+    decode_backup,
+    encode_backup,
+    parse_backup_text,
+)
+
+_ALPHABET = string.ascii_letters + string.digits + " =[]#:\t\"'\\" + "廣告投放預算粉專像素事件（）、。" + "😀🚀"
+
+
+def _legacy_backup_text(state):
+    # 改版前 build_backup_text 的輸出格式
+    check = "\n".join(f"{k}={1 if state[k] else 0}" for k in PHASE2_CHECK_KEYS)
+    data = "\n".join(f"{k}={state[k]}" for k in PHASE2_DATA_KEYS)
+    return f"[CHECK]\n{check}\n\n[DATA]\n{data}\n"
+
+
+def _random_text(rng, multiline, max_len=80):
+    special = ["", "0", "1", "=", "[DATA]", "budget=1", " 頭尾空白 ", "\n", "a\n\nb"]
+    if rng.random() < 0.3:
+        text = rng.choice(special)
+    else:
+        text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, max_len)))
+    if multiline and rng.random() < 0.5:
+        text += "\n" * rng.randint(1, 2) + _random_text(rng, False, max_len)
+    return text if multiline else text.replace("\n", " ")
+
+
+def _random_state(rng):
+    state = {k: rng.random() < 0.5 for k in PHASE2_CHECK_KEYS}
+    for k in PHASE2_DATA_KEYS:
+        state[k] = _random_text(rng, k in ("who_problem", "what_problem", "how_solve"))
+    return state
+
+
+def check(n, seed):
+    rng = random.Random(seed)
+    failures = []
+    for i in range(n):
+        state = _random_state(rng)
+        token = encode_backup(state)
+        if "\n" in token or parse_backup_text(token) != state:
+            failures.append(("往返", state))
+            continue
+
+        cut = rng.randint(1, len(token) - 1)
+        if parse_backup_text(f"  {token[:cut]}\n {token[cut:]}\r\n") != state:
+            failures.append(("換行切斷", state))
+
+        pos = rng.randint(len("P2B1:"), len(token) - 1)
+        damaged = token[:pos] + rng.choice([c for c in string.ascii_letters + "-_" if c != token[pos]]) + token[pos + 1:]
+        try:
+            if decode_backup(damaged) != state:
+                failures.append(("損毀未偵測", state))
+        except ValueError:
+            pass
+
+        # 舊格式：單行欄位、頭尾沒有空白時可完整還原
+        single = {k: v.strip() if isinstance(v, str) else v for k, v in state.items()}
+        single.update({k: single[k].replace("\n", " ").strip() for k in PHASE2_DATA_KEYS})
+        if any(v.lstrip().startswith(("#", "[CHECK]", "[DATA]")) for k, v in single.items() if k in PHASE2_DATA_KEYS):
+            continue
+        if parse_backup_text(_legacy_backup_text(single)) != single:
+            failures.append(("舊格式", single))
+    return failures
+
+
+def _best(fn, repeat=200):
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="第二階段備份碼")
+    parser.add_argument("-n", type=int, default=5000, help="隨機案例數")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failures = check(args.n, args.seed)
+    for kind, state in failures[:5]:
+        print(f"{kind}不符：{state!r}")
+    print(f"{args.n} 個隨機案例，不符 {len(failures)}")
+
+    print(f"\n{'內容':<10}{'格式':<8}{'長度':>8}{'編碼 ms':>10}{'解析 ms':>10}")
+    samples = {
+        "一般": {**PHASE2_DEFAULTS, "ad_account": True, "fanpage_url": "https://www.facebook.com/example",
+                 "who_problem": "想在家自學的上班族", "budget": "30000"},
+        "大段回答": {**PHASE2_DEFAULTS, **{k: "下班後沒時間、找不到系統化教材。\n" * 300
+                                       for k in ("who_problem", "what_problem", "how_solve")}},
+    }
+    for label, state in samples.items():
+        legacy = _legacy_backup_text(state)
+        token = encode_backup(state)
+        for fmt, text, encode in (("舊格式", legacy, _legacy_backup_text), ("P2B1", token, encode_backup)):
+            print(f"{label:<10}{fmt:<8}{len(text):>8}{_best(lambda: encode(state)):>10.3f}"
+                  f"{_best(lambda: parse_backup_text(text)):>10.3f}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
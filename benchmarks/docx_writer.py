@@ -0,0 +1,96 @@
+"""串流寫出（docx_writer）與 python-docx 版的結構比對＋速度比較
+
+    python -m benchmarks.docx_writer [-n 300]
+
+比對：兩者 ZIP 內的檔案清單與順序相同、document.xml 以外的檔案逐位元組相同、
+document.xml 經 C14N 正規化後相同；另外以 python-docx 開啟串流版確認可讀。
+有任何差異時 exit 1。
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+import tracemalloc
+import zipfile
+from datetime import date
+from xml.etree.ElementTree import canonicalize
+
+from contract import PAYMENT_OPTIONS, python_docx_bytes
+from docx_writer import stream_docx_bytes
+
+CASES = [
+    dict(party_a="測試客戶有限公司", payment_opt=PAYMENT_OPTIONS[0], start_dt=date(2026, 3, 1), pay_day=5, pay_dt=None),
+    dict(party_a="測試客戶有限公司", payment_opt=PAYMENT_OPTIONS[1], start_dt=date(2026, 3, 1), pay_day=None,
+         pay_dt=date(2026, 2, 25)),
+    # python-docx 走完整生成的名稱：頭尾空白、換行、Tab、XML 特殊字元
+    dict(party_a="  A&B <公司> ", payment_opt=PAYMENT_OPTIONS[0], start_dt=date(2026, 12, 31), pay_day=28, pay_dt=None),
+    dict(party_a="王小明\n工作室\t(台北)", payment_opt=PAYMENT_OPTIONS[1], start_dt=date(2026, 1, 1), pay_day=None,
+         pay_dt=date(2025, 12, 29)),
+    dict(party_a="", payment_opt=PAYMENT_OPTIONS[0], start_dt=date(2026, 6, 15), pay_day=1, pay_dt=None),
+]
+
+
+def _parts(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        return [(info.filename, zf.read(info.filename)) for info in zf.infolist()]
+
+
+def compare(case):
+    """回傳差異說明清單（空清單代表相同）"""
+    expected, actual = _parts(python_docx_bytes(**case)), _parts(stream_docx_bytes(**case))
+    if [n for n, _ in expected] != [n for n, _ in actual]:
+        return ["檔案清單或順序不同"]
+    diffs = []
+    for (name, want), (_, got) in zip(expected, actual):
+        if name == "word/document.xml":
+            want, got = canonicalize(want.decode("utf-8")), canonicalize(got.decode("utf-8"))
+        if want != got:
+            diffs.append(f"{name} 不同")
+    return diffs
+
+
+def _measure(render, n):
+    case = CASES[0]
+    render(**case)
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        render(**case)
+        times.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    render(**case)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="串流寫出 vs python-docx")
+    parser.add_argument("-n", type=int, default=300, help="每種方式的生成次數")
+    args = parser.parse_args(argv)
+
+    from docx import Document
+
+    failed = False
+    for case in CASES:
+        diffs = compare(case)
+        Document(io.BytesIO(stream_docx_bytes(**case)))
+        print(f"{case['party_a']!r:<28}{'相同' if not diffs else '；'.join(diffs)}")
+        failed |= bool(diffs)
+
+    print(f"\n{'方式':<14}{'ms/份（中位數）':>16}{'峰值配置 KB':>14}")
+    results = {}
+    for label, render in (("python-docx", python_docx_bytes), ("stream", stream_docx_bytes)):
+        results[label] = _measure(render, args.n)
+        ms, peak = results[label]
+        print(f"{label:<14}{ms:>16.2f}{peak / 1024:>14.0f}")
+    print(f"串流寫出為 python-docx 版的 {results['stream'][0] / results['python-docx'][0]:.0%} 時間")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
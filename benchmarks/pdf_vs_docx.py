@@ -0,0 +1,51 @@
+"""PDF 與 Word 合約生成延遲比較
+
+    python -m benchmarks.pdf_vs_docx [-n 50]
+"""
+import argparse
+import statistics
+import time
+from datetime import date
+
+from contract import PAYMENT_OPTIONS, generate_docx_bytes
+from contract_pdf import generate_pdf_bytes
+
+CASES = {
+    PAYMENT_OPTIONS[0]: dict(party_a="測試客戶有限公司", start_dt=date(2026, 3, 1), pay_day=5, pay_dt=None),
+    PAYMENT_OPTIONS[1]: dict(party_a="測試客戶有限公司", start_dt=date(2026, 3, 1), pay_day=None, pay_dt=date(2026, 2, 25)),
+}
+
+
+def _measure(render, payment_opt, n):
+    kwargs = CASES[payment_opt]
+    started = time.perf_counter()
+    data = render(payment_opt=payment_opt, **kwargs)
+    cold = time.perf_counter() - started
+
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        render(payment_opt=payment_opt, **kwargs)
+        samples.append(time.perf_counter() - started)
+    return cold, samples, len(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=50, help="每種組合的暖機後次數")
+    args = parser.parse_args(argv)
+
+    print(f"{'格式':<6}{'方案':<24}{'冷啟動 ms':>12}{'中位數 ms':>12}{'p95 ms':>10}{'大小 KB':>10}")
+    for label, render in (("docx", generate_docx_bytes), ("pdf", generate_pdf_bytes)):
+        for payment_opt in PAYMENT_OPTIONS:
+            cold, samples, size = _measure(render, payment_opt, args.n)
+            samples.sort()
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            print(
+                f"{label:<6}{payment_opt:<24}{cold * 1000:>12.1f}"
+                f"{statistics.median(samples) * 1000:>12.1f}{p95 * 1000:>10.1f}{size / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
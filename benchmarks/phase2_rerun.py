@@ -0,0 +1,62 @@
+"""第二階段每次輸入的重跑成本：整頁重跑 vs 只重跑 fragment
+
+    python -m benchmarks.phase2_rerun [-n 200]
+
+「整頁」= 以 AppTest 重跑 app.py（改用 fragment 之前每次按鍵的成本）；
+「fragment」= 只執行 phase2_ui.phase2_form（改用 fragment 之後每次按鍵實際重跑的部分）。
+兩者都不含瀏覽器與 websocket 的傳輸成本。
+"""
+import argparse
+import os
+import time
+
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _fragment_only():
+    import streamlit as st
+
+    from contract import PHASE2_DEFAULTS
+    from phase2_ui import phase2_form
+
+    for key, default in PHASE2_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = default
+    phase2_form()
+
+
+def _measure(at, n):
+    at.run()
+    wall = cpu = 0.0
+    for i in range(n):
+        field = at.text_input(key="budget")
+        field.input(str(i))
+        w0, c0 = time.perf_counter(), time.process_time()
+        at.run()
+        wall += time.perf_counter() - w0
+        cpu += time.process_time() - c0
+    return n / wall, cpu / n * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="第二階段重跑成本比較")
+    parser.add_argument("-n", type=int, default=200, help="模擬按鍵次數")
+    args = parser.parse_args(argv)
+
+    full = AppTest.from_file(APP_PATH, default_timeout=30)
+    full.run()
+    full.switch_page("app_pages/phase2_launch.py")
+    full_rate, full_cpu = _measure(full, args.n)
+
+    frag_rate, frag_cpu = _measure(AppTest.from_function(_fragment_only, default_timeout=30), args.n)
+
+    print(f"{'模式':<10}{'重跑/秒':>10}{'CPU ms/次':>12}")
+    print(f"{'整頁':<10}{full_rate:>10.1f}{full_cpu:>12.2f}")
+    print(f"{'fragment':<10}{frag_rate:>10.1f}{frag_cpu:>12.2f}")
+    print(f"每次按鍵 CPU 降為原本的 {frag_cpu / full_cpu:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""多位乙方設定（providers.py）的正確性、熱更新與取用成本
+
+    python -m benchmarks.providers [-n 50]
+
+在暫存目錄建立 n 位乙方（一半共用一份 clause_set，其中一位另外覆寫條文），然後：
+- 內容：每位乙方的 Word / PDF / HTML 預覽都帶自己的名稱與帳號，覆寫的條文有生效，
+  改了方案金額的乙方，確認訊息、方案選項名稱與收款金額都跟合約條文一致，
+  沒有設定檔時預設乙方與內建設定的版本（revision）相同
+- 熱更新：改一位乙方的帳號 → 只有那一位重新載入，其他乙方仍是同一個物件，輸出立即換成新帳號；
+  只更新修改時間、內容不變 → 版本不變，Word 骨架不重建；
+  改壞設定檔 → 沿用先前的版本，檔案再次變動前不重試；改 clause_set → 只有共用它的乙方重新載入
+- 成本：穩定狀態下 get_provider 的每次耗時，與重新載入一位乙方（解析＋編譯）的耗時
+任何一項不符時 exit 1。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+_TMP = tempfile.mkdtemp(prefix="providers_bench_")
+os.environ["CONTRACT_PROVIDERS_DIR"] = _TMP
+
+import contract  # noqa: E402
+from contract import PAYMENT_OPTIONS, build_client_message, generate_docx_bytes  # noqa: E402
+from contract_html import render_preview_html  # noqa: E402
+from contract_pdf import generate_pdf_bytes  # noqa: E402
+from docx_writer import document_xml_chunks  # noqa: E402
+from providers import builtin_provider, get_provider, get_provider_store  # noqa: E402
+
+CASE = ("客戶甲", PAYMENT_OPTIONS[0], date(2026, 3, 1), 5, None)
+COMPANY_CLAUSE = "1. 乙方為公司行號，將依法開立統一發票。"
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    stamp = os.stat(path).st_mtime_ns + 1_000_000 if os.path.exists(path) else None
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    if stamp is not None:
+        # 確保修改時間一定前進（部分檔案系統的時間精度較粗）
+        os.utime(path, ns=(stamp, stamp))
+
+
+def _profile(i, account=None):
+    lines = [
+        f'name = "乙方{i:03d}"',
+        'bank_name = "測試銀行"',
+        f'bank_code = "{800 + i % 100:03d}"',
+        f'account_number = "{account or f"{i:012d}"}"',
+    ]
+    if i % 2:
+        lines.append('clause_set = "company"')
+    return "\n".join(lines) + "\n"
+
+
+def _company_clauses(preamble):
+    return f'''preamble = "{preamble}"
+
+[plans.monthly]
+amount = 20000
+price = "1. 甲方同意支付乙方服務費用 新台幣貳萬元整（NT$20,000）／月（未稅）。"
+'''
+
+
+def _document_xml(provider):
+    slots = contract._contract_slots(*CASE)
+    return b"".join(document_xml_chunks(CASE[1], slots, provider)).decode("utf-8")
+
+
+def _per_call(fn, repeat=20000):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多位乙方設定")
+    parser.add_argument("-n", type=int, default=50, help="乙方人數")
+    args = parser.parse_args(argv)
+    if args.n < 4:
+        # p000～p003 各有固定的檢查項目
+        parser.error("-n 至少為 4")
+    problems = []
+    store = get_provider_store()
+
+    if get_provider().revision != builtin_provider().revision:
+        problems.append("沒有設定檔時預設乙方不是內建設定")
+
+    ids = [f"p{i:03d}" for i in range(args.n)]
+    _write(os.path.join(_TMP, "clauses", "company.toml"), _company_clauses("公司版前言"))
+    for i, provider_id in enumerate(ids):
+        _write(os.path.join(_TMP, f"{provider_id}.toml"), _profile(i))
+    _write(os.path.join(_TMP, "p001.toml"), _profile(1) + '[clauses]\ntitle = "廣告代操合約書"\n')
+
+    started = time.perf_counter()
+    providers = {provider_id: get_provider(provider_id) for provider_id in ids}
+    load = (time.perf_counter() - started) / args.n
+    for i, (provider_id, p) in enumerate(providers.items()):
+        xml = _document_xml(p)
+        if p.name not in xml or f"{i:012d}" not in xml:
+            problems.append(f"{provider_id} 的 Word 沒有自己的名稱或帳號")
+        if (COMPANY_CLAUSE in xml or "公司版前言" in xml) != bool(i % 2):
+            problems.append(f"{provider_id} 的 clause_set 沒有生效")
+        if (("NT$20,000" in xml) != bool(i % 2)) or ("NT$17,000" in xml) == bool(i % 2):
+            problems.append(f"{provider_id} 的方案條文沒有生效")
+        price = "20,000" if i % 2 else "17,000"
+        if (p.amount(CASE[1]) != int(price.replace(",", ""))
+                or f"方案：{price}元/月\n" not in build_client_message(*CASE, provider=p)
+                or p.plan_label(CASE[1]) != f"{price}元/月（每月付款）"):
+            problems.append(f"{provider_id} 的確認訊息或方案名稱與合約金額（NT${price}）不一致")
+    if "廣告代操合約書" not in _document_xml(providers["p001"]):
+        problems.append("p001 的 [clauses] 覆寫沒有生效")
+    if providers["p000"].name not in render_preview_html(*CASE, provider="p000"):
+        problems.append("HTML 預覽沒有乙方名稱")
+    generate_pdf_bytes(*CASE, provider="p001")
+
+    # 改一位乙方的帳號：只重新載入那一位
+    before = dict(providers)
+    loads = store.loads
+    generate_docx_bytes(*CASE, provider="p002")
+    _write(os.path.join(_TMP, "p002.toml"), _profile(2, account="999999999999"))
+    started = time.perf_counter()
+    p002 = get_provider("p002")
+    reload = time.perf_counter() - started
+    others = [get_provider(provider_id) for provider_id in ids if provider_id != "p002"]
+    if store.loads - loads != 1:
+        problems.append(f"改一位乙方卻重新載入了 {store.loads - loads} 位")
+    if any(p is not before[p.id] for p in others):
+        problems.append("其他乙方的物件被換掉")
+    if "999999999999" not in _document_xml(p002) or "999999999999" not in render_preview_html(*CASE, provider="p002"):
+        problems.append("帳號更新後輸出仍是舊帳號")
+
+    # 只更新修改時間：版本不變，Word 骨架沿用
+    contract._contract_skeleton(PAYMENT_OPTIONS[0], "p002")
+    misses = contract._skeleton.cache_info().misses
+    stamp = os.stat(os.path.join(_TMP, "p002.toml")).st_mtime_ns + 1_000_000
+    os.utime(os.path.join(_TMP, "p002.toml"), ns=(stamp, stamp))
+    if get_provider("p002").revision != p002.revision:
+        problems.append("內容沒變但版本改變")
+    contract._contract_skeleton(PAYMENT_OPTIONS[0], "p002")
+    if contract._skeleton.cache_info().misses != misses:
+        problems.append("內容沒變但 Word 骨架重建")
+
+    # 改壞：沿用先前的版本，不重試
+    errors, loads = store.errors, store.loads
+    _write(os.path.join(_TMP, "p002.toml"), 'name = "少了引號\n')
+    for _ in range(3):
+        if get_provider("p002").revision != p002.revision:
+            problems.append("設定檔改壞後沒有沿用先前的版本")
+    if (store.errors - errors, store.loads - loads) != (1, 0):
+        problems.append(f"改壞後解析 {store.errors - errors} 次錯誤、{store.loads - loads} 次成功（應為 1、0）")
+
+    # 改 clause_set：只有共用它的乙方重新載入
+    loads = store.loads
+    _write(os.path.join(_TMP, "clauses", "company.toml"), _company_clauses("公司版前言（修訂）"))
+    for provider_id in ids:
+        get_provider(provider_id)
+    if store.loads - loads != args.n // 2:
+        problems.append(f"改 clause_set 重新載入了 {store.loads - loads} 位（應為 {args.n // 2}）")
+    if "公司版前言（修訂）" not in _document_xml(get_provider("p003")):
+        problems.append("clause_set 更新後輸出仍是舊條文")
+
+    steady = _per_call(lambda: get_provider(ids[-1]))
+    blocks = _per_call(lambda: contract.contract_blocks(CASE[1], contract._contract_slots(*CASE), ids[-1]), 2000)
+    print(f"{args.n} 位乙方：首次載入 {load * 1000:.2f} ms/位，重新載入一位 {reload * 1000:.2f} ms；"
+          f"穩定狀態 get_provider {steady * 1e6:.1f} µs/次，填入條文 {blocks * 1e6:.0f} µs/份")
+
+    for p in problems[:10]:
+        print(p)
+    print(f"不符 {len(problems)}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
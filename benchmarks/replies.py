@@ -0,0 +1,129 @@
+"""第二階段回覆解析（replies.py）的正確性與吞吐量
+
+    python -m benchmarks.replies [-n 20000]
+
+以 build_reply_text 產生隨機回覆（多行回答、空行、引號、（未填）、上午／下午時間），
+包成 LINE 聊天記錄匯出格式並穿插一般訊息，寫進暫存檔後逐則解析：
+每一則都必須與原始欄位完全相同，否則 exit 1。
+另外量兩種檔案大小的解析峰值配置（應與則數無關）與寫入索引、查詢的時間。
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from contract import PHASE2_CHECK_KEYS, PHASE2_DATA_KEYS, build_reply_text
+from replies import ReplyIndex, iter_replies
+
+_WORDS = ["小資族", "上班族", "媽媽", "轉換率低", "不知道怎麼下廣告", "名單", "https://example.com/lp?a=1&b=2",
+          "說「好」", '引號"測試"', "：冒號", "- 開頭是減號", "【不是段落】", "1) 不是競品"]
+
+
+def _text(rng, multiline):
+    lines = [" ".join(rng.sample(_WORDS, rng.randint(1, 3))) for _ in range(rng.randint(1, 4 if multiline else 1))]
+    if multiline and len(lines) > 1 and rng.random() < 0.3:
+        lines.insert(1, "")
+    return "" if rng.random() < 0.15 else "\n".join(lines)
+
+
+def _state(rng):
+    state = {k: rng.random() < 0.5 for k in PHASE2_CHECK_KEYS}
+    for k in PHASE2_DATA_KEYS:
+        state[k] = _text(rng, k in ("who_problem", "what_problem", "how_solve"))
+    state["budget"] = rng.choice(["30000", "1", "3萬：先測試兩週", ""])
+    return state
+
+
+def _line_quote(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def write_export(path, n, seed=0):
+    """寫出 n 則回覆的 LINE 匯出檔，回傳 [(甲方, 收到時間, state)]（只在需要比對時保留）"""
+    rng = random.Random(seed)
+    expected = []
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[LINE] 與廣告投放的聊天記錄\n儲存日期：2026/03/31 10:00\n\n")
+        for i in range(n):
+            if i % 50 == 0:
+                f.write(f"\n2026/03/{1 + i // 50 % 28:02d}（日）\n")
+                day = f"2026-03-{1 + i // 50 % 28:02d}"
+            hour, minute = rng.randint(0, 23), rng.randint(0, 59)
+            clock = f"{'上午' if hour < 12 else '下午'}{hour % 12:02d}:{minute:02d}" if i % 2 else f"{hour:02d}:{minute:02d}"
+            party, state = f"客戶{i % 997}", _state(rng)
+            f.write(f"{clock}\t廣告主{i}\t好的，資料如下\n")
+            f.write(f"{clock}\t廣告主{i}\t{_line_quote(build_reply_text(state, party))}\n")
+            f.write(f"{clock}\t我\t收到，謝謝\n")
+            if n <= 50_000:
+                expected.append((party, f"{day} {hour:02d}:{minute:02d}", state))
+    return expected
+
+
+def _parse_peak(path):
+    tracemalloc.start()
+    count = 0
+    with open(path, encoding="utf-8") as f:
+        for _ in iter_replies(f):
+            count += 1
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="第二階段回覆解析")
+    parser.add_argument("-n", type=int, default=20000, help="回覆則數")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="replies_bench_")
+    path = os.path.join(tmp, "line.txt")
+    expected = write_export(path, args.n)
+
+    started = time.perf_counter()
+    with open(path, encoding="utf-8") as f:
+        parsed = list(iter_replies(f))
+    elapsed = time.perf_counter() - started
+
+    mismatches = 0
+    if len(parsed) != len(expected):
+        print(f"則數不符：解析 {len(parsed)}，應為 {len(expected)}")
+        mismatches += 1
+    for record, (party, received_at, state) in zip(parsed, expected):
+        got = {k: record[k] for k in state}
+        if record["party_a"] != party or record["received_at"] != received_at or got != state:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"第 {record['line']} 行不符：\n  預期 {party} {received_at} {state}\n  解析 {record}")
+    size = os.path.getsize(path)
+    print(f"{len(parsed)} 則（{size / 1e6:.1f} MB），不符 {mismatches}；"
+          f"解析 {elapsed:.2f} 秒，{size / 1e6 / elapsed:.1f} MB/s")
+
+    small = os.path.join(tmp, "small.txt")
+    write_export(small, args.n // 10)
+    for label, p in (("1/10 大小", small), ("完整", path)):
+        count, peak = _parse_peak(p)
+        print(f"{label:<8} {count:>7} 則  解析峰值配置 {peak / 1024:,.0f} KB")
+
+    index = ReplyIndex(os.path.join(tmp, "replies.sqlite3"))
+    started = time.perf_counter()
+    with open(path, encoding="utf-8") as f:
+        seen, inserted = index.ingest(iter_replies(f, source=path))
+    ingest = time.perf_counter() - started
+    with open(path, encoding="utf-8") as f:
+        _, again = index.ingest(iter_replies(f, source=path))
+    started = time.perf_counter()
+    pending = index.search(pending=["pixel"], limit=-1)
+    query = time.perf_counter() - started
+    print(f"寫入索引 {inserted}/{seen} 則 {ingest:.2f} 秒；重複匯入新增 {again} 則；"
+          f"像素事件未完成 {len(pending)} 位客戶，查詢 {query * 1000:.1f} ms")
+    index.close()
+
+    if mismatches or again:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
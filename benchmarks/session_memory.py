@@ -0,0 +1,67 @@
+"""每個 session 為了下載按鈕常駐的記憶體
+
+    python -m benchmarks.session_memory [-n 20]
+
+以 AppTest 開 n 個 session，各自生成一份不同甲方的合約，統計 session_state 裡
+bytes 值的總大小（改用 spool.py 之前 docx / pdf 內容整份放在這裡），並列出暫存區檔案大小。
+不含 Streamlit 媒體儲存區在按下下載後暫存的那一份。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _session_bytes(at):
+    total = 0
+    for value in at._session_state.filtered_state.values():
+        if isinstance(value, (bytes, bytearray)):
+            total += len(value)
+        elif isinstance(value, dict):
+            total += sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value.values())
+    return total
+
+
+def _generate(at, party_a):
+    at.run()
+    at.text_input[0].input(party_a)
+    at.button[0].click().run()
+    deadline = time.time() + 60
+    while not at.session_state.generated:
+        if time.time() > deadline:
+            raise TimeoutError(party_a)
+        time.sleep(0.2)
+        at.run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="每個 session 的下載資料常駐大小")
+    parser.add_argument("-n", type=int, default=20, help="session 數")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("CONTRACT_SPOOL_DIR", tempfile.mkdtemp(prefix="spool_bench_"))
+    os.environ.setdefault("CONTRACT_REGISTRY_DB", os.path.join(tempfile.mkdtemp(prefix="registry_bench_"), "contracts.sqlite3"))
+
+    sessions = []
+    for i in range(args.n):
+        at = AppTest.from_file(APP_PATH, default_timeout=60)
+        _generate(at, f"測試客戶{i:03d}有限公司")
+        sessions.append(at)
+
+    per_session = [_session_bytes(at) for at in sessions]
+    docx, pdf = sessions[0].session_state.docx_file, sessions[0].session_state.pdf_file
+    from spool import get_spool
+
+    print(f"sessions：{args.n}")
+    print(f"session_state 常駐（平均）：{sum(per_session) / args.n:,.0f} bytes")
+    print(f"改用暫存區前每個 session 常駐：{docx['size'] + pdf['size']:,} bytes（docx + pdf 內容）")
+    print(f"暫存區（所有 session 共用，磁碟）：{get_spool().stats()['bytes']:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""合約生成與第二階段文字的效能基準
+
+    python -m benchmarks.suite -o bench.json
+    python -m benchmarks.suite --baseline bench.json --threshold 0.2   # 退步超過 20% 時 exit 1
+
+指標命名：*_ms / *_bytes 越小越好，*_per_sec 越大越好（比對 baseline 時依此判斷方向）。
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+
+import docx_writer
+from contract import (
+    PAYMENT_OPTIONS,
+    PHASE2_DEFAULTS,
+    _contract_skeleton,
+    _skeleton,
+    build_backup_text,
+    build_reply_text,
+    generate_docx_bytes,
+)
+
+PLAN_LABELS = {PAYMENT_OPTIONS[0]: "monthly", PAYMENT_OPTIONS[1]: "quarterly"}
+CASES = {
+    PAYMENT_OPTIONS[0]: dict(party_a="測試客戶有限公司", start_dt=date(2026, 3, 1), pay_day=5, pay_dt=None),
+    PAYMENT_OPTIONS[1]: dict(party_a="測試客戶有限公司", start_dt=date(2026, 3, 1), pay_day=None, pay_dt=date(2026, 2, 25)),
+}
+PHASE2_SAMPLE = {
+    **PHASE2_DEFAULTS,
+    "ad_account": True,
+    "pixel": True,
+    "fanpage_url": "https://www.facebook.com/example",
+    "landing_url": "https://example.com/landing",
+    "comp1": "https://www.facebook.com/competitor1",
+    "who_problem": "想在家自學的上班族" * 20,
+    "what_problem": "下班後沒時間、找不到系統化教材" * 20,
+    "how_solve": "每週一次線上直播＋錄影回放＋社群答疑" * 20,
+    "budget": "30000",
+}
+
+
+def _render(payment_opt):
+    return generate_docx_bytes(payment_opt=payment_opt, **CASES[payment_opt])
+
+
+def _warm_worker():
+    for opt in PAYMENT_OPTIONS:
+        _contract_skeleton(opt)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def _timed(fn, n):
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "median_ms": _ms(statistics.median(samples)),
+        "p95_ms": _ms(samples[min(len(samples) - 1, int(len(samples) * 0.95))]),
+    }
+
+
+def bench_import():
+    # 全新行程載入 contract 並生成第一份合約（含 python-docx 載入）
+    code = (
+        "import time; t=time.perf_counter(); from datetime import date; import contract;"
+        f"contract.generate_docx_bytes('x', {PAYMENT_OPTIONS[0]!r}, date(2026, 3, 1), 5, None);"
+        "print(time.perf_counter()-t)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    return {"process_cold_first_render_ms": _ms(float(out.stdout.strip()))}
+
+
+def bench_render(n):
+    results = {}
+    for payment_opt, label in PLAN_LABELS.items():
+        _skeleton.cache_clear()
+        docx_writer._template.cache_clear()
+        started = time.perf_counter()
+        data = _render(payment_opt)
+        results[f"{label}_cold_ms"] = _ms(time.perf_counter() - started)
+
+        for k, v in _timed(lambda: _render(payment_opt), n).items():
+            results[f"{label}_warm_{k}"] = v
+
+        tracemalloc.start()
+        _render(payment_opt)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[f"{label}_peak_alloc_bytes"] = peak
+        results[f"{label}_output_bytes"] = len(data)
+    return results
+
+
+def bench_concurrency(workers, jobs):
+    results = {}
+    opts = [PAYMENT_OPTIONS[i % 2] for i in range(jobs)]
+
+    with ThreadPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+        list(pool.map(_render, opts[:workers]))
+        started = time.perf_counter()
+        list(pool.map(_render, opts))
+        results[f"threads{workers}_docs_per_sec"] = round(jobs / (time.perf_counter() - started), 2)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_warm_worker
+    ) as pool:
+        list(pool.map(_render, opts[:workers]))
+        started = time.perf_counter()
+        list(pool.map(_render, opts, chunksize=4))
+        results[f"processes{workers}_docs_per_sec"] = round(jobs / (time.perf_counter() - started), 2)
+    return results
+
+
+def bench_billing(n, contracts=5000):
+    # 一整年的收款排程：月付 / 季付各半
+    from datetime import timedelta
+
+    from billing import billing_schedule
+
+    rows = [
+        dict(party_a=f"客戶{i:05d}", payment_opt=PAYMENT_OPTIONS[i % 2], start_dt=date(2024, 1, 1) + timedelta(days=i % 900),
+             pay_day=i % 28 + 1 if i % 2 == 0 else None, pay_dt=date(2023, 12, 1) if i % 2 else None)
+        for i in range(contracts)
+    ]
+    timed = _timed(lambda: billing_schedule(rows, date(2026, 1, 1), date(2026, 12, 31)), n)
+    return {f"billing_{contracts}_year_{k}": v for k, v in timed.items()}
+
+
+def bench_preview(n):
+    # 合約預覽：每次輸入變動只填欄位（快取外的路徑），與同一份合約的 Word 生成對照
+    from contract_html import _preview_html
+    from providers import get_provider
+
+    results = {}
+    for payment_opt, label in PLAN_LABELS.items():
+        kwargs = dict(CASES[payment_opt], payment_opt=payment_opt)
+        for k, v in _timed(lambda: _preview_html.__wrapped__(**kwargs, provider=get_provider()), n).items():
+            results[f"{label}_preview_{k}"] = v
+    return results
+
+
+def bench_phase2(n):
+    # 第二階段每次 rerun 都會重建備份碼與回傳內容
+    results = {}
+    for k, v in _timed(lambda: build_backup_text(PHASE2_SAMPLE), n).items():
+        results[f"phase2_backup_{k}"] = v
+    for k, v in _timed(lambda: build_reply_text(PHASE2_SAMPLE, "測試客戶有限公司"), n).items():
+        results[f"phase2_reply_{k}"] = v
+    return results
+
+
+def compare(results, baseline, threshold):
+    """回傳退步的指標清單 [(名稱, baseline, 目前)]"""
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None or not base:
+            continue
+        if name.endswith("_per_sec"):
+            worse = current < base * (1 - threshold)
+        else:
+            worse = current > base * (1 + threshold)
+        if worse:
+            regressions.append((name, base, current))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="合約生成效能基準")
+    parser.add_argument("-n", type=int, default=50, help="每個延遲指標的取樣次數")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="併發測試的執行緒／行程數")
+    parser.add_argument("--jobs", type=int, default=200, help="併發測試的合約份數")
+    parser.add_argument("-o", "--output", default=None, help="結果 JSON 路徑（預設印到標準輸出）")
+    parser.add_argument("--baseline", default=None, help="比對用的先前結果 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="容許退步比例（預設 0.2）")
+    args = parser.parse_args(argv)
+
+    results = {}
+    results.update(bench_import())
+    results.update(bench_render(args.n))
+    results.update(bench_concurrency(args.workers, args.jobs))
+    results.update(bench_billing(args.n))
+    results.update(bench_preview(args.n * 20))
+    results.update(bench_phase2(args.n * 20))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "n": args.n,
+            "workers": args.workers,
+            "jobs": args.jobs,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, base, current in regressions:
+            print(f"退步：{name} {base} → {current}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
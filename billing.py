@@ -0,0 +1,170 @@
+"""收款排程：依合約推算每一期的服務期間與付款期限，可匯出 CSV / ICS
+
+- 月付：以啟動日為錨點按日曆月續期（1/31 起 → 2/28、3/31…），自動續行不設終點；
+  首期於啟動日前一天前付清，之後每期於該期起始月份的 pay_day 日前付款
+- 季付：一期三個日曆月，於 pay_dt 前付清；屆滿前 7 日為續約協議期限（renewal_notice）
+
+合約條文上的首期屆滿日仍是 contract_end_date（30 / 90 天）；排程以日曆月計算。
+所有合約一次以 numpy 陣列向量化計算（日期以 1970-01-01 起算的日數表示），不逐筆迴圈。
+"""
+import csv
+import hashlib
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from contract import PAYMENT_OPTIONS, PLAN_CODES
+from providers import get_provider
+
+RENEWAL_NOTICE_DAYS = 7
+COLUMNS = ("party_a", "plan", "period", "period_start", "period_end", "due_date", "amount", "renewal_notice")
+
+_NAT_DAYS = np.datetime64("NaT", "D").astype(np.int64)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class _MonthTable:
+    """月份序號（1970-01 起算）→ 該月 1 日（日數）與該月天數；只轉換用得到的月份範圍"""
+
+    def __init__(self, first, last):
+        self.first = first
+        firsts = np.arange(first, last + 2).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+        self.month_start = firsts[:-1]
+        self.month_days = np.diff(firsts)
+
+    def add_months(self, month, day):
+        """month 月的第 day + 1 天；該月沒有這一天時取月底"""
+        i = month - self.first
+        return self.month_start[i] + np.minimum(day, self.month_days[i] - 1)
+
+
+def _days(dates):
+    # date 物件直接轉 datetime64 很慢，改用序數平移成 1970-01-01 起算的日數
+    return np.fromiter((d.toordinal() for d in dates), dtype=np.int64) - _EPOCH_ORDINAL
+
+
+def _month_of(days):
+    return np.asarray(days, dtype=np.int64).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def billing_schedule(contracts, start, end):
+    """回傳與 [start, end]（date，含頭尾）重疊的所有期別，欄位見 COLUMNS，每欄為 numpy 陣列
+
+    contracts 為 parse_contract_row() 格式的 dict（party_a, payment_opt, start_dt, pay_day, pay_dt, provider）；
+    金額取自該乙方目前設定的 plans.amount，沒有 provider 時為預設乙方。
+    """
+    contracts = list(contracts)
+    if not contracts:
+        return {name: np.array([], dtype=object) for name in COLUMNS}
+
+    lo, hi = _days((start, end))
+    starts = _days(c["start_dt"] for c in contracts)
+    monthly = np.array([c["payment_opt"] == PAYMENT_OPTIONS[0] for c in contracts])
+    pay_day = np.array([c["pay_day"] or 1 for c in contracts], dtype=np.int64)
+    pay_dt = _days(c["pay_dt"] or c["start_dt"] for c in contracts)
+
+    # 每份合約只看橫跨查詢區間的那幾期：從區間開始前一期起算，最多到區間結束所在的月份
+    start_month = _month_of(starts)
+    lo_month, hi_month = _month_of((lo, hi))
+    first = np.where(monthly, np.maximum(lo_month - start_month - 1, 0), 0)
+    period = first[:, None] + np.arange(max(1, hi_month - lo_month + 3))[None, :]
+    span = np.where(monthly, 1, 3)[:, None]
+    months = start_month[:, None] + period * span
+
+    table = _MonthTable(int(start_month.min()), int((months + span).max()))
+    start_day = (starts - table.month_start[start_month - table.first])[:, None]
+    period_start = table.add_months(months, start_day)
+    period_end = table.add_months(months + span, start_day) - 1
+    due = np.where(
+        monthly[:, None],
+        np.where(period == 0, period_start - 1, table.month_start[months - table.first] + pay_day[:, None] - 1),
+        pay_dt[:, None],
+    )
+    renewal = np.where(monthly[:, None], _NAT_DAYS, period_end + 1 - RENEWAL_NOTICE_DAYS)
+
+    keep = (period_start <= hi) & (period_end >= lo) & (monthly[:, None] | (period == 0))
+    rows, cols = np.nonzero(keep)
+    order = np.lexsort((rows, due[rows, cols]))
+    rows, cols = rows[order], cols[order]
+
+    party = np.array([c["party_a"] for c in contracts], dtype=object)
+    plan = np.array([PLAN_CODES[c["payment_opt"]] for c in contracts], dtype=object)
+    providers = {}
+    for c in contracts:
+        if c.get("provider") not in providers:
+            providers[c.get("provider")] = get_provider(c.get("provider"))
+    amount = np.array([providers[c.get("provider")].amount(c["payment_opt"]) for c in contracts], dtype=np.int64)
+    return {
+        "party_a": party[rows],
+        "plan": plan[rows],
+        "period": period[rows, cols] + 1,
+        "period_start": period_start[rows, cols].astype("datetime64[D]"),
+        "period_end": period_end[rows, cols].astype("datetime64[D]"),
+        "due_date": due[rows, cols].astype("datetime64[D]"),
+        "amount": amount[rows],
+        "renewal_notice": renewal[rows, cols].astype("datetime64[D]"),
+    }
+
+
+def iter_schedule(schedule):
+    """逐筆輸出 dict（日期為 ISO 字串，沒有值時為空字串）"""
+    columns = []
+    for name in COLUMNS:
+        values = schedule[name]
+        if values.dtype.kind == "M":
+            values = np.where(np.isnat(values), "", values.astype(str))
+        columns.append(values.tolist())
+    for values in zip(*columns):
+        yield dict(zip(COLUMNS, values))
+
+
+def write_csv(schedule, fp):
+    writer = csv.DictWriter(fp, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(iter_schedule(schedule))
+
+
+def _ics_text(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_fold(line):
+    # 每行最多 75 octets，續行以一個空白開頭（RFC 5545 §3.1），不切斷 UTF-8 字元
+    out, current = [], b""
+    for char in line:
+        encoded = char.encode("utf-8")
+        if len(current) + len(encoded) > (75 if not out else 74):
+            out.append(current)
+            current = b""
+        current += encoded
+    out.append(current)
+    return "\r\n ".join(part.decode("utf-8") for part in out)
+
+
+def write_ics(schedule, fp, stamp=None):
+    """付款期限與續約協議期限輸出為全天事件；UID 由合約與期別決定，重複匯入會更新同一事件"""
+    stamp = (stamp or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//ad-contract//billing//ZH", "CALSCALE:GREGORIAN"]
+
+    def event(kind, day, summary, row):
+        description = f"服務期間 {row['period_start']}～{row['period_end']}"
+        uid = hashlib.sha1(
+            f"{row['party_a']}|{row['plan']}|{row['period_start']}|{kind}".encode("utf-8")
+        ).hexdigest()
+        lines.extend([
+            "BEGIN:VEVENT",
+            f"UID:{uid}@ad-contract",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{day.replace('-', '')}",
+            f"SUMMARY:{_ics_text(summary)}",
+            f"DESCRIPTION:{_ics_text(description)}",
+            "END:VEVENT",
+        ])
+
+    for row in iter_schedule(schedule):
+        event("due", row["due_date"], f"{row['party_a']} 第 {row['period']} 期付款 NT${row['amount']:,}", row)
+        if row["renewal_notice"]:
+            event("renewal", row["renewal_notice"], f"{row['party_a']} 續約協議期限", row)
+
+    lines.append("END:VCALENDAR")
+    fp.write("".join(_ics_fold(line) + "\r\n" for line in lines))
@@ -0,0 +1,221 @@
+"""合約條文與付款方案：預設資料與條文編譯（不依賴乙方設定檔，contract.py 與 providers.py 共用）
+
+匯入本模組只建立常數，不載入 python-docx 等任何輸出套件。
+"""
+import re
+
+# 預設乙方的唯一來源（providers/ 沒有 default.toml 時使用；多位乙方見 providers.py）
+PROVIDER_NAME = "高如慧"  # 乙方（服務執行者）
+BANK_NAME = "中國信託商業銀行"
+BANK_CODE = "822"
+ACCOUNT_NUMBER = "783540208870"
+
+PAYMENT_OPTIONS = ["17,000元/月（每月付款）", "45,000元/三個月（一次付款）"]
+PLAN_CODES = {PAYMENT_OPTIONS[0]: "monthly", PAYMENT_OPTIONS[1]: "quarterly"}
+# PAYMENT_OPTIONS 是方案的識別字串（存檔、登記簿、批次檔都用它）；顯示給人看的方案名稱
+# 依各乙方 plans 的 amount 代入以下格式（見 Provider.plan_label / plan_summary）
+PLAN_LABELS = {"monthly": "{amount:,}元/月（每月付款）", "quarterly": "{amount:,}元/三個月（一次付款）"}
+PLAN_SUMMARIES = {"monthly": "{amount:,}元/月", "quarterly": "{amount:,}元/三個月（一次付清）"}
+
+
+# 每份合約變動欄位的佔位字串：條文編譯後以此標出欄位位置，Word 骨架與 HTML 預覽也以此建範本
+_SLOT_TOKENS = {
+    "party_a": "{{PARTY_A}}",
+    "start": "{{START}}",
+    "end": "{{END}}",
+    "pay_day": "{{PAY_DAY}}",
+    "pay_date": "{{PAY_DATE}}",
+}
+_TOKEN_RE = re.compile("|".join(re.escape(token) for token in _SLOT_TOKENS.values()))
+_TOKEN_KEYS = {token: key for key, token in _SLOT_TOKENS.items()}
+
+
+# 合約條文（預設乙方使用；其他乙方可在設定檔整段覆寫，見 providers.py）
+# 文字中的 {欄位} 於編譯時代入，文字本身要用大括號時寫成 {{ }}：
+#   每份合約變動：{party_a} {start} {end} {pay_day} {pay_date}
+#   乙方：{provider} {bank_name} {bank_code} {account_number}
+#   付款方案（plans）：{period} {price} {pay_time} {first_pay} {refund}
+# plans 的 amount 為每期金額（整數，收款排程用），需與 price 的文字一致
+# 代入後為空字串的條款項目不輸出（例如季付沒有 first_pay）
+DEFAULT_CLAUSES = {
+    "title": "廣告投放服務合約書",
+    "parties": ["甲方（委託暨付款方）：{party_a}\n", "乙方（服務執行者）：{provider}"],
+    "preamble": "茲因甲方委託乙方提供數位廣告投放服務，雙方本於誠信原則，同意訂立本合約，並共同遵守下列條款：",
+    "plans": {
+        "monthly": {
+            "amount": 17000,
+            "period": "自 {start} 起至 {end} 止，共 1 個月。届期如雙方無異議，則本合約自動續行 1 個月，以此類推。",
+            "price": "1. 甲方同意支付乙方服務費用 新台幣壹萬柒仟元整（NT$17,000）／月。",
+            "pay_time": "2. 付款時間：甲方應於每月 {pay_day} 日前支付當月服務費用至乙方指定帳戶。",
+            "first_pay": "3. 首期款項應於合作啟動日（{start}）前支付完成。",
+            "refund": "2. 月付方案：已支付之當期費用不予退還。",
+        },
+        "quarterly": {
+            "amount": 45000,
+            "period": "自 {start} 起至 {end} 止，共 3 個月。届期如雙方有意續約，應於届滿前 7 日另行協議。",
+            "price": "1. 甲方同意支付乙方服務費用 新台幣肆萬伍仟元整（NT$45,000）／三個月。",
+            "pay_time": "2. 付款時間：甲方應於 {pay_date} 前一次支付完成。",
+            "first_pay": "",
+            "refund": (
+                "2. 季付方案屬優惠性質之預付服務費，一經支付後即不予退還。"
+                "即使甲方於合約期間內提前終止或未使用完畢服務內容，亦同；"
+                "惟因乙方重大違約致服務無法履行者，不在此限。"
+            ),
+        },
+    },
+    # 依序編號為第一條、第二條…：blank_before（標題前空一行）、body（內文）、items（條款項目）、
+    # sections（小節：title＋items）、notes（項目之後的縮排附註）皆可省略
+    "articles": [
+        {"title": "合約期間", "items": ["{period}"]},
+        {
+            "title": "服務內容",
+            "blank_before": True,
+            "body": "乙方同意為甲方提供以下廣告投放服務：",
+            "sections": [
+                {"title": "一、固定工作項目", "items": [
+                    "1. 廣告上架：依甲方需求於指定平台建立並上架廣告活動。",
+                    "2. 廣告監控／維護／優化：定期監控成效數據，進行必要之調整與優化。",
+                    "3. 簡易週報：每週提供廣告成效摘要及下週優化方向。",
+                ]},
+                {"title": "二、非固定工作項目（視實際狀況提供）", "items": [
+                    "1. 廣告素材建議：乙方得依投放成效、競品與市場狀況，提供素材與文案方向建議。",
+                    "2. 到達頁面優化建議：於轉換成效異常或下降時，提供頁面優化方向。",
+                ]},
+            ],
+        },
+        {"title": "服務範圍與限制", "items": [
+            "1. 本服務範圍以 Meta（Facebook／Instagram）廣告投放為主；若需擴展至其他平台，雙方另行協議。",
+            "2. 廣告投放預算由甲方自行支付予廣告平台，不包含於本合約服務費用內。",
+            "3. 廣告素材（圖片、影片等）之製作原則上由甲方提供，乙方提供方向與建議。",
+            "4. 甲方應提供必要帳號權限、素材與資訊，以確保服務得以順利執行。",
+        ]},
+        {"title": "配合事項與作業方式", "items": [
+            "1. 甲方同意配合乙方所需之資料提供、權限設定與必要操作，以確保服務品質。",
+            "2. 若因平台政策、帳號狀況或其他不可控因素需採替代作業方式（例如：由甲方匯出報表供乙方監控），甲方同意合理配合。",
+        ]},
+        {
+            "title": "費用與付款方式",
+            "items": [
+                "{price}",
+                "{pay_time}",
+                "{first_pay}",
+                "4. 逾期付款者，乙方得暫停服務至款項付清為止；因此造成之廣告中斷或成效波動，乙方不負賠償責任。",
+            ],
+            "notes": ["乙方指定收款帳戶：\n銀行：{bank_name}（{bank_code}）\n帳號：{account_number}"],
+        },
+        {"title": "付款方式與稅務責任", "items": [
+            "1. 乙方為自然人，依法無須開立統一發票。",
+            "2. 本合約費用之付款方式、帳務處理及相關稅務申報，均由甲方依其自身狀況及相關法令自行決定並負責。",
+            "3. 甲方得依其帳務或實務需求，選擇是否以勞務報酬方式支付或其他合法方式付款；乙方將於合理需求下配合提供必要之收款或服務文件。",
+            "4. 乙方不負責判斷、建議或保證任何稅務處理方式之合法性。",
+        ]},
+        {"title": "成效聲明與免責", "items": [
+            "1. 乙方將盡專業所能優化廣告成效，但投放成效受市場環境、競爭狀況、消費者行為、平台演算法等多重因素影響，乙方不保證特定之轉換率、ROAS 或銷售成果。",
+            "2. 因平台政策變更、帳號異常、不可抗力因素等非乙方可控原因導致之廣告中斷或成效下降，乙方不負賠償責任。",
+            "3. 甲方提供之素材、商品或服務如違反平台政策或法令規定，導致廣告被拒絕或帳號受處分，乙方不負相關責任。",
+        ]},
+        {"title": "保密條款", "items": [
+            "1. 合作期間所涉及之商業資訊、廣告數據、行銷策略及客戶資料等，均屬機密資訊，僅得用於本合作目的。",
+            "2. 本保密義務於合約終止後仍持續有效 2 年。",
+        ]},
+        {"title": "智慧財產權", "items": [
+            "1. 乙方提供之廣告文案、策略建議、報告等成果，甲方於付清全部款項後，得於本案範圍內使用。",
+            "2. 甲方提供之品牌素材、商標、圖片等，其權利仍歸甲方所有。",
+        ]},
+        {"title": "合約終止", "items": [
+            "1. 任一方如欲提前終止本合約，應於終止日前 14 日以書面（含電子郵件、通訊軟體訊息）通知他方。",
+            "{refund}",
+            "3. 如因一方重大違約致他方權益受損，受損方得立即終止合約並請求損害賠償。",
+        ]},
+        {"title": "通知方式", "items": [
+            "本合約相關通知，得以電子郵件、LINE、Messenger 或其他雙方約定之通訊方式為之，於發送時即生效力。",
+        ]},
+        {"title": "合約變更", "items": [
+            "本合約之任何修改或補充，應經雙方書面同意後始生效力。",
+        ]},
+        {"title": "不可抗力", "items": [
+            "因天災、戰爭、政府行為、網路中斷、平台系統異常或其他不可抗力因素，致任一方無法履行本合約義務時，該方不負違約責任；惟應儘速通知並於事由消滅後恢復履行。",
+        ]},
+        {"title": "爭議處理", "items": [
+            "本合約之解釋與適用，以中華民國法律為準據法。雙方如有爭議，應先行協商；協商不成以臺灣臺北地方法院為第一審管轄法院。",
+        ]},
+    ],
+    "signatures": [
+        "甲方（委託暨付款方）：\n{party_a}\n\n簽名：___________________\n\n日期：_____ 年 ___ 月 ___ 日",
+        "乙方（服務執行者）：\n{provider}\n\n簽名：___________________\n\n日期：_____ 年 ___ 月 ___ 日",
+    ],
+}
+
+_PLAN_FIELDS = ("period", "price", "pay_time", "first_pay", "refund")
+_NUMERALS = "〇一二三四五六七八九"
+
+
+def _article_number(n):
+    """1～99 → 一～九十九"""
+    tens, ones = divmod(n, 10)
+    return ("" if tens < 2 else _NUMERALS[tens]) + ("十" if tens else "") + (_NUMERALS[ones] if ones else "")
+
+
+def _compile_text(text, values):
+    """代入乙方與方案欄位；每份合約變動的欄位切成 (固定文字, 欄位名稱, 固定文字, …)，沒有時直接是字串"""
+    try:
+        text = text.format_map(values)
+    except KeyError as e:
+        raise ValueError(f"未知的欄位：{{{e.args[0]}}}") from None
+    segments = []
+    last = 0
+    for m in _TOKEN_RE.finditer(text):
+        segments.append(text[last:m.start()])
+        segments.append(_TOKEN_KEYS[m.group()])
+        last = m.end()
+    if not segments:
+        return text
+    segments.append(text[last:])
+    return tuple(segments)
+
+
+def compile_contract(fields, clauses):
+    """把乙方資料（provider / bank_name / bank_code / account_number）與條文編譯成合約範本
+
+    回傳 {付款方案: ((樣式, 內容), …)}，內容為 _compile_text 的結果（parties / signature 為其 tuple）；
+    每份合約只需用 contract_blocks 填入變動欄位。欄位名稱錯誤時丟出 ValueError。
+    """
+    templates = {}
+    for payment_opt in PAYMENT_OPTIONS:
+        values = {**fields, **_SLOT_TOKENS}
+        plan = clauses["plans"][PLAN_CODES[payment_opt]]
+        for key in _PLAN_FIELDS:
+            try:
+                values[key] = plan.get(key, "").format_map(values)
+            except KeyError as e:
+                raise ValueError(f"未知的欄位：{{{e.args[0]}}}") from None
+
+        def text(t):
+            return _compile_text(t, values)
+
+        blocks = [
+            ("title", text(clauses["title"])),
+            ("blank", ""),
+            ("parties", tuple(text(t) for t in clauses["parties"])),
+            ("blank", ""),
+            ("body", text(clauses["preamble"])),
+        ]
+        for n, article in enumerate(clauses["articles"], 1):
+            if article.get("blank_before"):
+                blocks.append(("blank", ""))
+            blocks.append(("heading", text(f"第{_article_number(n)}條　{article['title']}")))
+            if article.get("body"):
+                blocks.append(("body", text(article["body"])))
+            for item in article.get("items", ()):
+                item = text(item)
+                if item:
+                    blocks.append(("item", item))
+            for section in article.get("sections", ()):
+                blocks.append(("subheading", text(section["title"])))
+                blocks.extend(("subitem", text(item)) for item in section.get("items", ()))
+            blocks.extend(("subitem", text(note)) for note in article.get("notes", ()))
+        blocks.append(("blank", ""))
+        blocks.append(("blank", ""))
+        blocks.append(("signature", tuple(text(t) for t in clauses["signatures"])))
+        templates[payment_opt] = tuple(blocks)
+    return templates
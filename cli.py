@@ -0,0 +1,195 @@
+"""命令列入口（不載入 Streamlit）
+
+    python cli.py render --party-a 王小明 --plan monthly --start 2026-03-01 --pay-day 5 -o 合約.docx
+    python cli.py render --party-a 王小明 --plan monthly --start 2026-03-01 --pay-day 5 --pdf
+    python cli.py messages --party-a 王小明 --plan quarterly --start 2026-03-01 --pay-date 2026-02-25
+    python cli.py batch rows.csv -o contracts.zip
+    python cli.py search --party 王 --from 2026-03-01 --to 2026-03-31
+    python cli.py fetch <sha256> -o 合約.docx
+    python cli.py schedule --from 2026-01-01 --to 2026-12-31 --ics -o 收款.ics   # 名單預設取自 registry
+    python cli.py replies ingest LINE聊天記錄.txt && python cli.py replies list --pending pixel
+    python cli.py archive --from 2026-03-01 --to 2026-03-31 -o 2026-03.zip       # 月結封存，可續傳
+    python cli.py providers                                                      # 列出並檢查乙方設定
+單份合約與訊息可加 --provider <代號> 指定乙方（providers/<代號>.toml），預設為預設乙方。
+"""
+import argparse
+import sys
+
+from contract import build_client_message, build_payment_message, generate_docx_bytes, parse_contract_row, safe_filename
+
+
+def _add_contract_args(parser):
+    parser.add_argument("--party-a", required=True, help="甲方名稱")
+    parser.add_argument("--plan", required=True, help="monthly / quarterly（或完整方案文字）")
+    parser.add_argument("--start", required=True, help="合作啟動日 YYYY-MM-DD")
+    parser.add_argument("--pay-day", default=None, help="月付：每月付款日（1～28）")
+    parser.add_argument("--pay-date", default=None, help="季付：付款日期 YYYY-MM-DD")
+    parser.add_argument("--provider", default=None, help="乙方代號（預設為預設乙方）")
+
+
+def _contract_kwargs(args):
+    return parse_contract_row({
+        "party_a": args.party_a,
+        "payment_opt": args.plan,
+        "start_dt": args.start,
+        "pay_day": args.pay_day,
+        "pay_dt": args.pay_date,
+        "provider": args.provider,
+    })
+
+
+def _registry_command(parser, args):
+    from datetime import date
+
+    from registry import get_registry
+
+    registry = get_registry()
+    if args.command == "fetch":
+        data = registry.fetch(args.sha256)
+        if data is None:
+            parser.error(f"找不到 {args.sha256}")
+        with open(args.output, "wb") as f:
+            f.write(data)
+        print(args.output)
+        return 0
+
+    try:
+        start_from = date.fromisoformat(args.start_from) if args.start_from else None
+        start_to = date.fromisoformat(args.start_to) if args.start_to else None
+    except ValueError as e:
+        parser.error(str(e))
+    for r in registry.search(party=args.party, start_from=start_from, start_to=start_to, plan=args.plan):
+        print(f"{r['sha256']}  {r['format']:<4}  {r['plan']:<9}  {r['start_dt']}～{r['end_dt']}  {r['party_a']}")
+    return 0
+
+
+def _schedule_command(parser, args):
+    from datetime import date
+
+    from billing import billing_schedule, write_csv, write_ics
+
+    from batch import detect_format, iter_rows, parse_row
+
+    try:
+        start, end = date.fromisoformat(args.start_from), date.fromisoformat(args.start_to)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.rows:
+        with open(args.rows, encoding="utf-8-sig", newline="") as f:
+            raw = list(iter_rows(f, detect_format(args.rows)))
+    else:
+        from registry import get_registry
+
+        # 每份合約以 Word 版的紀錄為準（PDF 是同一份合約）；LIMIT -1 = 不限筆數
+        raw = [{**r, "payment_opt": r["plan"]} for r in get_registry().search(fmt="docx", limit=-1)]
+
+    # 同一份合約在不同條文版本下各有一筆紀錄，只收一次；無法解析的列（例如乙方設定已刪除）略過並列出
+    contracts, seen, skipped = [], set(), []
+    for row_no, r in enumerate(raw, start=1):
+        try:
+            c = parse_row(r)
+        except ValueError as e:
+            skipped.append((row_no, e))
+            continue
+        identity = (c["provider"], c["party_a"], c["payment_opt"], c["start_dt"], c["pay_day"], c["pay_dt"])
+        if identity not in seen:
+            seen.add(identity)
+            contracts.append(c)
+    for row_no, e in skipped:
+        print(f"第 {row_no} 筆略過：{e}", file=sys.stderr)
+
+    schedule = billing_schedule(contracts, start, end)
+    write = write_ics if args.ics else write_csv
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            write(schedule, f)
+        print(args.output)
+    else:
+        write(schedule, sys.stdout)
+    return 1 if skipped else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="廣告投放服務合約工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_render = sub.add_parser("render", help="產生單份合約（預設 Word，--pdf 輸出 PDF）")
+    _add_contract_args(p_render)
+    p_render.add_argument("-o", "--output", default=None, help="輸出路徑（預設：廣告投放合約_<甲方>_<啟動日>.docx）")
+    p_render.add_argument("--pdf", action="store_true", help="輸出 PDF（預設為 Word）")
+
+    p_msg = sub.add_parser("messages", help="只輸出給甲方的確認訊息與收款資訊")
+    _add_contract_args(p_msg)
+
+    sub.add_parser("batch", help="批次產生（參數同 batch.py）", add_help=False)
+    sub.add_parser("replies", help="第二階段回覆匯入與查詢（參數同 replies.py）", add_help=False)
+    sub.add_parser("archive", help="月結封存 ZIP（參數同 archive.py）", add_help=False)
+    sub.add_parser("providers", help="列出並檢查乙方設定（providers.py）", add_help=False)
+
+    p_search = sub.add_parser("search", help="查詢合約紀錄（registry）")
+    p_search.add_argument("--party", default=None, help="甲方名稱（部分比對）")
+    p_search.add_argument("--from", dest="start_from", default=None, help="啟動日起 YYYY-MM-DD")
+    p_search.add_argument("--to", dest="start_to", default=None, help="啟動日迄 YYYY-MM-DD")
+    p_search.add_argument("--plan", choices=["monthly", "quarterly"], default=None)
+
+    p_fetch = sub.add_parser("fetch", help="以內容雜湊取出已登錄的合約")
+    p_fetch.add_argument("sha256")
+    p_fetch.add_argument("-o", "--output", required=True)
+
+    p_schedule = sub.add_parser("schedule", help="收款排程（CSV，--ics 輸出行事曆）")
+    p_schedule.add_argument("rows", nargs="?", default=None, help="合約名單 CSV / JSON（預設取 registry 的所有合約）")
+    p_schedule.add_argument("--from", dest="start_from", required=True, help="區間起 YYYY-MM-DD")
+    p_schedule.add_argument("--to", dest="start_to", required=True, help="區間迄 YYYY-MM-DD")
+    p_schedule.add_argument("--ics", action="store_true", help="輸出 iCalendar（預設為 CSV）")
+    p_schedule.add_argument("-o", "--output", default=None, help="輸出路徑（預設印到標準輸出）")
+
+    args, rest = parser.parse_known_args(argv)
+
+    if args.command == "batch":
+        from batch import main as batch_main
+        return batch_main(rest)
+    if args.command == "replies":
+        from replies import main as replies_main
+        return replies_main(rest)
+    if args.command == "archive":
+        from archive import main as archive_main
+        return archive_main(rest)
+    if args.command == "providers":
+        from providers import main as providers_main
+        return providers_main(rest)
+    if rest:
+        parser.error(f"無法辨識的參數：{' '.join(rest)}")
+    if args.command in ("search", "fetch"):
+        return _registry_command(parser, args)
+    if args.command == "schedule":
+        return _schedule_command(parser, args)
+
+    try:
+        kwargs = _contract_kwargs(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.command == "messages":
+        print(build_client_message(**kwargs))
+        print(build_payment_message(kwargs["provider"]))
+        return 0
+
+    if args.pdf:
+        from contract_pdf import generate_pdf_bytes
+        render, ext = generate_pdf_bytes, "pdf"
+    else:
+        render, ext = generate_docx_bytes, "docx"
+
+    from registry import get_registry
+
+    # 與網頁、批次相同：已登錄過的合約直接取回，新生成的登錄進 registry（之後可 search / fetch）
+    data = get_registry().get_or_render(ext, render, **kwargs)
+    output = args.output or f"廣告投放合約_{safe_filename(kwargs['party_a'])}_{kwargs['start_dt'].strftime('%Y%m%d')}.{ext}"
+    with open(output, "wb") as f:
+        f.write(data)
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
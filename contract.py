@@ -0,0 +1,492 @@
+"""合約產生核心（不依賴 Streamlit，可供批次、CLI 與其他服務匯入）
+
+匯入本模組沒有任何 UI 副作用；python-docx 只在真正生成 Word 時才載入。
+"""
+import base64
+import io
+import json
+import os
+import zipfile
+import zlib
+from collections.abc import Mapping
+from datetime import date, timedelta
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+import metrics
+from clauses import (  # noqa: F401  PAYMENT_OPTIONS 與佔位字串沿用 contract 匯入
+    PAYMENT_OPTIONS,
+    PLAN_CODES,
+    _SLOT_TOKENS,
+    _TOKEN_KEYS,
+    _TOKEN_RE,
+)
+from providers import get_provider
+
+# =========================================================
+# 0) 基礎設定
+# =========================================================
+# Word 骨架、HTML 預覽等範本快取最多保留的（乙方, 付款方案）組數；乙方設定更新後舊版本依 LRU 淘汰
+TEMPLATE_CACHE_SIZE = 64
+
+# =========================================================
+# 1) Word 樣式（強制微軟正黑體）
+# =========================================================
+FONT_NAME = "Microsoft JhengHei"
+BODY_SIZE = 12
+LINE_SPACING = 1.5  # 行距（倍數）
+
+# 合約內容的樣式 → (Word 樣式名稱, 字級, 粗體, 左縮排 cm, 置中)；body / blank 直接用 Normal
+# 字型、字級與行距全部定義在樣式裡，段落只引用樣式，run 不帶任何格式
+CONTRACT_STYLES = {
+    "title": ("Contract Title", 18, True, None, True),
+    "parties": ("Contract Parties", 12, True, None, False),
+    "heading": ("Clause Heading", 12, True, None, False),
+    "item": ("Clause Item", 12, False, 0.75, False),
+    "subheading": ("Clause Subheading", 12, True, 0.75, False),
+    "subitem": ("Indented Item", 12, False, 1.5, False),
+    "signature": ("Signature Cell", 12, False, None, False),
+}
+
+
+def style_id(name):
+    """python-docx 由樣式名稱產生的 styleId（去掉空白）"""
+    return name.replace(" ", "")
+
+
+
+def _define_styles(doc):
+    """Normal 帶字型／字級／行距，其餘樣式繼承 Normal，只寫差異"""
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    from docx.shared import Cm, Pt
+
+    normal = doc.styles["Normal"]
+    normal.paragraph_format.line_spacing = LINE_SPACING
+    normal.font.name = FONT_NAME
+    normal.font.size = Pt(BODY_SIZE)
+    normal.element.rPr.rFonts.set(qn("w:eastAsia"), FONT_NAME)
+
+    for name, size, bold, indent, center in CONTRACT_STYLES.values():
+        style = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+        style.base_style = normal
+        style.quick_style = True
+        if size != BODY_SIZE:
+            style.font.size = Pt(size)
+        if bold:
+            style.font.bold = True
+        if indent is not None:
+            style.paragraph_format.left_indent = Cm(indent)
+        if center:
+            style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+# =========================================================
+# 2) 合約內容與 Word 生成
+# =========================================================
+def contract_end_date(payment_opt, start_dt):
+    """合約首期屆滿日：月付 30 天、季付 90 天"""
+    if PLAN_CODES[payment_opt] == "monthly":
+        return start_dt + timedelta(days=30)
+    return start_dt + timedelta(days=90)
+
+
+def _contract_slots(party_a, payment_opt, start_dt, pay_day, pay_dt):
+    """整理每份合約會變動的欄位（皆為已格式化字串）"""
+    return {
+        "party_a": party_a,
+        "start": start_dt.strftime('%Y 年 %m 月 %d 日'),
+        "end": contract_end_date(payment_opt, start_dt).strftime('%Y 年 %m 月 %d 日'),
+        "pay_day": f"{pay_day}",
+        "pay_date": pay_dt.strftime('%Y 年 %m 月 %d 日') if pay_dt is not None else "",
+    }
+
+
+def _fill(content, slots):
+    if isinstance(content, str):
+        return content
+    # 偶數位置是固定文字、奇數位置是欄位名稱
+    return "".join(segment if i % 2 == 0 else slots[segment] for i, segment in enumerate(content))
+
+
+def contract_blocks(payment_opt, slots, provider=None):
+    """合約內容模型：依序回傳 (樣式, 內容)，Word / PDF 等輸出共用同一份條文
+
+    樣式：title / blank / parties（多段粗體）/ body / heading / item / subheading /
+    subitem / signature（甲、乙方兩欄文字）
+    provider 為乙方代號或 providers.Provider（None＝預設乙方）；條文取自該乙方編譯好的範本。
+    """
+    return [
+        (kind, tuple(_fill(t, slots) for t in content) if kind in ("parties", "signature") else _fill(content, slots))
+        for kind, content in get_provider(provider).template(payment_opt)
+    ]
+
+
+def _build_contract_doc(payment_opt, slots, provider=None):
+    from docx import Document
+
+    doc = Document()
+    _define_styles(doc)
+
+    for kind, content in contract_blocks(payment_opt, slots, provider):
+        if kind == "signature":
+            table = doc.add_table(rows=1, cols=2)
+            table.autofit = False
+            for cell, text in zip(table.rows[0].cells, content):
+                paragraph = cell.paragraphs[0]
+                paragraph.style = doc.styles[CONTRACT_STYLES["signature"][0]]
+                paragraph.add_run(text)
+            continue
+
+        p = doc.add_paragraph(style=CONTRACT_STYLES[kind][0] if kind in CONTRACT_STYLES else None)
+        if kind == "blank":
+            continue
+        for text in (content if kind == "parties" else (content,)):
+            p.add_run(text)
+
+    return doc
+
+
+def _contract_skeleton(payment_opt, provider=None):
+    """合約骨架：每個（乙方設定版本, 付款方案）只建一次，變動欄位先放佔位字串"""
+    return _skeleton(payment_opt, get_provider(provider))
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _skeleton(payment_opt, provider):
+    with metrics.stage("skeleton_build"):
+        return _docx_parts(_build_contract_doc(payment_opt, _SLOT_TOKENS, provider))
+
+
+def _docx_parts(doc):
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    with zipfile.ZipFile(buffer) as zf:
+        return tuple((info.filename, zf.read(info.filename)) for info in zf.infolist())
+
+
+# ZIP 內每個檔案的時間固定（core.xml 的時間本來就沿用範本的固定值），
+# 相同輸入一定產生相同位元組，方便以內容雜湊去重（見 registry.py）
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def _write_docx(parts):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, blob in parts:
+            info = zipfile.ZipInfo(name, date_time=_ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, blob)
+    return buffer.getvalue()
+
+
+# Word 生成方式：stream = docx_writer 直接寫 XML（預設）；python-docx = 骨架＋佔位字串替換
+DOCX_ENGINE = os.environ.get("CONTRACT_DOCX_ENGINE", "stream")
+
+
+def _slot_is_patchable(value):
+    # 含換行/Tab 或頭尾空白時，python-docx 會產生不同的 XML 結構，改走完整生成
+    return bool(value) and value == value.strip() and value.isprintable()
+
+
+def generate_docx_bytes(party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+    """provider 為乙方代號或 providers.Provider（None＝預設乙方），其餘輸出函式同"""
+    metrics.inc("contracts_generated_total")
+    provider = get_provider(provider)
+
+    if DOCX_ENGINE == "stream":
+        from docx_writer import stream_docx_bytes
+
+        with metrics.stage("docx_stream"):
+            return stream_docx_bytes(party_a, payment_opt, start_dt, pay_day, pay_dt, provider)
+    return python_docx_bytes(party_a, payment_opt, start_dt, pay_day, pay_dt, provider)
+
+
+def python_docx_bytes(party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+    """以 python-docx 生成（骨架＋佔位字串替換，無法替換時完整生成）"""
+    provider = get_provider(provider)
+    slots = _contract_slots(party_a, payment_opt, start_dt, pay_day, pay_dt)
+
+    if not _slot_is_patchable(slots["party_a"]):
+        with metrics.stage("docx_full_build"):
+            parts = _docx_parts(_build_contract_doc(payment_opt, slots, provider))
+        with metrics.stage("docx_serialize"):
+            return _write_docx(parts)
+
+    skeleton = _contract_skeleton(payment_opt, provider)
+
+    def patched():
+        for name, blob in skeleton:
+            if name == "word/document.xml":
+                # 一次替換所有佔位字串：填入的文字不會再被掃描（甲方名稱含 {{END}} 之類也照原樣輸出）
+                text = _TOKEN_RE.sub(lambda m: escape(slots[_TOKEN_KEYS[m.group()]]), blob.decode("utf-8"))
+                blob = text.encode("utf-8")
+            yield name, blob
+
+    with metrics.stage("docx_serialize"):
+        return _write_docx(patched())
+
+# =========================================================
+# 3) 給甲方的訊息
+# =========================================================
+def build_client_message(party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+    provider = get_provider(provider)
+    if PLAN_CODES[payment_opt] == "monthly":
+        return f"""【合約確認】
+甲方：{party_a}
+乙方：{provider.name}
+方案：{provider.plan_summary(payment_opt)}
+啟動：{start_dt.strftime('%Y-%m-%d')}
+付款：每月 {pay_day} 日
+"""
+    return f"""【合約確認】
+甲方：{party_a}
+乙方：{provider.name}
+方案：{provider.plan_summary(payment_opt)}
+啟動：{start_dt.strftime('%Y-%m-%d')}
+付款：{pay_dt.strftime('%Y-%m-%d')} 前
+"""
+
+
+def build_payment_message(provider=None):
+    provider = get_provider(provider)
+    return f"""【收款資訊】
+銀行：{provider.bank_name}（{provider.bank_code}）
+帳號：{provider.account_number}
+"""
+
+# =========================================================
+# 4) 第二階段：備份碼與回傳內容
+# =========================================================
+PHASE2_CHECK_KEYS = ["ad_account", "pixel", "fanpage", "bm"]
+PHASE2_DATA_KEYS = [
+    "fanpage_url",
+    "landing_url",
+    "comp1",
+    "comp2",
+    "comp3",
+    "who_problem",
+    "what_problem",
+    "how_solve",
+    "budget",
+]
+PHASE2_DEFAULTS = {
+    **{k: False for k in PHASE2_CHECK_KEYS},
+    **{k: "" for k in PHASE2_DATA_KEYS},
+}
+
+
+# 備份碼：BACKUP_PREFIX ＋ base64url（無 padding）編碼的
+#   [格式旗標 1 byte][內容][CRC-32 4 bytes，big-endian，涵蓋旗標＋內容]
+# 內容為 UTF-8 JSON 陣列 [勾選位元遮罩, 各 PHASE2_DATA_KEYS 文字…]；壓縮後較短時以 raw deflate 存放。
+# 備份碼中間被換行或空白切開（記事本自動換行、LINE 轉貼）也能還原。
+BACKUP_PREFIX = "P2B1:"
+_BACKUP_RAW, _BACKUP_DEFLATE = 0, 1
+
+
+def encode_backup(state):
+    """state：含第二階段欄位的 dict（或 session_state）→ 單行備份碼"""
+    mask = sum(1 << i for i, k in enumerate(PHASE2_CHECK_KEYS) if state[k])
+    payload = json.dumps(
+        [mask, *(str(state[k]) for k in PHASE2_DATA_KEYS)], ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    deflated = compressor.compress(payload) + compressor.flush()
+    body = bytes([_BACKUP_DEFLATE]) + deflated if len(deflated) < len(payload) else bytes([_BACKUP_RAW]) + payload
+    token = base64.urlsafe_b64encode(body + zlib.crc32(body).to_bytes(4, "big")).rstrip(b"=")
+    return BACKUP_PREFIX + token.decode("ascii")
+
+
+def decode_backup(token):
+    """備份碼 → 第二階段欄位的 dict（所有欄位都有值）；格式、版本或檢查碼不符時丟出 ValueError"""
+    token = "".join(token.split())
+    if not token.startswith(BACKUP_PREFIX):
+        version = token.split(":", 1)[0] if ":" in token[:8] else ""
+        raise ValueError(f"不支援的備份碼版本：{version}" if version.startswith("P2B") else "不是備份碼")
+    data = token[len(BACKUP_PREFIX):]
+    try:
+        raw = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    except ValueError:
+        raise ValueError("備份碼含有無效字元（可能複製不完整）") from None
+    if len(raw) < 5 or zlib.crc32(raw[:-4]).to_bytes(4, "big") != raw[-4:]:
+        raise ValueError("備份碼檢查碼不符（可能複製不完整或被修改）")
+    flag, content = raw[0], raw[1:-4]
+    try:
+        if flag == _BACKUP_DEFLATE:
+            content = zlib.decompress(content, -15)
+        elif flag != _BACKUP_RAW:
+            raise ValueError
+        values = json.loads(content.decode("utf-8"))
+    except (ValueError, zlib.error):
+        raise ValueError("備份碼內容無法解析") from None
+    if (
+        not isinstance(values, list)
+        or len(values) != 1 + len(PHASE2_DATA_KEYS)
+        or not isinstance(values[0], int)
+        or not all(isinstance(v, str) for v in values[1:])
+    ):
+        raise ValueError("備份碼內容無法解析")
+    mask = values[0]
+    return {
+        **{k: bool(mask >> i & 1) for i, k in enumerate(PHASE2_CHECK_KEYS)},
+        **dict(zip(PHASE2_DATA_KEYS, values[1:])),
+    }
+
+
+def build_backup_text(state):
+    """state：含第二階段欄位的 dict（或 session_state）"""
+    return encode_backup(state)
+
+
+def _parse_legacy_backup(text):
+    # 舊版 [CHECK] / [DATA] 的 key=value 格式：只有勾選欄位把 0 / 1 轉成 bool；
+    # 文字欄位的多行內容在舊格式中是接續的行（沒有已知 key=），併回上一個文字欄位
+    restored = {}
+    current = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped in ("[CHECK]", "[DATA]"):
+            current = None
+            continue
+        if current is None and stripped.startswith("#"):
+            continue
+        k, sep, v = stripped.partition("=")
+        k = k.strip()
+        if sep and k in PHASE2_DEFAULTS:
+            if k in PHASE2_CHECK_KEYS:
+                restored[k] = v.strip() == "1"
+                current = None
+            else:
+                restored[k] = v.strip()
+                current = k
+        elif current is not None:
+            restored[current] += "\n" + line.rstrip()
+    for k in PHASE2_DATA_KEYS:
+        if k in restored:
+            restored[k] = restored[k].strip()
+    return restored
+
+
+def parse_backup_text(text):
+    """解析備份內容，回傳第二階段欄位的 dict
+
+    以 BACKUP_PREFIX 開頭時為新版備份碼（檢查碼不符時丟出 ValueError）；
+    否則視為舊版 key=value 格式（忽略 [CHECK]/[DATA] 標頭與未知欄位，只回傳有出現的欄位）。
+    """
+    text = (text or "").strip()
+    if not text:
+        return {}
+    if "".join(text[:16].split()).startswith(BACKUP_PREFIX[:3]):
+        return decode_backup(text)
+    return _parse_legacy_backup(text)
+
+
+def _filled(x):
+    return x if str(x).strip() else "（未填）"
+
+
+def _status(v):
+    return "✅ 已完成" if v else "⬜ 未完成"
+
+
+def build_reply_text(state, party_a, provider=None):
+    return f"""請直接複製以下內容，使用 LINE 回傳給我（{get_provider(provider).name}）：
+
+【第二階段啟動資料】
+甲方：{party_a}
+
+【確認事項】
+- 廣告帳號：{_status(state["ad_account"])}
+- 像素事件：{_status(state["pixel"])}
+- 粉專：{_status(state["fanpage"])}
+- BM：{_status(state["bm"])}
+
+【資料】
+- 粉專網址：{_filled(state["fanpage_url"])}
+- 導向頁：{_filled(state["landing_url"])}
+
+【競品】
+1) {_filled(state["comp1"])}
+2) {_filled(state["comp2"])}
+3) {_filled(state["comp3"])}
+
+【定位】
+- 對象：{_filled(state["who_problem"])}
+- 問題：{_filled(state["what_problem"])}
+- 解法：{_filled(state["how_solve"])}
+
+【首月預算】
+- {_filled(state["budget"])}
+"""
+
+# =========================================================
+# 5) 外部輸入解析（CSV / JSON / CLI）
+# =========================================================
+_PAYMENT_ALIASES = {
+    "monthly": PAYMENT_OPTIONS[0],
+    "月付": PAYMENT_OPTIONS[0],
+    "17000": PAYMENT_OPTIONS[0],
+    "quarterly": PAYMENT_OPTIONS[1],
+    "季付": PAYMENT_OPTIONS[1],
+    "45000": PAYMENT_OPTIONS[1],
+}
+
+
+def _parse_date(value, field):
+    value = str(value or "").strip().replace("/", "-")
+    if not value:
+        raise ValueError(f"缺少 {field}")
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{field} 日期格式錯誤：{value}") from None
+
+
+def parse_contract_row(row, provider=None):
+    """把一筆原始資料轉成 generate_docx_bytes 的參數；格式錯誤時丟出 ValueError
+
+    provider 欄位為乙方代號（providers/<代號>.toml），該筆沒有填時用參數 provider（None＝預設乙方）。
+    """
+    if not isinstance(row, Mapping):
+        raise ValueError(f"每筆資料需為物件（欄位名稱: 值）：{str(row)[:40]}")
+    party_a = str(row.get("party_a") or "").strip()
+    if not party_a:
+        raise ValueError("缺少 party_a")
+
+    raw_opt = str(row.get("payment_opt") or "").strip()
+    payment_opt = raw_opt if raw_opt in PAYMENT_OPTIONS else _PAYMENT_ALIASES.get(raw_opt.lower().replace(",", ""))
+    if payment_opt is None:
+        raise ValueError(f"無法辨識 payment_opt：{raw_opt}")
+
+    start_dt = _parse_date(row.get("start_dt"), "start_dt")
+    pay_day = None
+    pay_dt = None
+    if payment_opt == PAYMENT_OPTIONS[0]:
+        try:
+            pay_day = int(str(row.get("pay_day") or "").strip())
+        except ValueError:
+            raise ValueError(f"pay_day 需為 1～28 的整數：{row.get('pay_day')}") from None
+        if not 1 <= pay_day <= 28:
+            raise ValueError(f"pay_day 需為 1～28 的整數：{pay_day}")
+    else:
+        pay_dt = _parse_date(row.get("pay_dt"), "pay_dt")
+        if pay_dt > start_dt:
+            raise ValueError("pay_dt 不可晚於 start_dt")
+
+    provider = str(row.get("provider") or "").strip() or provider
+    if provider is not None:
+        provider = get_provider(provider).id
+
+    return {
+        "party_a": party_a,
+        "payment_opt": payment_opt,
+        "start_dt": start_dt,
+        "pay_day": pay_day,
+        "pay_dt": pay_dt,
+        "provider": provider,
+    }
+
+
+def safe_filename(text):
+    """甲方名稱等外部輸入 → 可用於檔名與 ZIP 內路徑的字串（路徑與保留字元、換行等不可列印字元換成 _）"""
+    return "".join("_" if c in '\\/:*?"<>|' or not c.isprintable() else c for c in text).strip() or "_"
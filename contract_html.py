@@ -0,0 +1,96 @@
+"""合約 HTML 預覽（頁面內即時顯示），條文與 Word / PDF 版共用 contract.contract_blocks
+
+每個（乙方設定版本, 付款方案）只把條文轉成 HTML 一次：變動欄位先放佔位字串（同 Word 骨架的 _SLOT_TOKENS），
+再切成「固定片段＋欄位名稱」的序列；之後每次輸入變動只跳脫、串接變動欄位，
+不重建條文也不生成 .docx。樣式取自 CONTRACT_STYLES，與 Word 版的字級、粗體、縮排、置中一致。
+"""
+from functools import lru_cache
+from html import escape
+
+import metrics
+from contract import (
+    BODY_SIZE,
+    CONTRACT_STYLES,
+    LINE_SPACING,
+    FONT_NAME,
+    TEMPLATE_CACHE_SIZE,
+    _SLOT_TOKENS,
+    _TOKEN_KEYS,
+    _TOKEN_RE,
+    _contract_slots,
+    contract_blocks,
+)
+from providers import get_provider
+
+
+def _css():
+    # 換行、頭尾空白照原文顯示（pre-wrap），與 Word 版的 run 文字一致
+    rules = [
+        f".contract-preview {{font-family: '{FONT_NAME}', 'PingFang TC', 'Noto Sans TC', sans-serif;"
+        f" font-size: {BODY_SIZE}pt; line-height: {LINE_SPACING}; color: #222; background: #fff;"
+        " padding: 2em 2.5em; border: 1px solid #ddd; border-radius: 4px}",
+        f".contract-preview p {{margin: 0; white-space: pre-wrap; min-height: {LINE_SPACING}em}}",
+        ".contract-preview table {width: 100%; table-layout: fixed; border-collapse: collapse}",
+        ".contract-preview td {vertical-align: top; padding: 0; border: none}",
+    ]
+    for kind, (_, size, bold, indent, center) in CONTRACT_STYLES.items():
+        props = [f"font-size: {size}pt"] if size != BODY_SIZE else []
+        if bold:
+            props.append("font-weight: bold")
+        if indent is not None:
+            props.append(f"margin-left: {indent}cm")
+        if center:
+            props.append("text-align: center")
+        if props:
+            rules.append(f".contract-preview .{kind} {{{'; '.join(props)}}}")
+    return "\n".join(rules)
+
+
+def _paragraph(kind, text):
+    return f'<p class="{kind}">{escape(text, quote=False)}</p>'
+
+
+def _blocks_html(payment_opt, slots, provider):
+    parts = [f"<style>{_css()}</style>", '<div class="contract-preview">']
+    for kind, content in contract_blocks(payment_opt, slots, provider):
+        if kind == "blank":
+            parts.append('<p class="blank"></p>')
+        elif kind == "signature":
+            cells = "".join(f"<td>{_paragraph(kind, text)}</td>" for text in content)
+            parts.append(f"<table><tr>{cells}</tr></table>")
+        else:
+            parts.append(_paragraph(kind, "".join(content) if kind == "parties" else content))
+    parts.append("</div>")
+    return "".join(parts)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _template(payment_opt, provider):
+    """(固定 HTML 片段, 欄位名稱, 固定 HTML 片段, …)；欄位位置為 slots 的 key"""
+    with metrics.stage("preview_template_build"):
+        html = _blocks_html(payment_opt, _SLOT_TOKENS, provider)
+        segments = []
+        last = 0
+        for m in _TOKEN_RE.finditer(html):
+            segments.append(html[last:m.start()])
+            segments.append(_TOKEN_KEYS[m.group()])
+            last = m.end()
+        segments.append(html[last:])
+        return tuple(segments)
+
+
+def render_preview_html(party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+    """合約的 HTML（含 <style>），可直接交給 st.html；參數同 generate_docx_bytes"""
+    # 先換成目前版本的 Provider 再查快取：乙方設定更新後不會拿到舊條文
+    return _preview_html(party_a, payment_opt, start_dt, pay_day, pay_dt, get_provider(provider))
+
+
+@lru_cache(maxsize=256)
+def _preview_html(party_a, payment_opt, start_dt, pay_day, pay_dt, provider):
+    slots = _contract_slots(party_a, payment_opt, start_dt, pay_day, pay_dt)
+    segments = _template(payment_opt, provider)
+    # 偶數位置是固定片段、奇數位置是欄位名稱
+    return "".join(
+        segment if i % 2 == 0 else escape(slots[segment], quote=False)
+        for i, segment in enumerate(segments)
+    )
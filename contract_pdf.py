@@ -0,0 +1,150 @@
+"""合約 PDF 輸出（reportlab），條文與 Word 版共用 contract.contract_blocks，樣式共用 CONTRACT_STYLES
+
+字型：fonts/ 內的 .ttf / .ttc 於每個行程只註冊一次，輸出時只嵌入用到的字（子集）。
+檔名含 bold / Bold 的視為粗體；fonts/ 為空時退回 reportlab 內建的繁中 CID 字型（不嵌入，於 stderr 提醒一次）。
+沒有粗體字重時（退回字型，或 fonts/ 只有一般字型），粗體段落以描邊加粗（PDF 文字繪製模式 2）。
+"""
+import io
+import os
+import sys
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+import metrics
+from contract import BODY_SIZE, CONTRACT_STYLES, LINE_SPACING, _contract_slots, contract_blocks
+from providers import get_provider
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+FALLBACK_CID_FONT = "MSung-Light"
+FAUX_BOLD_STROKE = 0.03  # 描邊加粗的線寬（字級的倍數）
+
+
+@lru_cache(maxsize=None)
+def register_fonts(fonts_dir=FONTS_DIR):
+    """註冊字型並回傳 (一般字型名稱, 粗體字型名稱)；沒有粗體字重時粗體為 None"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    try:
+        files = sorted(f for f in os.listdir(fonts_dir) if f.lower().endswith((".ttf", ".ttc")))
+    except FileNotFoundError:
+        files = []
+
+    regular = bold = None
+    for filename in files:
+        is_bold = "bold" in filename.lower()
+        if (bold if is_bold else regular) is not None:
+            continue
+        name = f"Contract-{'Bold' if is_bold else 'Regular'}"
+        path = os.path.join(fonts_dir, filename)
+        if filename.lower().endswith(".ttc"):
+            pdfmetrics.registerFont(TTFont(name, path, subfontIndex=0))
+        else:
+            pdfmetrics.registerFont(TTFont(name, path))
+        if is_bold:
+            bold = name
+        else:
+            regular = name
+
+    if regular is None and bold is None:
+        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+        pdfmetrics.registerFont(UnicodeCIDFont(FALLBACK_CID_FONT))
+        return FALLBACK_CID_FONT, None
+    return regular or bold, bold
+
+
+@lru_cache(maxsize=None)
+def _faux_bold_paragraph():
+    """沒有粗體字重時的粗體段落：文字同時填滿與描邊（Tr 2），以字級 × FAUX_BOLD_STROKE 的線寬加粗"""
+    from reportlab.platypus import Paragraph
+
+    class FauxBoldParagraph(Paragraph):
+        def draw(self):
+            self.canv.saveState()
+            self.canv.setLineWidth(self.style.fontSize * FAUX_BOLD_STROKE)
+            self.canv.addLiteral("2 Tr")
+            super().draw()
+            self.canv.restoreState()
+
+    return FauxBoldParagraph
+
+
+@lru_cache(maxsize=None)
+def _paragraph_styles():
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import cm
+
+    regular, bold_font = register_fonts()
+    if regular == FALLBACK_CID_FONT:
+        # 每個行程第一次輸出 PDF 時提醒一次（只產 Word 的批次不會出現）
+        print(f"[contract_pdf] {FONTS_DIR} 沒有 .ttf / .ttc，改用內建 {FALLBACK_CID_FONT}："
+              "PDF 不嵌入字型，顯示取決於閱讀器；粗體以描邊代替", file=sys.stderr)
+
+    # 字級、粗體、縮排、置中取自 CONTRACT_STYLES，與 Word 版、HTML 預覽一致；
+    # Word 的行距倍數以單行高（約 1.2 倍字級）為基準，換算成 reportlab 的 leading
+    # 沒有粗體字重時粗體樣式仍用一般字型，fauxBold 標記交給 _paragraph 描邊加粗
+    def style(name, size=BODY_SIZE, bold=False, indent=None, center=False):
+        result = ParagraphStyle(
+            name, fontName=(bold and bold_font) or regular, fontSize=size, leading=size * LINE_SPACING * 1.2,
+            leftIndent=(indent or 0) * cm, wordWrap="CJK", alignment=TA_CENTER if center else TA_LEFT,
+        )
+        result.fauxBold = bold and bold_font is None
+        return result
+
+    styles = {"body": style("body"), "blank": style("blank")}
+    for kind, (_, size, bold, indent, center) in CONTRACT_STYLES.items():
+        styles[kind] = style(kind, size, bold, indent, center)
+    return styles
+
+
+def _markup(text):
+    return escape(text).replace("\n", "<br/>")
+
+
+def _paragraph(text, style):
+    from reportlab.platypus import Paragraph
+
+    cls = _faux_bold_paragraph() if style.fauxBold else Paragraph
+    return cls(_markup(text), style)
+
+
+def generate_pdf_bytes(party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Spacer, Table, TableStyle
+
+    provider = get_provider(provider)
+    styles = _paragraph_styles()
+    slots = _contract_slots(party_a, payment_opt, start_dt, pay_day, pay_dt)
+
+    story = []
+    for kind, content in contract_blocks(payment_opt, slots, provider):
+        style = styles[kind]
+        if kind == "blank":
+            story.append(Spacer(1, style.leading))
+        elif kind == "signature":
+            table = Table([[_paragraph(text, style) for text in content]], colWidths=["50%", "50%"])
+            table.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP")]))
+            story.append(table)
+        elif kind == "parties":
+            story.append(_paragraph("".join(content), style))
+        else:
+            story.append(_paragraph(content, style))
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=2.54 * cm,
+        rightMargin=2.54 * cm,
+        topMargin=2.54 * cm,
+        bottomMargin=2.54 * cm,
+        title=provider.title,
+        author=provider.name,
+        invariant=True,  # 不寫入產生時間與隨機 ID，相同輸入產生相同位元組
+    )
+    with metrics.stage("pdf_build"):
+        doc.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,194 @@
+"""直接串流寫出 Word 合約（不經 python-docx 物件模型）
+
+- word/document.xml 由 contract_blocks() 直接組成 XML 字串，邊壓縮邊寫進 ZIP（data descriptor，
+  不需事先知道大小），不建立任何 lxml 物件；格式全在 styles.xml，段落只引用樣式 ID
+- 其餘檔案（styles.xml、theme 等）取自合約骨架，行程內只壓縮一次，之後原封不動複製壓縮後的位元組
+- 產出的 XML 與 python-docx 版（contract._build_contract_doc）結構相同，
+  比對見 benchmarks/docx_writer.py
+
+ZIP 內的時間固定為 1980-01-01，相同輸入一定產生相同位元組。
+"""
+import io
+import struct
+import zlib
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+import metrics
+from contract import CONTRACT_STYLES, PAYMENT_OPTIONS, _contract_skeleton, _contract_slots, contract_blocks, style_id
+
+_STYLE_IDS = {kind: style_id(name) for kind, (name, *_) in CONTRACT_STYLES.items()}
+_CELL_WIDTH = 4320  # 版面寬 8640 twips 平分兩欄
+
+_DOS_DATE, _DOS_TIME = (0 << 9) | (1 << 5) | 1, 0  # 1980-01-01 00:00:00
+_FLAG_DATA_DESCRIPTOR = 0x08
+_DEFLATED = 8
+
+
+def _run(text):
+    """與 python-docx 的 run.text 相同規則：\\t → <w:tab/>，\\n / \\r → <w:br/>，頭尾有空白時保留空白"""
+    out = ["<w:r>"]
+    buffer = []
+
+    def flush():
+        if buffer:
+            chunk = "".join(buffer)
+            buffer.clear()
+            space = ' xml:space="preserve"' if len(chunk.strip()) < len(chunk) else ""
+            out.append(f"<w:t{space}>{escape(chunk)}</w:t>")
+
+    for char in text:
+        if char == "\t":
+            flush()
+            out.append("<w:tab/>")
+        elif char in "\r\n":
+            flush()
+            out.append("<w:br/>")
+        elif char < " ":
+            raise ValueError(f"文字含有 XML 不允許的控制字元：{char!r}")
+        else:
+            buffer.append(char)
+    flush()
+    out.append("</w:r>")
+    return "".join(out)
+
+
+def _paragraph(kind, runs):
+    props = f'<w:pPr><w:pStyle w:val="{_STYLE_IDS[kind]}"/></w:pPr>' if kind in _STYLE_IDS else ""
+    return f"<w:p>{props}{''.join(_run(text) for text in runs)}</w:p>"
+
+
+def _body_chunks(payment_opt, slots, provider):
+    for kind, content in contract_blocks(payment_opt, slots, provider):
+        if kind == "blank":
+            yield "<w:p/>"
+        elif kind == "signature":
+            yield (
+                '<w:tbl><w:tblPr><w:tblW w:type="auto" w:w="0"/><w:tblLayout w:type="fixed"/>'
+                '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0"'
+                ' w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+                f'<w:tblGrid><w:gridCol w:w="{_CELL_WIDTH}"/><w:gridCol w:w="{_CELL_WIDTH}"/></w:tblGrid><w:tr>'
+            )
+            for text in content:
+                yield f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{_CELL_WIDTH}"/></w:tcPr>{_paragraph(kind, (text,))}</w:tc>'
+            yield "</w:tr></w:tbl>"
+        else:
+            yield _paragraph(kind, content if kind == "parties" else (content,))
+
+
+class _StaticPart:
+    __slots__ = ("name", "crc", "size", "deflated")
+
+    def __init__(self, name, data):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+        self.name = name.encode("ascii")
+        self.crc = zlib.crc32(data)
+        self.size = len(data)
+        self.deflated = compressor.compress(data) + compressor.flush()
+
+
+@lru_cache(maxsize=None)
+def _template():
+    """(document.xml 前段, document.xml 後段, 各檔案)；document.xml 的位置以 None 表示
+
+    document.xml 以外的檔案（樣式、佈景主題等）與乙方無關，所有乙方共用預設乙方的骨架。
+    """
+    with metrics.stage("docx_template_build"):
+        parts = []
+        head = tail = None
+        for name, blob in _contract_skeleton(PAYMENT_OPTIONS[0]):
+            if name == "word/document.xml":
+                xml = blob.decode("utf-8")
+                head = xml[: xml.index("<w:body>") + len("<w:body>")]
+                tail = xml[xml.index("<w:sectPr"):]
+                parts.append(None)
+            else:
+                parts.append(_StaticPart(name, blob))
+        return head, tail, tuple(parts)
+
+
+class _ZipStream:
+    """只寫不讀的最小 ZIP 寫入器（deflate、固定時間），可直接寫入不可 seek 的串流"""
+
+    def __init__(self, out):
+        self._out = out
+        self._offset = 0
+        self._central = []
+
+    def _write(self, data):
+        self._out.write(data)
+        self._offset += len(data)
+
+    def _entry(self, name, flags, crc, csize, size, offset):
+        self._central.append(struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014B50, 20, 20, flags, _DEFLATED, _DOS_TIME, _DOS_DATE,
+            crc, csize, size, len(name), 0, 0, 0, 0, 0, offset,
+        ) + name)
+
+    def add_precompressed(self, part):
+        offset = self._offset
+        self._write(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, 20, 0, _DEFLATED, _DOS_TIME, _DOS_DATE,
+            part.crc, len(part.deflated), part.size, len(part.name), 0,
+        ) + part.name)
+        self._write(part.deflated)
+        self._entry(part.name, 0, part.crc, len(part.deflated), part.size, offset)
+
+    def add_stream(self, name, chunks):
+        """chunks 為 bytes 片段；邊壓縮邊寫出，大小與 CRC 寫在檔案後的 data descriptor"""
+        name = name.encode("ascii")
+        offset = self._offset
+        self._write(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, 20, _FLAG_DATA_DESCRIPTOR, _DEFLATED, _DOS_TIME, _DOS_DATE,
+            0, 0, 0, len(name), 0,
+        ) + name)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        crc = size = csize = 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            data = compressor.compress(chunk)
+            csize += len(data)
+            self._write(data)
+        data = compressor.flush()
+        csize += len(data)
+        self._write(data)
+        self._write(struct.pack("<IIII", 0x08074B50, crc, csize, size))
+        self._entry(name, _FLAG_DATA_DESCRIPTOR, crc, csize, size, offset)
+
+    def close(self):
+        start = self._offset
+        for entry in self._central:
+            self._write(entry)
+        self._write(struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, len(self._central), len(self._central),
+            self._offset - start, start, 0,
+        ))
+
+
+def document_xml_chunks(payment_opt, slots, provider=None):
+    """word/document.xml 的內容（UTF-8 片段）"""
+    head, tail, _ = _template()
+    yield head.encode("utf-8")
+    for chunk in _body_chunks(payment_opt, slots, provider):
+        yield chunk.encode("utf-8")
+    yield tail.encode("utf-8")
+
+
+def write_docx(out, party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+    """把合約 .docx 寫進 out（任何有 write() 的二進位串流）；provider 同 contract.generate_docx_bytes"""
+    slots = _contract_slots(party_a, payment_opt, start_dt, pay_day, pay_dt)
+    _, _, parts = _template()
+    zf = _ZipStream(out)
+    for part in parts:
+        if part is None:
+            zf.add_stream("word/document.xml", document_xml_chunks(payment_opt, slots, provider))
+        else:
+            zf.add_precompressed(part)
+    zf.close()
+
+
+def stream_docx_bytes(party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+    buffer = io.BytesIO()
+    write_docx(buffer, party_a, payment_opt, start_dt, pay_day, pay_dt, provider)
+    return buffer.getvalue()
@@ -0,0 +1,150 @@
+"""第二階段草稿的伺服器端暫存（SQLite，WAL 模式）
+
+- 每份草稿以短代碼（resume token）為主鍵，還原只需一次主鍵查詢
+- save() 只把資料放進記憶體待寫區；背景執行緒在最後一次變更後停頓 DEBOUNCE_SECONDS 才合併成一次交易寫入
+  （持續有人輸入時最多延後 MAX_DELAY_SECONDS），同一代碼在這段時間內的多次輸入只寫最後一版
+- 待寫資料在交易 COMMIT 成功後才移出待寫區：寫入失敗時 ROLLBACK 並留待下次重試，load() 也不會讀到舊版
+- 超過 EXPIRE_DAYS 未更新的草稿定期刪除，並 checkpoint WAL 讓檔案不持續長大
+
+路徑：CONTRACT_DRAFT_DB（預設為本目錄下的 drafts.sqlite3）
+"""
+import atexit
+import json
+import os
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+from functools import lru_cache
+
+DEFAULT_PATH = os.environ.get(
+    "CONTRACT_DRAFT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "drafts.sqlite3"),
+)
+DEBOUNCE_SECONDS = 2.0
+MAX_DELAY_SECONDS = 10.0
+EXPIRE_DAYS = 30
+COMPACT_INTERVAL_SECONDS = 3600
+
+
+class DraftStore:
+    def __init__(self, path=DEFAULT_PATH, debounce=DEBOUNCE_SECONDS, expire_days=EXPIRE_DAYS,
+                 max_delay=MAX_DELAY_SECONDS):
+        self.path = path
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.expire_seconds = expire_days * 86400
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS drafts ("
+            " token TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS drafts_updated_at ON drafts(updated_at)")
+        self._db_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending = {}
+        self._last_compact = 0.0
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._flush_loop, name="draft-store", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def new_token():
+        return secrets.token_urlsafe(6)
+
+    def save(self, token, state):
+        """排入待寫區（不阻塞 UI）"""
+        with self._pending_lock:
+            self._pending[token] = (json.dumps(state, ensure_ascii=False), time.time())
+        self._wake.set()
+
+    def load(self, token):
+        """回傳草稿 dict；找不到或已過期時回傳 None"""
+        with self._pending_lock:
+            pending = self._pending.get(token)
+        if pending is not None:
+            return json.loads(pending[0])
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT data FROM drafts WHERE token = ? AND updated_at >= ?",
+                (token, time.time() - self.expire_seconds),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def flush(self):
+        """寫入待寫區；失敗時丟出 sqlite3.Error，資料留在待寫區"""
+        with self._pending_lock:
+            batch = [(token, data, ts) for token, (data, ts) in self._pending.items()]
+        if batch:
+            with self._db_lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "INSERT INTO drafts (token, data, updated_at) VALUES (?, ?, ?)"
+                        " ON CONFLICT(token) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                        batch,
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            with self._pending_lock:
+                # 寫入期間又有新版本的代碼留著，下一輪再寫
+                for token, data, ts in batch:
+                    if self._pending.get(token) == (data, ts):
+                        del self._pending[token]
+        if time.time() - self._last_compact > COMPACT_INTERVAL_SECONDS:
+            self.compact()
+        return len(batch)
+
+    def compact(self):
+        """刪除過期草稿並截斷 WAL；回傳刪除筆數"""
+        self._last_compact = time.time()
+        with self._db_lock:
+            cur = self._conn.execute(
+                "DELETE FROM drafts WHERE updated_at < ?", (time.time() - self.expire_seconds,)
+            )
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return cur.rowcount
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait()
+            if self._closed:
+                break
+            # 等到最後一次變更後停頓 debounce 秒（最多 max_delay 秒），把這段時間的變更合併成一次寫入
+            deadline = time.monotonic() + self.max_delay
+            while True:
+                self._wake.clear()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._wake.wait(min(self.debounce, remaining)) or self._closed:
+                    break
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"[draft_store] 寫入失敗，稍後重試：{e}", file=sys.stderr)
+                self._wake.set()
+
+
+@lru_cache(maxsize=None)
+def get_draft_store():
+    """行程內共用的草稿庫"""
+    store = DraftStore()
+    atexit.register(store.close)
+    return store
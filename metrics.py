@@ -0,0 +1,215 @@
+"""選用的效能計量（預設關閉）
+
+開啟：CONTRACT_METRICS=1；Prometheus 文字格式於 http://127.0.0.1:<CONTRACT_METRICS_PORT>/metrics
+（預設 9108）。關閉時 stage() 回傳共用的空 context manager，其他函式直接 return。
+
+子行程（render_pool / batch / archive 的行程池）內的計數與計時不會自己出現在父行程的 /metrics：
+子行程以 drain() 取出並隨工作結果帶回，父行程再 merge()。
+
+    with metrics.stage("docx_serialize"):
+        ...
+    metrics.inc("contracts_generated_total")
+"""
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+ENABLED = os.environ.get("CONTRACT_METRICS", "") == "1"
+PORT = int(os.environ.get("CONTRACT_METRICS_PORT", 9108))
+PREFIX = "contract_"
+
+# 秒
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}  # stage -> [bucket counts..., +Inf count, sum]
+_collectors = []
+_NOOP = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def stage(name):
+    """計時區塊；關閉時零成本"""
+    return _Stage(name) if ENABLED else _NOOP
+
+
+def observe(name, seconds):
+    if not ENABLED:
+        return
+    with _lock:
+        h = _histograms.get(name)
+        if h is None:
+            h = _histograms[name] = [0] * (len(BUCKETS) + 1) + [0.0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                h[i] += 1
+        h[len(BUCKETS)] += 1
+        h[-1] += seconds
+
+
+def inc(name, value=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name, value):
+    if not ENABLED:
+        return
+    with _lock:
+        _gauges[name] = value
+
+
+def drain():
+    """子行程：取出上次 drain() 以來的計數與計時並清空；關閉時回傳 None"""
+    if not ENABLED:
+        return None
+    with _lock:
+        data = (dict(_counters), {name: list(h) for name, h in _histograms.items()})
+        _counters.clear()
+        _histograms.clear()
+    return data
+
+
+def merge(data):
+    """父行程：加入子行程 drain() 的結果"""
+    if not ENABLED or data is None:
+        return
+    counters, histograms = data
+    with _lock:
+        for name, value in counters.items():
+            _counters[name] = _counters.get(name, 0) + value
+        for name, h in histograms.items():
+            mine = _histograms.get(name)
+            if mine is None:
+                _histograms[name] = h
+            else:
+                for i, value in enumerate(h):
+                    mine[i] += value
+
+
+def _after_fork_in_child():
+    # fork 當下 _lock 可能正被其他執行緒持有（子行程裡永遠不會釋放），換一把新的；
+    # 繼承來的數值屬於父行程，清空後子行程只累計自己的部分，由 drain() 帶回
+    global _lock
+    _lock = threading.Lock()
+    _counters.clear()
+    _gauges.clear()
+    _histograms.clear()
+    _collectors.clear()
+    _sessions.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def register_collector(fn):
+    """fn() 回傳 {名稱: 數值}，於每次輸出時以 gauge 呈現（例如快取統計）"""
+    if ENABLED and fn not in _collectors:
+        _collectors.append(fn)
+
+
+SESSION_IDLE_SECONDS = 300
+_sessions = {}
+
+
+def touch_session(session_id):
+    """記錄 session 最後活動時間；active_sessions 為近 SESSION_IDLE_SECONDS 內有 rerun 的數量"""
+    if not ENABLED:
+        return
+    now = time.monotonic()
+    with _lock:
+        _sessions[session_id] = now
+        for sid, seen in list(_sessions.items()):
+            if now - seen > SESSION_IDLE_SECONDS:
+                del _sessions[sid]
+        _gauges["active_sessions"] = len(_sessions)
+
+
+def download_kwargs(nbytes):
+    """給 st.download_button 的參數：開啟時於下載時累計 bytes_served_total"""
+    if not ENABLED:
+        return {}
+    return {"on_click": inc, "args": ("bytes_served_total", nbytes)}
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        for name, value in sorted(_counters.items()):
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            lines.append(f"{PREFIX}{name} {value}")
+        gauges = dict(_gauges)
+        for fn in _collectors:
+            gauges.update(fn())
+        for name, value in sorted(gauges.items()):
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            lines.append(f"{PREFIX}{name} {value}")
+        if _histograms:
+            metric = f"{PREFIX}stage_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for stage_name, h in sorted(_histograms.items()):
+                for bound, count in zip(BUCKETS, h):
+                    lines.append(f'{metric}_bucket{{stage="{stage_name}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{stage="{stage_name}",le="+Inf"}} {h[len(BUCKETS)]}')
+                lines.append(f'{metric}_sum{{stage="{stage_name}"}} {h[-1]:.6f}')
+                lines.append(f'{metric}_count{{stage="{stage_name}"}} {h[len(BUCKETS)]}')
+    return "\n".join(lines) + "\n"
+
+
+_server_started = False
+
+
+def start_http_server(port=PORT):
+    """於背景執行緒提供 /metrics（每個行程只啟動一次）"""
+    global _server_started
+    if not ENABLED:
+        return
+    with _lock:
+        if _server_started:
+            return
+        _server_started = True
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    except OSError as e:
+        print(f"[metrics] 無法監聽 127.0.0.1:{port}：{e}", file=sys.stderr)
+        return
+    threading.Thread(target=server.serve_forever, name="contract-metrics", daemon=True).start()
@@ -0,0 +1,88 @@
+"""第二階段表單與即時輸出
+
+以 st.fragment 包住：勾選或輸入時只重跑這個函式（表單＋備份碼＋回傳內容），
+不會重跑整個 app.py（側邊欄、還原區、說明文字等）。
+"""
+import streamlit as st
+
+import metrics
+from contract import PHASE2_DEFAULTS, build_backup_text, build_reply_text
+from draft_store import get_draft_store
+
+
+def restore_draft(token):
+    """用續填代碼帶回伺服器端草稿；成功回傳 True（須在表單元件建立前呼叫）"""
+    token = (token or "").strip()
+    draft = get_draft_store().load(token) if token else None
+    if draft is None:
+        return False
+    for k, v in draft.items():
+        if k in PHASE2_DEFAULTS:
+            st.session_state[k] = v
+    st.session_state.draft_token = token
+    st.session_state.draft_saved = {k: st.session_state[k] for k in PHASE2_DEFAULTS}
+    st.query_params["draft"] = token
+    return True
+
+
+def _autosave():
+    # 有變更才排入待寫區；實際寫入由 draft_store 背景合併
+    state = {k: st.session_state[k] for k in PHASE2_DEFAULTS}
+    if state == st.session_state.get("draft_saved", PHASE2_DEFAULTS):
+        return
+    store = get_draft_store()
+    if not st.session_state.get("draft_token"):
+        st.session_state.draft_token = store.new_token()
+        st.query_params["draft"] = st.session_state.draft_token
+    store.save(st.session_state.draft_token, state)
+    st.session_state.draft_saved = state
+
+
+@st.fragment
+def phase2_form():
+    with metrics.stage("phase2_fragment"):
+        _phase2_form()
+
+
+def _phase2_form():
+    # ---------- 確認事項 ----------
+    st.subheader("✅ 確認事項（照實勾選）")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.checkbox("廣告帳號已開啟", key="ad_account")
+        st.checkbox("像素事件已埋放", key="pixel")
+    with col2:
+        st.checkbox("粉專已建立", key="fanpage")
+        st.checkbox("企業管理平台已建立", key="bm")
+
+    # ---------- 資料填寫 ----------
+    st.subheader("🧾 須提供事項")
+    st.text_input("粉專網址", key="fanpage_url")
+    st.text_input("廣告導向頁", key="landing_url")
+
+    st.markdown("**競爭對手粉專**")
+    st.text_input("競品 1", key="comp1")
+    st.text_input("競品 2", key="comp2")
+    st.text_input("競品 3", key="comp3")
+
+    st.text_area("解決誰的問題？", key="who_problem")
+    st.text_area("要解決什麼問題？", key="what_problem")
+    st.text_area("如何解決？", key="how_solve")
+    st.text_input("第一個月預算", key="budget")
+
+    # ---------- 自動暫存 ----------
+    _autosave()
+    if st.session_state.get("draft_token"):
+        st.caption(f"💾 已自動暫存。續填代碼：`{st.session_state.draft_token}`（或直接用目前網址重新開啟）")
+
+    # ---------- 備份內容（即時） ----------
+    backup_text = build_backup_text(st.session_state)
+    st.subheader("🗂️ 備份用內容（請複製存到筆記本）")
+    st.code(backup_text, language=None, wrap_lines=True)
+
+    # ---------- 回傳訊息（即時生成） ----------
+    reply_text = build_reply_text(
+        st.session_state, st.session_state.get("last_party_a_name", "（未填）"), st.session_state.get("provider")
+    )
+    st.subheader("📤 回傳內容（即時更新，可直接複製）")
+    st.code(reply_text, language=None)
@@ -0,0 +1,280 @@
+"""乙方設定：多位乙方（帳戶經理）共用同一個行程，各自的基本資料與條文放在設定檔
+
+    providers/<代號>.toml            一位乙方；網址 ?provider=<代號>、CSV / JSON 的 provider 欄位、CLI --provider
+    providers/clauses/<名稱>.toml    可由多位乙方共用的條文（clause_set）
+
+乙方設定檔：
+    name = "高如慧"                  # 乙方（服務執行者），必填
+    bank_name = "中國信託商業銀行"     # 收款帳戶，必填
+    bank_code = "822"
+    account_number = "783540208870"
+    clause_set = "company"           # 選填：providers/clauses/company.toml
+    [clauses]                        # 選填：再覆寫部分條文
+    preamble = "……"
+
+條文的項目與格式同 clauses.DEFAULT_CLAUSES（title / parties / preamble / plans / articles / signatures），
+沒寫到的項目沿用預設；plans 以方案（monthly / quarterly）為單位逐欄覆寫，其餘項目整段取代。
+改了 price 的文字時記得一併改 amount（每期金額，收款排程用）。
+
+- 每位乙方載入時只解析、編譯一次（clauses.compile_contract），之後每份合約只填入變動欄位
+- 每次取用只比對設定檔（與其 clause_set 檔）的修改時間與大小；有變動時只重新載入那一位乙方，不必重啟
+- 重新載入失敗時沿用先前的版本並印出錯誤（檔案再次變動前不會重試）；第一次載入就失敗時丟出 ValueError
+- 沒有 providers/default.toml 時，預設乙方（default）為 clauses.py 內建的設定與條文；
+  專案不附 default.toml（與內建設定重複，日後容易不一致），要覆寫預設乙方時才建立
+
+路徑：CONTRACT_PROVIDERS_DIR（預設為本模組旁的 providers/）
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import tomllib
+from functools import lru_cache
+
+import metrics
+from clauses import (
+    ACCOUNT_NUMBER,
+    BANK_CODE,
+    BANK_NAME,
+    DEFAULT_CLAUSES,
+    PLAN_CODES,
+    PLAN_LABELS,
+    PLAN_SUMMARIES,
+    PROVIDER_NAME,
+    compile_contract,
+)
+
+PROVIDERS_DIR = os.environ.get(
+    "CONTRACT_PROVIDERS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "providers"),
+)
+DEFAULT_PROVIDER = "default"
+
+_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+_PROFILE_FIELDS = ("name", "bank_name", "bank_code", "account_number")
+_PROFILE_KEYS = {*_PROFILE_FIELDS, "clause_set", "clauses"}
+
+
+class Provider:
+    """一位乙方：基本資料、條文與編譯好的合約範本
+
+    不可變；設定檔更新時整個換成新的 Provider。相等與雜湊只看 (id, revision)，可直接當快取的 key：
+    revision 是內容的雜湊，只改了修改時間、內容沒變時，下游的 Word 骨架與預覽範本不會重建。
+    """
+
+    __slots__ = ("id", "name", "bank_name", "bank_code", "account_number", "clauses", "path", "revision", "_templates")
+
+    def __init__(self, provider_id, name, bank_name, bank_code, account_number, clauses, path=None):
+        self.id = provider_id
+        self.name = name
+        self.bank_name = bank_name
+        self.bank_code = bank_code
+        self.account_number = account_number
+        self.clauses = clauses
+        self.path = path
+        content = json.dumps([name, bank_name, bank_code, account_number, clauses], ensure_ascii=False, sort_keys=True)
+        self.revision = hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+        with metrics.stage("provider_compile"):
+            self._templates = compile_contract(self.fields, clauses)
+
+    @property
+    def fields(self):
+        """條文中可用的乙方欄位"""
+        return {
+            "provider": self.name,
+            "bank_name": self.bank_name,
+            "bank_code": self.bank_code,
+            "account_number": self.account_number,
+        }
+
+    @property
+    def title(self):
+        return self.clauses["title"]
+
+    def amount(self, payment_opt):
+        """該付款方案的每期金額（元）"""
+        return self.clauses["plans"][PLAN_CODES[payment_opt]]["amount"]
+
+    def plan_label(self, payment_opt):
+        """付款方案的選項名稱，金額依本乙方設定（例如「17,000元/月（每月付款）」）"""
+        return PLAN_LABELS[PLAN_CODES[payment_opt]].format(amount=self.amount(payment_opt))
+
+    def plan_summary(self, payment_opt):
+        """確認訊息中的方案說明，金額依本乙方設定（例如「17,000元/月」）"""
+        return PLAN_SUMMARIES[PLAN_CODES[payment_opt]].format(amount=self.amount(payment_opt))
+
+    def template(self, payment_opt):
+        """該付款方案編譯好的合約範本（見 clauses.compile_contract）"""
+        return self._templates[payment_opt]
+
+    def __eq__(self, other):
+        return isinstance(other, Provider) and (self.id, self.revision) == (other.id, other.revision)
+
+    def __hash__(self):
+        return hash((self.id, self.revision))
+
+    def __repr__(self):
+        return f"Provider({self.id!r}, {self.name!r}, revision={self.revision!r})"
+
+
+@lru_cache(maxsize=None)
+def builtin_provider():
+    """clauses.py 內建的預設乙方"""
+    return Provider(DEFAULT_PROVIDER, PROVIDER_NAME, BANK_NAME, BANK_CODE, ACCOUNT_NUMBER, DEFAULT_CLAUSES)
+
+
+def merge_clauses(base, override):
+    """override 的條文項目覆寫 base；plans 逐方案逐欄覆寫，其餘整段取代"""
+    unknown = set(override) - set(base)
+    if unknown:
+        raise ValueError(f"未知的條文項目：{', '.join(sorted(unknown))}")
+    merged = {**base, **override}
+    if "plans" in override:
+        unknown = set(override["plans"]) - set(base["plans"])
+        if unknown:
+            raise ValueError(f"未知的方案：{', '.join(sorted(unknown))}")
+        merged["plans"] = {code: {**plan, **override["plans"].get(code, {})} for code, plan in base["plans"].items()}
+    return merged
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _read_toml(path):
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+class ProviderStore:
+    def __init__(self, directory=PROVIDERS_DIR):
+        self.directory = directory
+        # 代號 → ((設定檔路徑, 修改戳記), …), Provider)；戳記在讀檔前取得，讀檔途中又被改寫時下次會再載入
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.errors = 0
+
+    def _path(self, name, subdir=""):
+        if not isinstance(name, str) or not _ID_RE.fullmatch(name):
+            raise ValueError(f"乙方代號只能使用英數字、- 與 _：{name!r}")
+        return os.path.join(self.directory, subdir, f"{name}.toml")
+
+    def get(self, provider_id=None):
+        """代號 → Provider（None / 空字串＝預設乙方）；找不到或設定有誤時丟出 ValueError"""
+        provider_id = provider_id or DEFAULT_PROVIDER
+        entry = self._entries.get(provider_id)
+        if entry is not None and all(_stamp(path) == stamp for path, stamp in entry[0]):
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(provider_id)
+            if entry is not None and all(_stamp(path) == stamp for path, stamp in entry[0]):
+                return entry[1]
+            return self._load(provider_id, entry[1] if entry is not None else None)
+
+    def _load(self, provider_id, previous):
+        path = self._path(provider_id)
+        files = [(path, _stamp(path))]
+        if files[0][1] is None:
+            self._entries.pop(provider_id, None)
+            if provider_id != DEFAULT_PROVIDER:
+                raise ValueError(f"找不到乙方設定：{provider_id}")
+            provider = builtin_provider()
+        else:
+            try:
+                provider = self._parse(provider_id, path, files)
+            except (OSError, tomllib.TOMLDecodeError, ValueError, TypeError, KeyError, AttributeError) as e:
+                self.errors += 1
+                metrics.inc("provider_reload_errors_total")
+                if previous is None:
+                    raise ValueError(f"乙方設定 {path} 有誤：{e}") from None
+                print(f"乙方設定 {path} 有誤，沿用先前的版本：{e}", file=sys.stderr)
+                provider = previous
+            else:
+                self.loads += 1
+        self._entries[provider_id] = (tuple(files), provider)
+        return provider
+
+    def _parse(self, provider_id, path, files):
+        data = _read_toml(path)
+        unknown = set(data) - _PROFILE_KEYS
+        if unknown:
+            raise ValueError(f"未知的設定：{', '.join(sorted(unknown))}")
+        fields = {}
+        for key in _PROFILE_FIELDS:
+            value = data.get(key)
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"缺少 {key}")
+            fields[key] = value.strip()
+
+        clauses = DEFAULT_CLAUSES
+        if "clause_set" in data:
+            clause_path = self._path(data["clause_set"], "clauses")
+            files.append((clause_path, _stamp(clause_path)))
+            clauses = merge_clauses(clauses, _read_toml(clause_path))
+        clauses = merge_clauses(clauses, data.get("clauses", {}))
+        for code, plan in clauses["plans"].items():
+            amount = plan.get("amount")
+            if isinstance(amount, bool) or not isinstance(amount, int) or amount <= 0:
+                raise ValueError(f"plans.{code}.amount 需為正整數：{amount!r}")
+        return Provider(provider_id, clauses=clauses, path=path, **fields)
+
+    def list_ids(self):
+        """設定檔目錄內的乙方代號（預設乙方一定在第一個）"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            names = []
+        ids = sorted(n[:-5] for n in names if n.endswith(".toml") and _ID_RE.fullmatch(n[:-5]))
+        return [DEFAULT_PROVIDER] + [i for i in ids if i != DEFAULT_PROVIDER]
+
+    def stats(self):
+        return {"loaded": len(self._entries), "loads": self.loads, "errors": self.errors}
+
+
+@lru_cache(maxsize=None)
+def get_provider_store():
+    return ProviderStore()
+
+
+def get_provider(provider=None):
+    """乙方代號（None＝預設乙方）→ Provider；已經是 Provider 時原樣回傳"""
+    if isinstance(provider, Provider):
+        return provider
+    return get_provider_store().get(provider)
+
+
+def _provider_metrics():
+    return {f"providers_{k}": v for k, v in get_provider_store().stats().items()}
+
+
+metrics.register_collector(_provider_metrics)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="列出並檢查乙方設定（providers/*.toml）")
+    parser.parse_args(argv)
+
+    store = get_provider_store()
+    failed = 0
+    for provider_id in store.list_ids():
+        try:
+            p = store.get(provider_id)
+        except ValueError as e:
+            failed += 1
+            print(f"{provider_id:<16} ✗ {e}", file=sys.stderr)
+            continue
+        source = os.path.relpath(p.path) if p.path else "（內建）"
+        print(f"{p.id:<16} {p.revision}  {p.name}  {p.bank_name}（{p.bank_code}）{p.account_number}  {source}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
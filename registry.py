@@ -0,0 +1,232 @@
+"""已生成合約的永久紀錄（SQLite）
+
+- contracts：每份合約的輸入參數，(格式, 乙方, 乙方設定版本, 甲方, 方案, 啟動日, 付款日) 唯一，
+  並對甲方名稱、啟動日、方案建立索引，可查「某客戶的所有合約」「三月啟動的合約」
+  乙方設定版本（providers.Provider.revision）為條文內容的雜湊：條文改過之後會生成新版合約，舊版紀錄仍可查詢
+- blobs：以 SHA-256 為主鍵的檔案內容（zlib 壓縮），內容相同只存一份
+
+合約輸出是確定性的（見 contract._write_docx），同樣輸入再次下載直接從這裡取，不必重新生成。
+路徑：CONTRACT_REGISTRY_DB（預設為本目錄下的 contracts.sqlite3）
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from functools import lru_cache
+
+from contract import PAYMENT_OPTIONS, PLAN_CODES, contract_end_date
+from providers import DEFAULT_PROVIDER, builtin_provider, get_provider
+
+DEFAULT_PATH = os.environ.get(
+    "CONTRACT_REGISTRY_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "contracts.sqlite3"),
+)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contracts (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    format TEXT NOT NULL,
+    provider TEXT NOT NULL,    -- 乙方代號
+    revision TEXT NOT NULL,    -- 乙方設定版本
+    party_a TEXT NOT NULL,
+    plan TEXT NOT NULL,
+    start_dt TEXT NOT NULL,
+    end_dt TEXT NOT NULL,
+    pay_day INTEGER NOT NULL,  -- 季付為 0
+    pay_dt TEXT NOT NULL,      -- 月付為空字串
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+    UNIQUE (format, provider, revision, party_a, plan, start_dt, pay_day, pay_dt)
+);
+CREATE INDEX IF NOT EXISTS contracts_party ON contracts(party_a COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS contracts_start ON contracts(start_dt);
+CREATE INDEX IF NOT EXISTS contracts_plan ON contracts(plan, start_dt);
+CREATE INDEX IF NOT EXISTS contracts_provider ON contracts(provider, start_dt);
+"""
+
+# 單一乙方時期的資料庫（沒有 provider / revision 欄位）：舊紀錄都是內建預設乙方生成的
+_MIGRATE_SINGLE_PROVIDER = """
+BEGIN;
+ALTER TABLE contracts RENAME TO contracts_single_provider;
+DROP INDEX IF EXISTS contracts_party;
+DROP INDEX IF EXISTS contracts_start;
+DROP INDEX IF EXISTS contracts_plan;
+{schema}
+INSERT INTO contracts (id, created_at, format, provider, revision, party_a, plan, start_dt, end_dt, pay_day, pay_dt, sha256)
+    SELECT id, created_at, format, '{provider}', '{revision}', party_a, plan, start_dt, end_dt, pay_day, pay_dt, sha256
+    FROM contracts_single_provider;
+DROP TABLE contracts_single_provider;
+COMMIT;
+"""
+
+
+class ContractRegistry:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(contracts)")}
+        if columns and "provider" not in columns:
+            self._conn.executescript(_MIGRATE_SINGLE_PROVIDER.format(
+                schema=_SCHEMA, provider=DEFAULT_PROVIDER, revision=builtin_provider().revision,
+            ))
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _params(party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+        # 與 render_cache 相同的正規化：方案用不到的付款欄位固定為 0 / 空字串
+        # （UNIQUE 條件中的 NULL 彼此不相等，因此不用 NULL）
+        monthly = payment_opt == PAYMENT_OPTIONS[0]
+        provider = get_provider(provider)
+        return {
+            "provider": provider.id,
+            "revision": provider.revision,
+            "party_a": party_a,
+            "plan": PLAN_CODES[payment_opt],
+            "start_dt": start_dt.isoformat(),
+            "end_dt": contract_end_date(payment_opt, start_dt).isoformat(),
+            "pay_day": int(pay_day) if monthly and pay_day is not None else 0,
+            "pay_dt": pay_dt.isoformat() if not monthly and pay_dt is not None else "",
+        }
+
+    def lookup(self, fmt, party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+        """回傳已登錄的檔案內容（乙方目前設定版本的）；沒有時回傳 None"""
+        p = self._params(party_a, payment_opt, start_dt, pay_day, pay_dt, provider)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT b.data FROM contracts c JOIN blobs b ON b.sha256 = c.sha256"
+                " WHERE c.format = ? AND c.provider = ? AND c.revision = ? AND c.party_a = ? AND c.plan = ?"
+                " AND c.start_dt = ? AND c.pay_day = ? AND c.pay_dt = ?",
+                (fmt, p["provider"], p["revision"], p["party_a"], p["plan"], p["start_dt"], p["pay_day"], p["pay_dt"]),
+            ).fetchone()
+        return zlib.decompress(row["data"]) if row else None
+
+    def record(self, fmt, data, party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+        """登錄一份合約並回傳內容雜湊；同內容的檔案只存一份"""
+        sha = hashlib.sha256(data).hexdigest()
+        p = self._params(party_a, payment_opt, start_dt, pay_day, pay_dt, provider)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO blobs (sha256, size, data) VALUES (?, ?, ?)",
+                    (sha, len(data), zlib.compress(data, 9)),
+                )
+                self._conn.execute(
+                    "INSERT INTO contracts (created_at, format, provider, revision, party_a, plan, start_dt, end_dt,"
+                    " pay_day, pay_dt, sha256) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (format, provider, revision, party_a, plan, start_dt, pay_day, pay_dt)"
+                    " DO UPDATE SET sha256 = excluded.sha256",
+                    (time.time(), fmt, p["provider"], p["revision"], p["party_a"], p["plan"], p["start_dt"],
+                     p["end_dt"], p["pay_day"], p["pay_dt"], sha),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return sha
+
+    def get_or_render(self, fmt, render, party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+        # 查詢、生成與登錄用同一個版本的乙方設定（中途重新載入也不會錯置）
+        provider = get_provider(provider)
+        data = self.lookup(fmt, party_a, payment_opt, start_dt, pay_day, pay_dt, provider)
+        if data is None:
+            data = render(party_a, payment_opt, start_dt, pay_day, pay_dt, provider)
+            self.record(fmt, data, party_a, payment_opt, start_dt, pay_day, pay_dt, provider)
+        return data
+
+    def search(self, party=None, start_from=None, start_to=None, plan=None, fmt=None, provider=None, limit=200):
+        """依甲方（部分比對）、啟動日區間（date，含頭尾）、方案代碼、乙方代號查詢，新到舊排序"""
+        where, args = [], []
+        if provider:
+            where.append("provider = ?")
+            args.append(provider)
+        if party:
+            # 甲方名稱中的 % _ \ 照字面比對
+            where.append("party_a LIKE ? ESCAPE '\\' COLLATE NOCASE")
+            args.append("%" + re.sub(r"([%_\\])", r"\\\1", party) + "%")
+        if start_from:
+            where.append("start_dt >= ?")
+            args.append(start_from.isoformat())
+        if start_to:
+            where.append("start_dt <= ?")
+            args.append(start_to.isoformat())
+        if plan:
+            where.append("plan = ?")
+            args.append(plan)
+        if fmt:
+            where.append("format = ?")
+            args.append(fmt)
+        sql = (
+            "SELECT c.id, c.created_at, c.format, c.provider, c.revision, c.party_a, c.plan, c.start_dt, c.end_dt,"
+            " c.pay_day, c.pay_dt, c.sha256, b.size"
+            " FROM contracts c JOIN blobs b ON b.sha256 = c.sha256"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY c.start_dt DESC, c.id DESC LIMIT ?"
+        )
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, (*args, limit))]
+
+    def iter_contracts(self, start_from, start_to, after=0, batch_size=500):
+        """啟動日在 [start_from, start_to]（date，含頭尾）的合約，每份一筆（Word / PDF 合併）
+
+        同一份合約＝同乙方、同設定版本、同參數。依最早登錄的 id（key）遞增、每次 batch_size 筆分批讀取，不會一次全部載入；
+        after 為上次讀到的 key，可從中斷處接續。docx_sha256 / pdf_sha256 在該格式未登錄時為 None。
+
+        以 id 為游標往後掃（+start_dt 讓 SQLite 走主鍵而不是 start_dt 索引，不必每批重新分組整段期間）；
+        一份合約最多兩筆（docx / pdf），另一個格式以 UNIQUE 索引查出，id 較小的那筆代表這份合約。
+        """
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT c.id AS key, c.provider, c.revision, c.party_a, c.plan, c.start_dt, c.end_dt,"
+                    " c.pay_day, c.pay_dt,"
+                    " CASE c.format WHEN 'docx' THEN c.sha256 ELSE o.sha256 END AS docx_sha256,"
+                    " CASE c.format WHEN 'pdf' THEN c.sha256 ELSE o.sha256 END AS pdf_sha256"
+                    " FROM contracts c LEFT JOIN contracts o"
+                    " ON o.format = CASE c.format WHEN 'docx' THEN 'pdf' ELSE 'docx' END"
+                    " AND o.provider = c.provider AND o.revision = c.revision AND o.party_a = c.party_a"
+                    " AND o.plan = c.plan AND o.start_dt = c.start_dt AND o.pay_day = c.pay_day AND o.pay_dt = c.pay_dt"
+                    " WHERE c.id > ? AND +c.start_dt >= ? AND +c.start_dt <= ? AND (o.id IS NULL OR o.id > c.id)"
+                    " ORDER BY c.id LIMIT ?",
+                    (after, start_from.isoformat(), start_to.isoformat(), batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            after = rows[-1]["key"]
+
+    def fetch(self, sha256):
+        """以內容雜湊取回檔案；找不到時回傳 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        return zlib.decompress(row["data"]) if row else None
+
+    def stats(self):
+        with self._lock:
+            contracts = self._conn.execute("SELECT COUNT(*) FROM contracts").fetchone()[0]
+            blobs, raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+            ).fetchone()
+        return {"contracts": contracts, "blobs": blobs, "raw_bytes": raw, "stored_bytes": stored}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+@lru_cache(maxsize=None)
+def get_registry():
+    """行程內共用的合約紀錄"""
+    return ContractRegistry()
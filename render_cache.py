@@ -0,0 +1,138 @@
+"""已生成合約的行程內快取（LRU，依總位元組數設上限）
+
+同樣的輸入（含重複按「生成」、不同同事下載同一份合約）直接回傳同一個 bytes 物件，
+各 session 的 session_state 只存參照，不會各自複製一份。
+快取未命中時先查 registry（已登錄過的合約不重新生成），最後才真的生成並登錄。
+
+上限可用環境變數調整：
+    CONTRACT_CACHE_MAX_BYTES（預設 64 MB）、CONTRACT_CACHE_MAX_ITEMS（預設 512）
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import metrics
+from contract import PAYMENT_OPTIONS, generate_docx_bytes
+from providers import get_provider
+from registry import get_registry
+
+
+class RenderCache:
+    def __init__(self, max_bytes, max_items):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """命中時回傳 bytes，否則回傳 None（兩者都計入統計）"""
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+            return None
+
+    def put(self, key, data):
+        with self._lock:
+            if len(data) > self.max_bytes:
+                return data
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._items[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes or len(self._items) > self.max_items:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+        return data
+
+    def get_or_render(self, key, render):
+        data = self.get(key)
+        if data is not None:
+            return data
+        # 生成不佔鎖；同一 key 同時兩次未命中時，後寫入者覆蓋即可
+        return self.put(key, render())
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_items": self.max_items,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+render_cache = RenderCache(
+    max_bytes=int(os.environ.get("CONTRACT_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    max_items=int(os.environ.get("CONTRACT_CACHE_MAX_ITEMS", 512)),
+)
+
+
+def _cache_metrics():
+    return {f"render_cache_{k}": v for k, v in render_cache.stats().items()}
+
+
+metrics.register_collector(_cache_metrics)
+
+
+def contract_cache_key(fmt, party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+    """正規化輸入：月付忽略 pay_dt、季付忽略 pay_day（不影響內容的欄位不進 key）
+
+    乙方以 (代號, 設定版本) 進 key：條文更新後不會拿到舊版合約。
+    """
+    if payment_opt == PAYMENT_OPTIONS[0]:
+        pay_dt = None
+    else:
+        pay_day = None
+    provider = get_provider(provider)
+    return (
+        fmt,
+        provider.id,
+        provider.revision,
+        party_a,
+        payment_opt,
+        start_dt.isoformat(),
+        int(pay_day) if pay_day is not None else None,
+        pay_dt.isoformat() if pay_dt is not None else None,
+    )
+
+
+def cached_docx_bytes(party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+    provider = get_provider(provider)
+    key = contract_cache_key("docx", party_a, payment_opt, start_dt, pay_day, pay_dt, provider)
+    return render_cache.get_or_render(
+        key,
+        lambda: get_registry().get_or_render(
+            "docx", generate_docx_bytes, party_a, payment_opt, start_dt, pay_day, pay_dt, provider
+        ),
+    )
+
+
+def cached_pdf_bytes(party_a, payment_opt, start_dt, pay_day, pay_dt, provider=None):
+    from contract_pdf import generate_pdf_bytes
+
+    provider = get_provider(provider)
+    key = contract_cache_key("pdf", party_a, payment_opt, start_dt, pay_day, pay_dt, provider)
+    return render_cache.get_or_render(
+        key,
+        lambda: get_registry().get_or_render(
+            "pdf", generate_pdf_bytes, party_a, payment_opt, start_dt, pay_day, pay_dt, provider
+        ),
+    )
@@ -0,0 +1,194 @@
+"""跨 session 共用的背景生成行程池
+
+合約生成改在子行程執行，Streamlit 的 script thread 不再因 python-docx 搶 GIL 而卡住；
+子行程啟動時就載入 python-docx / reportlab 並建好合約骨架。
+
+- 在途工作（執行中＋排隊）上限為 workers + queue_size，滿了 submit() 直接丟出 PoolBusy（背壓）
+- 每個工作由呼叫端以 JOB_TIMEOUT_SECONDS 判斷逾時，逾時後呼叫 abandon()：還在排隊的直接取消；
+  已在執行的無法單獨中止，會結束所有子行程並重建（同時在執行的其他工作一併失敗，使用者需再按一次）
+- 子行程意外結束（BrokenProcessPool）時自動重建行程池，不必重啟整個服務
+- stats() 回報排隊深度、平均等待時間等，供調整 workers 數
+- 子行程內的計量（contracts_generated_total、各階段計時）隨結果帶回，在父行程合併（見 metrics.drain）
+
+設定：CONTRACT_RENDER_WORKERS（預設 CPU 核心數）、CONTRACT_RENDER_QUEUE（預設 workers × 4）
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+import metrics
+import docx_writer
+from contract import DOCX_ENGINE, PAYMENT_OPTIONS, _contract_skeleton, generate_docx_bytes
+
+JOB_TIMEOUT_SECONDS = 30
+
+
+def pool_context():
+    """子行程的啟動方式
+
+    在 Streamlit 裡 sys.modules["__main__"] 就是 app.py，spawn / forkserver 的子行程會重新執行
+    主模組（等於把整個 UI 腳本再跑一次），因此 POSIX 上改用 fork；其他平台才用 spawn。
+    子行程只做生成，不碰 Streamlit 與其他執行緒持有的資源。
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+class PoolBusy(RuntimeError):
+    """在途工作已達上限"""
+
+
+def warm_worker():
+    """子行程的 initializer（行程池、batch、archive 共用）：重設 fork 繼承來的狀態並預熱骨架與字型"""
+    import contract_pdf
+    from providers import get_provider_store
+    from registry import get_registry
+
+    # fork 繼承來的 SQLite 連線不可在子行程沿用，讓子行程自己重新開；
+    # 乙方設定的鎖也可能在 fork 當下被其他執行緒持有，子行程同樣重新載入
+    get_registry.cache_clear()
+    get_provider_store.cache_clear()
+
+    for opt in PAYMENT_OPTIONS:
+        _contract_skeleton(opt)
+    if DOCX_ENGINE == "stream":
+        docx_writer._template()
+    contract_pdf.register_fonts()
+
+
+def run_job(fn, *args):
+    """子行程：執行 fn，回傳 (開始時間, 回傳值, 這段期間的計量)；計量交給父行程 metrics.merge()"""
+    started = time.time()
+    result = fn(*args)
+    return started, result, metrics.drain()
+
+
+def render_contract_files(kwargs):
+    """子行程：取得 (docx, pdf)；已登錄過的合約直接從 registry 取出"""
+    from contract_pdf import generate_pdf_bytes
+    from registry import get_registry
+
+    registry = get_registry()
+    docx = registry.get_or_render("docx", generate_docx_bytes, **kwargs)
+    pdf = registry.get_or_render("pdf", generate_pdf_bytes, **kwargs)
+    return docx, pdf
+
+
+class RenderPool:
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.max_in_flight = workers + queue_size
+        self._executor = self._new_executor()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=pool_context(),
+            initializer=warm_worker,
+        )
+
+    def _restart(self, broken):
+        """換掉壞掉（或要強制結束）的 executor；多個執行緒同時發現時只重建一次"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._new_executor()
+            self.restarts += 1
+        metrics.inc("render_pool_restarts_total")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args):
+        """送出工作並回傳 Future（結果為 run_job 的 (開始時間, 回傳值, 計量)）
+
+        在途已滿時丟出 PoolBusy；行程池壞掉時重建後重送一次，仍失敗才丟出 BrokenProcessPool
+        """
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise PoolBusy(f"在途工作已達上限 {self.max_in_flight}")
+            self._in_flight += 1
+            self.submitted += 1
+        submitted_at = time.time()
+        try:
+            try:
+                future = self._executor.submit(run_job, fn, *args)
+            except BrokenProcessPool:
+                self._restart(self._executor)
+                future = self._executor.submit(run_job, fn, *args)
+        except BaseException:
+            # 沒送出去就不佔名額
+            with self._lock:
+                self._in_flight -= 1
+                self.failed += 1
+            raise
+        future.add_done_callback(lambda f: self._done(f, submitted_at))
+        return future
+
+    def abandon(self, future):
+        """放棄逾時的工作：還在排隊就取消，已在執行就結束所有子行程並重建行程池"""
+        if future.cancel() or future.done():
+            return
+        executor = self._executor
+        # ProcessPoolExecutor 沒有結束單一工作的公開介面；子行程被結束後，
+        # 其上所有未完成的 Future 都會以 BrokenProcessPool 結束，名額隨之釋放
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        self._restart(executor)
+
+    def _done(self, future, submitted_at):
+        finished = time.time()
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                return
+            started, _, worker_metrics = future.result()
+            self.completed += 1
+            self._wait_total += started - submitted_at
+            self._run_total += finished - started
+        metrics.merge(worker_metrics)
+        metrics.observe("render_queue_wait", started - submitted_at)
+        metrics.observe("render_job", finished - started)
+
+    def stats(self):
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "avg_wait_seconds": round(self._wait_total / done, 4),
+                "avg_run_seconds": round(self._run_total / done, 4),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache(maxsize=None)
+def get_render_pool():
+    workers = int(os.environ.get("CONTRACT_RENDER_WORKERS", os.cpu_count() or 1))
+    queue_size = int(os.environ.get("CONTRACT_RENDER_QUEUE", workers * 4))
+    pool = RenderPool(workers, queue_size)
+    metrics.register_collector(lambda: {f"render_pool_{k}": v for k, v in pool.stats().items()})
+    return pool
@@ -0,0 +1,424 @@
+"""第二階段回傳內容（build_reply_text 的【第二階段啟動資料】）批次解析與索引
+
+CLI：
+    python replies.py ingest LINE聊天記錄.txt 回覆資料夾/ ...
+    python replies.py list --pending pixel      # 最新一則回覆中「像素事件 ⬜ 未完成」的客戶
+    python replies.py list --party 王 --history
+
+- iter_replies() 逐行讀取，每解析完一則就 yield 一筆 dict，記憶體用量與檔案大小無關
+- 支援 LINE 聊天記錄匯出檔（日期列 ＋「HH:MM<TAB>傳送者<TAB>內容」，多行訊息以雙引號包住）
+  與單純的文字檔（資料夾內每個 .txt；沒有時間時以檔案修改時間為收到時間）
+- ReplyIndex：SQLite（WAL），以內容雜湊去重，重疊的匯出檔重複匯入不會多出紀錄；
+  寫入時每 BATCH_SIZE 筆一次交易，不會整批留在記憶體
+
+路徑：CONTRACT_REPLY_DB（預設為本目錄下的 replies.sqlite3）
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import metrics
+from contract import PHASE2_CHECK_KEYS, PHASE2_DATA_KEYS, PHASE2_DEFAULTS
+
+DEFAULT_PATH = os.environ.get(
+    "CONTRACT_REPLY_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "replies.sqlite3"),
+)
+BATCH_SIZE = 500
+
+# =========================================================
+# 0) 解析
+# =========================================================
+MARKER = "【第二階段啟動資料】"
+
+# (段落, 標籤) → 欄位；與 contract.build_reply_text 的輸出對應
+_FIELDS = {
+    ("確認事項", "廣告帳號"): "ad_account",
+    ("確認事項", "像素事件"): "pixel",
+    ("確認事項", "粉專"): "fanpage",
+    ("確認事項", "BM"): "bm",
+    ("資料", "粉專網址"): "fanpage_url",
+    ("資料", "導向頁"): "landing_url",
+    ("競品", "1"): "comp1",
+    ("競品", "2"): "comp2",
+    ("競品", "3"): "comp3",
+    ("定位", "對象"): "who_problem",
+    ("定位", "問題"): "what_problem",
+    ("定位", "解法"): "how_solve",
+    ("首月預算", ""): "budget",
+}
+_SECTIONS = {section for section, _ in _FIELDS}
+
+_SECTION_RE = re.compile(r"^【(.+)】$")
+_ITEM_RE = re.compile(r"^-\s*(?:([^：]{1,8})：)?\s*(.*)$")
+_COMPETITOR_RE = re.compile(r"^([1-9])\)\s*(.*)$")
+_DAY_RE = re.compile(r"^(\d{4})[/.\-](\d{1,2})[/.\-](\d{1,2})(?:\s*[（(]?\S{1,3}[）)]?)?$")
+_MESSAGE_RE = re.compile(r"^(上午|下午|AM|PM)?\s?(\d{1,2}):(\d{2})\t([^\t]*)\t(.*)$")
+
+_EMPTY = "（未填）"
+
+
+def _check_value(text):
+    if text.startswith("✅"):
+        return True
+    if text.startswith("⬜"):
+        return False
+    return None
+
+
+class _ReplyParser:
+    """逐行餵入訊息內容；一則回覆完整（讀到首月預算）或被中斷時回傳 dict"""
+
+    def __init__(self):
+        self._record = None
+        self._context = {"received_at": "", "sender": "", "source": "", "line": 0}
+
+    def start_message(self, received_at, sender, source, line):
+        self._context = {"received_at": received_at, "sender": sender, "source": source, "line": line}
+
+    def end(self):
+        """訊息結束：有讀到甲方的未完成回覆也照樣輸出（缺的欄位維持預設值）"""
+        record, self._record = self._record, None
+        if record is not None and record["party_a"] is not None:
+            return self._finish(record)
+        return None
+
+    def _finish(self, record):
+        del record["_section"], record["_field"], record["_blanks"]
+        for key in PHASE2_DATA_KEYS:
+            record[key] = record[key].strip()
+        return record
+
+    def feed(self, text, line):
+        text = text.strip()
+        if MARKER in text:
+            previous = self.end()
+            self._record = {
+                **self._context, "line": line, "party_a": None,
+                **{k: None for k in PHASE2_CHECK_KEYS}, **{k: "" for k in PHASE2_DATA_KEYS},
+                "_section": None, "_field": None, "_blanks": 0,
+            }
+            return previous
+        record = self._record
+        if record is None:
+            return None
+
+        if not text:
+            record["_blanks"] += 1
+            return None
+
+        if record["party_a"] is None and text.startswith("甲方："):
+            party = text[len("甲方："):].strip()
+            record["party_a"] = "" if party == _EMPTY else party
+            return None
+
+        m = _SECTION_RE.match(text)
+        if m and m.group(1) in _SECTIONS:
+            record["_section"], record["_field"], record["_blanks"] = m.group(1), None, 0
+            return None
+
+        section = record["_section"]
+        key = value = None
+        if section == "競品":
+            m = _COMPETITOR_RE.match(text)
+            if m:
+                key, value = _FIELDS.get((section, m[1])), m[2]
+        elif section == "首月預算":
+            # 預算本身可能含有「：」，不拆標籤
+            if text.startswith("-"):
+                key, value = "budget", text[1:]
+        elif section is not None:
+            m = _ITEM_RE.match(text)
+            if m:
+                key, value = _FIELDS.get((section, m[1] or "")), m[2]
+
+        if key is None:
+            # 不是已知欄位：多行回答（對象／問題／解法）的後續行，中間的空行一併保留
+            field = record["_field"]
+            if field in PHASE2_DATA_KEYS:
+                record[field] += "\n" * (record["_blanks"] + 1) + text
+            record["_blanks"] = 0
+            return None
+
+        value = value.strip()
+        record["_field"], record["_blanks"] = key, 0
+        if key in PHASE2_CHECK_KEYS:
+            record[key] = _check_value(value)
+        else:
+            record[key] = "" if value == _EMPTY else value
+        if key == "budget":
+            # 首月預算是最後一欄（單行），讀到就完成，後面的閒聊不會被併進來
+            self._record = None
+            return self._finish(record)
+        return None
+
+
+def iter_replies(fp, source="", received_at=""):
+    """從文字串流逐則解析回覆
+
+    每筆 dict 含 party_a、received_at（"YYYY-MM-DD HH:MM"，不明時為 received_at 參數）、
+    sender、source、line（標記所在行號），以及第二階段各欄位；
+    勾選欄位為 True / False，回覆中沒有這一行時為 None；文字欄位「（未填）」一律轉為空字串。
+    """
+    parser = _ReplyParser()
+    parser.start_message(received_at, "", source, 0)
+    day = ""
+    quoted = False
+    for line_no, raw in enumerate(fp, 1):
+        text = raw.rstrip("\r\n")
+        closes = False
+        if quoted:
+            trailing = len(text) - len(text.rstrip('"'))
+            if trailing % 2:
+                text, quoted, closes = text[:-1], False, True
+            text = text.replace('""', '"')
+        else:
+            m = _DAY_RE.match(text.strip())
+            if m:
+                record = parser.end()
+                if record:
+                    yield record
+                day = f"{int(m[1]):04d}-{int(m[2]):02d}-{int(m[3]):02d}"
+                continue
+            m = _MESSAGE_RE.match(text)
+            if m:
+                record = parser.end()
+                if record:
+                    yield record
+                hour = int(m[2]) % 12 + 12 if m[1] in ("下午", "PM") else int(m[2]) % 12 if m[1] else int(m[2])
+                stamp = f"{day} {hour:02d}:{m[3]}" if day else received_at
+                parser.start_message(stamp, m[4], source, line_no)
+                text = m[5]
+                if text.startswith('"'):
+                    text = text[1:]
+                    trailing = len(text) - len(text.rstrip('"'))
+                    if trailing % 2:
+                        text, closes = text[:-1], True
+                    else:
+                        quoted = True
+                    text = text.replace('""', '"')
+                else:
+                    closes = True
+
+        record = parser.feed(text, line_no)
+        if record:
+            yield record
+        if closes:
+            record = parser.end()
+            if record:
+                yield record
+    record = parser.end()
+    if record:
+        yield record
+
+
+def iter_paths(paths):
+    """檔案或資料夾（遞迴讀取其中的 .txt，依路徑排序）逐則解析"""
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names
+                if name.lower().endswith(".txt")
+            )
+        else:
+            files = [path]
+        for file in files:
+            mtime = datetime.fromtimestamp(os.path.getmtime(file)).strftime("%Y-%m-%d %H:%M")
+            with open(file, encoding="utf-8-sig", errors="replace") as fp:
+                yield from iter_replies(fp, source=file, received_at=mtime)
+
+# =========================================================
+# 1) 索引
+# =========================================================
+_COLUMNS = ("party_a", "received_at", "sender", "source", "line", *PHASE2_DEFAULTS)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS replies (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,  -- 甲方、時間、傳送者與各欄位內容的雜湊；同一則訊息只存一次
+    party_a TEXT NOT NULL,
+    received_at TEXT NOT NULL,    -- YYYY-MM-DD HH:MM
+    sender TEXT NOT NULL,
+    source TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    {", ".join(f"{k} INTEGER" for k in PHASE2_CHECK_KEYS)},  -- 1 已完成／0 未完成／NULL 回覆中沒有
+    {", ".join(f"{k} TEXT NOT NULL" for k in PHASE2_DATA_KEYS)}
+);
+CREATE INDEX IF NOT EXISTS replies_party ON replies(party_a COLLATE NOCASE, received_at);
+CREATE INDEX IF NOT EXISTS replies_received ON replies(received_at);
+"""
+
+
+def _digest(record):
+    key = [record["party_a"], record["received_at"], record["sender"], *(record[k] for k in PHASE2_DEFAULTS)]
+    return hashlib.sha1(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ReplyIndex:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _insert(self, batch):
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO replies (digest, {', '.join(_COLUMNS)})"
+                    f" VALUES ({', '.join('?' * (len(_COLUMNS) + 1))})",
+                    batch,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._conn.total_changes - before
+
+    def ingest(self, records, batch_size=BATCH_SIZE):
+        """寫入 iter_replies() 的結果；回傳 (解析筆數, 新增筆數)"""
+        seen = inserted = 0
+        batch = []
+        with metrics.stage("replies_ingest"):
+            for record in records:
+                seen += 1
+                batch.append((_digest(record), *(record[k] for k in _COLUMNS)))
+                if len(batch) >= batch_size:
+                    inserted += self._insert(batch)
+                    batch.clear()
+            if batch:
+                inserted += self._insert(batch)
+        return seen, inserted
+
+    def search(self, party=None, pending=None, history=False, limit=200):
+        """查詢回覆，新到舊排序
+
+        party：甲方名稱（部分比對）；pending：勾選欄位清單，任一項未完成（或沒回報）才列出，
+        空清單代表四項中任一項；history=False 時每位甲方只看最新一則回覆。
+        """
+        where, args = [], []
+        if party:
+            # 甲方名稱中的 % _ \ 照字面比對
+            where.append("party_a LIKE ? ESCAPE '\\' COLLATE NOCASE")
+            args.append("%" + re.sub(r"([%_\\])", r"\\\1", party) + "%")
+        if pending is not None:
+            keys = list(pending) or PHASE2_CHECK_KEYS
+            unknown = set(keys) - set(PHASE2_CHECK_KEYS)
+            if unknown:
+                raise ValueError(f"未知的確認事項：{', '.join(sorted(unknown))}")
+            where.append("(" + " OR ".join(f"COALESCE({k}, 0) = 0" for k in keys) + ")")
+
+        table = "replies"
+        if not history:
+            # 先取每位甲方的最新一則，再套條件：已補完的客戶不會因為舊回覆被列出
+            table = (
+                "(SELECT *, ROW_NUMBER() OVER (PARTITION BY party_a ORDER BY received_at DESC, id DESC) AS rn"
+                " FROM replies)"
+            )
+            where.insert(0, "rn = 1")
+        sql = f"SELECT * FROM {table}" + (" WHERE " + " AND ".join(where) if where else "")
+        sql += " ORDER BY received_at DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = [dict(row) for row in self._conn.execute(sql, (*args, limit))]
+        for row in rows:
+            row.pop("rn", None)
+            for k in PHASE2_CHECK_KEYS:
+                row[k] = None if row[k] is None else bool(row[k])
+        return rows
+
+    def iter_received(self, received_from, received_to, batch_size=BATCH_SIZE):
+        """收到日期在 [received_from, received_to]（date，含頭尾）的回覆，依 id 分批讀取"""
+        lo, hi = received_from.isoformat(), (received_to + timedelta(days=1)).isoformat()
+        after = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM replies WHERE id > ? AND received_at >= ? AND received_at < ? ORDER BY id LIMIT ?",
+                    (after, lo, hi, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                row = dict(row)
+                for k in PHASE2_CHECK_KEYS:
+                    row[k] = None if row[k] is None else bool(row[k])
+                yield row
+            after = rows[-1]["id"]
+
+    def stats(self):
+        with self._lock:
+            replies, parties = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT party_a) FROM replies").fetchone()
+        return {"replies": replies, "parties": parties}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+@lru_cache(maxsize=None)
+def get_reply_index():
+    """行程內共用的回覆索引"""
+    return ReplyIndex()
+
+# =========================================================
+# 2) CLI
+# =========================================================
+_CHECK_LABELS = {k: label for (section, label), k in _FIELDS.items() if section == "確認事項"}
+
+
+def _mark(value):
+    return "？" if value is None else "✅" if value else "⬜"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="第二階段回傳內容解析與查詢")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="匯入 LINE 聊天記錄匯出檔或文字檔（資料夾會遞迴讀取 .txt）")
+    p_ingest.add_argument("paths", nargs="+")
+
+    p_list = sub.add_parser("list", help="查詢回覆（預設每位甲方只列最新一則）")
+    p_list.add_argument("--party", default=None, help="甲方名稱（部分比對）")
+    p_list.add_argument(
+        "--pending", nargs="*", default=None, choices=PHASE2_CHECK_KEYS,
+        help="只列出這些確認事項仍未完成的客戶（不指定項目＝任一項）",
+    )
+    p_list.add_argument("--history", action="store_true", help="列出所有回覆，不只最新一則")
+    p_list.add_argument("--json", action="store_true", help="每筆輸出一行 JSON（含所有欄位）")
+    p_list.add_argument("--limit", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    index = get_reply_index()
+    if args.command == "ingest":
+        missing = [p for p in args.paths if not os.path.exists(p)]
+        if missing:
+            parser.error(f"找不到：{', '.join(missing)}")
+        seen, inserted = index.ingest(iter_paths(args.paths))
+        print(f"解析 {seen} 則回覆，新增 {inserted} 則（共 {index.stats()['replies']} 則）")
+        return 0
+
+    rows = index.search(party=args.party, pending=args.pending, history=args.history, limit=args.limit)
+    for row in rows:
+        if args.json:
+            print(json.dumps(row, ensure_ascii=False))
+            continue
+        checks = " ".join(f"{_CHECK_LABELS[k]}{_mark(row[k])}" for k in PHASE2_CHECK_KEYS)
+        print(f"{row['received_at'] or '-':<16}  {checks}  {row['party_a']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""已生成檔案的磁碟暫存區（session 只存小小的 handle，不存整份檔案）
+
+- 檔名為內容 SHA-256，相同內容只存一份；寫入走暫存檔＋os.replace，不會讀到寫一半的檔案
+- 總大小超過 CONTRACT_SPOOL_MAX_BYTES（預設 256 MB）或超過 SPOOL_IDLE_SECONDS 未被使用的檔案，
+  依最後使用時間（mtime）由舊到新刪除
+- 下載時才讀檔（st.download_button 的 data 傳 callable），檔案已被清掉時改從 registry 以同一個雜湊取回
+
+路徑：CONTRACT_SPOOL_DIR（預設為系統暫存目錄下的 contract_spool）
+"""
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+
+import metrics
+
+DEFAULT_DIR = os.environ.get("CONTRACT_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "contract_spool"))
+MAX_BYTES = int(os.environ.get("CONTRACT_SPOOL_MAX_BYTES", 256 * 1024 * 1024))
+SPOOL_IDLE_SECONDS = 6 * 3600
+SWEEP_INTERVAL_SECONDS = 60
+
+
+class Spool:
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=MAX_BYTES, idle_seconds=SPOOL_IDLE_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._total = sum(e.stat().st_size for e in os.scandir(directory) if e.is_file())
+
+    def _path(self, handle):
+        return os.path.join(self.directory, f"{handle['sha256']}.{handle['ext']}")
+
+    def put(self, data, ext):
+        """寫入（或沿用已存在的同內容檔案）並回傳 handle：{"sha256", "ext", "size"}"""
+        handle = {"sha256": hashlib.sha256(data).hexdigest(), "ext": ext, "size": len(data)}
+        path = self._path(handle)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            with self._lock:
+                self._total += len(data)
+        self.sweep(keep=path)
+        return handle
+
+    def put_file(self, src, ext):
+        """把已寫好的檔案（例如批次 ZIP）移入暫存區並回傳 handle；src 會被移走或刪除
+
+        src 須與暫存區在同一個檔案系統（用 part_path() 取得），移入不必複製。
+        """
+        digest = hashlib.sha256()
+        with open(src, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        size = os.path.getsize(src)
+        handle = {"sha256": digest.hexdigest(), "ext": ext, "size": size}
+        path = self._path(handle)
+        try:
+            os.utime(path)
+            os.remove(src)
+        except FileNotFoundError:
+            os.replace(src, path)
+            with self._lock:
+                self._total += size
+        self.sweep(keep=path)
+        return handle
+
+    def part_path(self):
+        """暫存區內的暫存檔路徑（.part 不會被 sweep 刪除），供 put_file 使用"""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        os.close(fd)
+        return tmp
+
+    def read(self, handle):
+        """讀出檔案內容；已被清掉時回傳 None"""
+        path = self._path(handle)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # 讀完到這裡之間可能剛好被 sweep 刪掉，內容已讀到就照樣回傳
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return data
+
+    def sweep(self, force=False, keep=None):
+        """刪除閒置過久的檔案，並把總大小壓回上限內（keep 為剛寫入、不可刪的路徑）；回傳刪除數"""
+        now = time.time()
+        with self._lock:
+            if not force and self._total <= self.max_bytes and now - self._last_sweep < SWEEP_INTERVAL_SECONDS:
+                return 0
+            self._last_sweep = now
+            entries = sorted(
+                (e for e in os.scandir(self.directory) if e.is_file() and not e.name.endswith(".part")),
+                key=lambda e: e.stat().st_mtime,
+            )
+            total = sum(e.stat().st_size for e in entries)
+            removed = 0
+            for e in entries:
+                st = e.stat()
+                if total <= self.max_bytes and now - st.st_mtime <= self.idle_seconds:
+                    break
+                if e.path == keep:
+                    continue
+                try:
+                    os.remove(e.path)
+                except FileNotFoundError:
+                    continue
+                total -= st.st_size
+                removed += 1
+            self._total = total
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {"bytes": self._total, "max_bytes": self.max_bytes}
+
+
+@lru_cache(maxsize=None)
+def get_spool():
+    """行程內共用的暫存區"""
+    spool = Spool()
+    metrics.register_collector(lambda: {f"spool_{k}": v for k, v in spool.stats().items()})
+    return spool
+
+
+def spool_reader(handle):
+    """給 st.download_button(data=...) 的 callable：按下下載時才讀檔"""
+
+    def read():
+        data = get_spool().read(handle)
+        if data is None:
+            from registry import get_registry
+
+            data = get_registry().fetch(handle["sha256"])
+        return data
+
+    return read